@@ -0,0 +1,300 @@
+"""
+Command-line entry point for headless batch transcription.
+
+    python transcribe_cli.py media/ "recordings/**/*.m4a" talk.mp4 \
+        --model whisper-1 --provider a------x --concurrency 3
+
+    python transcribe_cli.py --watch /srv/dropbox   # ingest continuously
+
+Several processes or hosts can share the work through a job store:
+
+    python transcribe_cli.py media/ --store /shared/jobs.sqlite   # submit
+    python transcribe_cli.py --worker --store /shared/jobs.sqlite # on each host
+
+Must not import PyQt, directly or indirectly.
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from src.configuration_manager.configuration_manager import ConfigManager
+from src.transcriber_core.transcriber import WhisperTranscriber
+from src.time_slicer.probe_service import get_probe_service
+from src.batch_runner.pipeline import expand_inputs, plan_slices, transcribe_packed_clips
+from src.batch_runner.job_queue import JobQueue, POLICIES
+from src.batch_runner.watch_daemon import WatchDaemon
+from src.batch_runner.job_store import JobStore, DEFAULT_LEASE_SECONDS
+from src.batch_runner.store_worker import StoreWorker
+from src.transcriber_core.transport import create_transport, set_transport
+from src.result_codec.json_codec import ResultCodec
+from src.telemetry.metrics import start_metrics_server
+from src.telemetry.profiling import start_profiling, stop_profiling
+from src.telemetry.events import BUS, DEBUG, WARNING, Log, Retry, Completed, Failed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Transcribe media files without the GUI: slice, "
+                    "transcribe and merge, end to end.")
+    parser.add_argument('inputs', nargs='*',
+                        help="files, directories (searched recursively) or glob patterns")
+    parser.add_argument('--model', help="model name from config.yaml "
+                        "(default: first of tasks.transcription.models)")
+    parser.add_argument('--provider', help="provider for the model "
+                        "(default: first configured for the model)")
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help="segments in flight over all files (default: the "
+                             "provider's max-concurrent-calls + 1); API calls "
+                             "are additionally bound by its rate-limit")
+    parser.add_argument('--order', choices=POLICIES, default='fifo',
+                        help="which file's segments go first")
+    parser.add_argument('--status-interval', type=float, default=30,
+                        help="seconds between queue status lines, 0 = off")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="retries per failed segment")
+    parser.add_argument('--probe-workers', type=int, default=8,
+                        help="files probed concurrently before transcription")
+    parser.add_argument('--vbr-aware', action='store_true',
+                        help="slice on the audio packet index (exact byte budget)")
+    parser.add_argument('--no-merge', action='store_true',
+                        help="keep segment results only")
+    parser.add_argument('--watch', action='store_true',
+                        help="treat the inputs as directories to watch and transcribe "
+                             "new files as they arrive, until interrupted")
+    parser.add_argument('--store', metavar='DB',
+                        help="shared job store (SQLite): submit the inputs to it "
+                             "instead of transcribing them here")
+    parser.add_argument('--worker', action='store_true',
+                        help="work on the segments of --store until it is drained")
+    parser.add_argument('--worker-id', help="name on leases (default host-pid)")
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="segment lease in seconds; expired leases are re-dispatched")
+    parser.add_argument('--keep-running', action='store_true',
+                        help="with --worker, wait for new work instead of exiting")
+    parser.add_argument('--pack-short', type=float, metavar='SECONDS', default=None,
+                        help="pack files up to SECONDS long several per API request "
+                             "(default: tasks.transcription.clip-packing)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="serve Prometheus metrics on 127.0.0.1:PORT/metrics "
+                             "(default: tasks.transcription.metrics.port)")
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('--record', metavar='DIR',
+                           help="also save every API exchange to cassettes in DIR")
+    recording.add_argument('--replay', metavar='DIR',
+                           help="serve API responses from the cassettes in DIR, no network")
+    parser.add_argument('--replay-speed', type=float, default=1.0,
+                        help="replay at N times the recorded speed, 0 = no delay "
+                             "(default: 1)")
+    parser.add_argument('--profile', nargs='?', const='', metavar='DIR', default=None,
+                        help="write cProfile and sampled-stack profiles per stage and "
+                             "segment to DIR (default: tmp_dir/profiles/<time>)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="print the slices of every file and exit")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="print the transcriber's step-by-step log")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    config = ConfigManager()
+
+    # e.g. zstd without zstandard: fail now, not after the first paid call
+    try:
+        ResultCodec.from_config(config.get_transcription_task_config().get('result-format'))
+    except ValueError as e:
+        print(f"Invalid result-format: {e}", file=sys.stderr)
+        return 2
+
+    metrics_config = config.get_transcription_task_config().get('metrics') or {}
+    metrics_port = args.metrics_port or metrics_config.get('port')
+    if metrics_port and not args.dry_run:
+        start_metrics_server(int(metrics_port), metrics_config.get('host', '127.0.0.1'))
+
+    if args.record:
+        set_transport(create_transport('record', args.record))
+    elif args.replay:
+        set_transport(create_transport('replay', args.replay, args.replay_speed or None))
+
+    if args.profile is not None and not args.dry_run:
+        tmp_dir = Path(config.get_paths_config().get('tmp_dir', './tmp_audio_segments'))
+        start_profiling(args.profile or tmp_dir / 'profiles' / time.strftime('%Y%m%d-%H%M%S'))
+    try:
+        return run(args, parser, config)
+    finally:
+        profile_dir = stop_profiling()
+        if profile_dir:
+            print(f"Profiles written to {profile_dir} (see summary.txt)")
+
+
+def run(args, parser: argparse.ArgumentParser, config: ConfigManager) -> int:
+    if args.worker:
+        if not args.store:
+            parser.error("--worker needs --store")
+        return work(args)
+    if not args.inputs:
+        parser.error("no inputs given")
+    if args.watch:
+        return watch(args, config)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No media files found.", file=sys.stderr)
+        return 2
+
+    model = args.model or config.get_default_model()
+    provider = args.provider or (config.get_default_provider(model) if model else None)
+    if not model or not provider:
+        print("No model/provider given and none configured.", file=sys.stderr)
+        return 2
+
+    transcriber = WhisperTranscriber()
+    if not args.dry_run and not transcriber.set_model_and_provider(model, provider):
+        return 2
+
+    # warm the probe cache for the whole batch in parallel
+    probes = get_probe_service(transcriber.tmp_dir).probe_many(
+        files, max_workers=args.probe_workers)
+
+    print_lock = threading.Lock()
+
+    def log(message: str):
+        with print_lock:
+            print(message, flush=True)
+
+    queue = JobQueue(policy=args.order, retries=args.retries,
+                     workers_per_lane=args.concurrency)
+
+    def on_event(event):
+        if isinstance(event, Log):
+            log(event.message)
+        elif event.segment is not None:
+            log(f"    {event.message}")
+        elif isinstance(event, Completed):
+            log(f"[done] {event.message}")
+        elif isinstance(event, Failed):
+            log(f"[failed] {event.message}")
+
+    # engine log lines only with --verbose; warnings and errors always
+    BUS.subscribe(on_event, (Log,), min_level=DEBUG if args.verbose else WARNING)
+    BUS.subscribe(on_event, (Retry, Completed, Failed))
+    store = JobStore(args.store, args.lease) if args.store and not args.dry_run else None
+
+    pack_config = config.get_transcription_task_config().get('clip-packing') or {}
+    pack_short = args.pack_short
+    if pack_short is None and pack_config.get('enabled', False):
+        pack_short = float(pack_config.get('max-clip-duration', 300))
+    short_clips = []
+
+    failures = 0
+    jobs = []
+    for n, file_path in enumerate(files, start=1):
+        if isinstance(probes.get(str(file_path)), Exception):
+            log(f"[{n}/{len(files)}] {file_path}: probe failed: {probes[str(file_path)]}")
+            failures += 1
+            continue
+        try:
+            duration, slices = plan_slices(file_path, args.vbr_aware, transcriber.tmp_dir)
+        except Exception as e:
+            log(f"[{n}/{len(files)}] {file_path}: cannot slice: {e}")
+            failures += 1
+            continue
+        log(f"[{n}/{len(files)}] {file_path} ({duration:.0f}s, {len(slices)} segments)")
+        if args.dry_run:
+            for start, length in slices:
+                log(f"    start {start}s, duration {length}s")
+            continue
+        if pack_short and store is None and len(slices) == 1 and duration <= pack_short:
+            short_clips.append((file_path, duration))
+            continue
+        if store is not None:
+            store.add_file(file_path, slices, model, provider, duration,
+                           merge=not args.no_merge)
+            continue
+        jobs.append(queue.submit(file_path, slices, model, provider, duration,
+                                 merge=not args.no_merge))
+
+    if store is not None:
+        log(f"Submitted to {args.store}; run workers with --worker --store {args.store}")
+        queue.shutdown()
+        return 1 if failures else 0
+
+    packed = []
+    if short_clips:
+        max_size = config.get_transcription_task_config().get('max_segment_size', 15)
+        packer = threading.Thread(target=lambda: packed.extend(transcribe_packed_clips(
+            transcriber, short_clips,
+            max_bytes=int(float(pack_config.get('max-pack-size', max_size)) * 1024 * 1024),
+            bitrate_kbps=int(pack_config.get('bitrate', 64)),
+            gap_seconds=float(pack_config.get('gap-seconds', 2)),
+            merge=not args.no_merge,
+            log_callback=log if args.verbose else None,
+            progress_callback=lambda o: log(
+                f"[{'done' if o.ok else 'failed'}] {o.file_path} (packed)"
+                + (f", merged: {o.merged_path}" if o.merged_path else "")))))
+        packer.start()
+
+    # every file's segments are scheduled together, report until all finish
+    while not queue.wait_all(timeout=args.status_interval or None):
+        stats = queue.stats()
+        pending = [f for f in stats['files'] if not f['done']]
+        eta = max((f['eta_seconds'] or 0 for f in pending), default=0)
+        log(f"[queue] {stats['queue_depth']} segments waiting, "
+            f"{stats['in_flight']} in flight, {len(pending)} files left, ETA {eta:.0f}s")
+    queue.shutdown()
+    if short_clips:
+        packer.join()
+
+    failures += sum(1 for job in jobs if not job.outcome.ok or job.outcome.error)
+    failures += sum(1 for outcome in packed if not outcome.ok)
+    return 1 if failures else 0
+
+
+def watch(args, config: ConfigManager) -> int:
+    model = args.model or config.get_default_model()
+    provider = args.provider or (config.get_default_provider(model) if model else None)
+    if not model or not provider:
+        print("No model/provider given and none configured.", file=sys.stderr)
+        return 2
+
+    watch_config = config.get_transcription_task_config().get('watch-folder') or {}
+    queue = JobQueue(policy=args.order, retries=args.retries,
+                     workers_per_lane=args.concurrency,
+                     log_callback=print if args.verbose else (lambda message: None))
+    try:
+        daemon = WatchDaemon(
+            args.inputs, model, provider, queue=queue,
+            state_dir=WhisperTranscriber().tmp_dir,
+            stable_seconds=float(watch_config.get('stable-seconds', 10)),
+            poll_interval=float(watch_config.get('poll-interval', 5)),
+            rescan_interval=float(watch_config.get('rescan-interval', 300)),
+            use_inotify=watch_config.get('inotify', True),
+            vbr_aware=args.vbr_aware)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        print("Stopping, waiting for segments in flight...")
+    finally:
+        daemon.stop()
+        # queued files resume from the watch state on the next start
+        queue.shutdown(drop_pending=True)
+    return 0
+
+
+def work(args) -> int:
+    store = JobStore(args.store, args.lease)
+    worker = StoreWorker(store, args.worker_id,
+                         threads=args.concurrency or 2,
+                         exit_when_idle=not args.keep_running)
+    worker.run()
+    stats = store.stats()
+    print(f"Store: files {stats['files']}, segments {stats['segments']}")
+    return 1 if stats['files'].get('failed') else 0
@@ -0,0 +1,435 @@
+"""
+Process-wide transcription job queue.
+
+Files are submitted as jobs; their segments go into one pending heap per
+{model x provider} lane, shared by all files using that lane. Each lane has
+`max-concurrent-calls + 1` worker threads (one extra so the next segment
+is cut while the others wait for the API), and the lane's RateLimiter keeps
+API calls within the provider's quota. A file's tail segments therefore
+overlap with the next file's first segments instead of leaving the
+provider idle.
+
+Ordering within a lane is set by the queue policy:
+- "fifo": files in submission order
+- "shortest-first": shortest files first, so small files are not stuck
+  behind long ones
+"""
+
+import heapq
+from collections import deque
+import itertools
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+from src.transcriber_core.transcriber import WhisperTranscriber
+from src.batch_runner.pipeline import (
+    FileTranscriptionResult, compact_result, transcribe_segment, merge_file_results,
+    Slice)
+from src.hear_result_merger.merge_json import MergeInputError
+from src.telemetry.metrics import QUEUE_DEPTH
+from src.telemetry.events import (
+    BUS, WARNING, ERROR, Completed, Failed, Progress, SegmentQueued, log)
+
+POLICIES = ("fifo", "shortest-first")
+FINISHED_KEPT = 100  # finished files still listed by stats()
+
+# listener(event, job, segment_index); events: "segment_started",
+# "segment_completed", "segment_failed", "job_completed", "job_failed"
+Listener = Callable[[str, "FileJob", Optional[int]], None]
+
+
+class FileJob:
+    """One submitted file, its segment states and timings."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, file_path: Path, slices: List[Slice], model: str,
+                 provider: str, duration: Optional[float] = None,
+                 merge: bool = True,
+                 log_callback: Optional[Callable[[str], None]] = None,
+                 actual_starts: Optional[List[int]] = None,
+                 output_path: Optional[str | Path] = None):
+        self.id = next(self._ids)
+        self.file_path = Path(file_path)
+        self.slices = slices
+        self.model = model
+        self.provider = provider
+        self.duration = duration if duration is not None else \
+            (slices[-1][0] + slices[-1][1] if slices else 0)
+        self.merge = merge
+        self.log_callback = log_callback
+        self.actual_starts = actual_starts
+        self.output_path = output_path
+        self.segment_status = {i: "pending" for i in range(len(slices))}
+        self.outcome = FileTranscriptionResult(self.file_path, slices)
+        self.submitted_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._done = threading.Event()
+
+    @property
+    def lane(self) -> Tuple[str, str]:
+        return self.model, self.provider
+
+    @property
+    def completed_segments(self) -> int:
+        return sum(1 for s in self.segment_status.values() if s in ("completed", "error"))
+
+    @property
+    def progress(self) -> float:
+        """Finished fraction of segments, 0..1."""
+        return self.completed_segments / len(self.slices) if self.slices else 1.0
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def eta(self, lane_seconds_per_segment: Optional[float] = None) -> Optional[float]:
+        """Estimated seconds left, from this job's own pace or the lane's."""
+        if self.done or self.finished_at is not None:
+            return 0.0
+        remaining = len(self.slices) - self.completed_segments
+        if self.started_at and self.completed_segments:
+            pace = (time.monotonic() - self.started_at) / self.completed_segments
+        else:
+            pace = lane_seconds_per_segment
+        return None if pace is None else remaining * pace
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def tags(self, segment: Optional[int]) -> Dict[str, Any]:
+        """Event tags of one segment, or of the whole file with `segment` None."""
+        return {"job": self.id, "file": self.file_path.stem, "segment": segment,
+                "model": self.model, "provider": self.provider}
+
+    def log(self, message: str, level: int):
+        """Through the job's log callback if it has one, else as a Log event."""
+        if self.log_callback:
+            self.log_callback(message)
+        else:
+            log(message, level=level, **self.tags(None))
+
+
+def _configured_transcriber(model: str, provider: str) -> WhisperTranscriber:
+    transcriber = WhisperTranscriber()
+    if not transcriber.set_model_and_provider(model, provider):
+        raise ValueError(f"Cannot use model '{model}' with provider '{provider}'")
+    return transcriber
+
+
+class _Lane:
+    """Pending segments and workers of one model x provider."""
+
+    def __init__(self, transcriber: WhisperTranscriber, workers: int):
+        self.transcriber = transcriber
+        self.heap: List[tuple] = []
+        self.worker_count = workers
+        self.threads: List[threading.Thread] = []
+        self.in_flight = 0
+        self.segment_seconds: List[float] = []  # recent segment durations
+
+    def seconds_per_segment(self) -> Optional[float]:
+        if not self.segment_seconds:
+            return None
+        recent = self.segment_seconds[-20:]
+        return sum(recent) / len(recent) / self.worker_count
+
+
+class JobQueue:
+    """
+    Multi-file scheduler, see module docstring.
+
+    Args:
+        policy: "fifo" or "shortest-first"
+        retries: Retries per failed segment
+        workers_per_lane: Worker threads per model x provider, default
+            max-concurrent-calls + 1
+        log_callback: Optional callback for transcriber logs of jobs
+            submitted without their own
+        transcriber_factory: Optional (model, provider) -> transcriber for
+            a new lane, default a WhisperTranscriber set up from config.yaml
+    """
+
+    def __init__(self, policy: str = "fifo", retries: int = 2,
+                 workers_per_lane: Optional[int] = None,
+                 log_callback: Optional[Callable[[str], None]] = None,
+                 transcriber_factory: Optional[
+                     Callable[[str, str], WhisperTranscriber]] = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.policy = policy
+        self.retries = retries
+        self.workers_per_lane = workers_per_lane
+        self.log_callback = log_callback
+        self.transcriber_factory = transcriber_factory or _configured_transcriber
+        self._cond = threading.Condition()
+        self._lanes: Dict[Tuple[str, str], _Lane] = {}
+        self._jobs: Dict[int, FileJob] = {}  # unfinished jobs only
+        # summaries of recently finished jobs; the jobs themselves (and their
+        # transcripts) stay with whoever submitted them
+        self._finished: deque = deque(maxlen=FINISHED_KEPT)
+        self._listeners: List[Listener] = []
+        self._seq = itertools.count()
+        self._closed = False
+
+    # ---- listeners ----
+
+    def add_listener(self, listener: Listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: str, job: FileJob, index: Optional[int] = None):
+        for listener in list(self._listeners):
+            try:
+                listener(event, job, index)
+            except Exception:
+                log("Job queue listener failed on %s:\n%s", event, traceback.format_exc(),
+                    level=ERROR, **job.tags(index))
+
+    # ---- submission ----
+
+    def _get_lane(self, model: str, provider: str) -> _Lane:
+        key = (model, provider)
+        if key not in self._lanes:
+            transcriber = self.transcriber_factory(model, provider)
+            limiter = transcriber.rate_limiter
+            lane = _Lane(transcriber, self.workers_per_lane or
+                         limiter.max_concurrent_calls + 1)
+            for n in range(lane.worker_count):
+                thread = threading.Thread(target=self._worker, args=(lane,),
+                                          name=f"lane-{model}-{provider}-{n}",
+                                          daemon=True)
+                lane.threads.append(thread)
+                thread.start()
+            self._lanes[key] = lane
+        return self._lanes[key]
+
+    def _priority(self, job: FileJob) -> tuple:
+        if self.policy == "shortest-first":
+            return (job.duration, job.id)
+        return (job.id,)
+
+    def submit(self, file_path: str | Path, slices: List[Slice], model: str,
+               provider: str, duration: Optional[float] = None,
+               merge: bool = True,
+               log_callback: Optional[Callable[[str], None]] = None,
+               actual_starts: Optional[List[int]] = None,
+               output_path: Optional[str | Path] = None) -> FileJob:
+        """
+        Queue all slices of a file; returns the job to track it.
+        `actual_starts` optionally moves each slice's cut point, as set in
+        the GUI's segment bar; `output_path` overrides where the merged
+        result is written.
+        """
+        job = FileJob(Path(file_path), slices, model, provider, duration, merge,
+                      log_callback or self.log_callback, actual_starts, output_path)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Job queue is shut down")
+            lane = self._get_lane(model, provider)
+            if slices:
+                self._jobs[job.id] = job
+            for i in range(len(slices)):
+                heapq.heappush(lane.heap, (self._priority(job), i, next(self._seq), job))
+            depth = len(lane.heap)
+            QUEUE_DEPTH.labels(provider=provider, model=model).set(depth)
+            self._cond.notify_all()
+        if not slices:
+            self._finish(lane, job)  # nothing to transcribe, finishes right away
+        if BUS.wants(SegmentQueued):
+            for i in range(len(slices)):
+                BUS.publish(SegmentQueued(depth, **job.tags(i)))
+        return job
+
+    # ---- workers ----
+
+    def _worker(self, lane: _Lane):
+        while True:
+            with self._cond:
+                while not lane.heap and not self._closed:
+                    self._cond.wait()
+                if self._closed and not lane.heap:
+                    return
+                _, index, _, job = heapq.heappop(lane.heap)
+                QUEUE_DEPTH.labels(provider=job.provider, model=job.model).set(len(lane.heap))
+                lane.in_flight += 1
+                job.segment_status[index] = "in_progress"
+                if job.started_at is None:
+                    job.started_at = time.monotonic()
+            try:
+                self._run_segment(lane, job, index)
+            except Exception:
+                # a failing tracer, listener or merge must not take the lane
+                # down: its jobs would never finish and their waiters hang
+                job.log(f"Lane worker error on segment {index} of {job.file_path}:\n"
+                        f"{traceback.format_exc()}", ERROR)
+                with self._cond:
+                    # failed before its outcome was recorded: count it as failed
+                    finished = False
+                    if job.segment_status[index] == "in_progress":
+                        lane.in_flight -= 1
+                        job.segment_status[index] = "error"
+                        job.outcome.failed_segments.append(index)
+                        finished = job.completed_segments == len(job.slices)
+                if finished:
+                    self._finish(lane, job)
+
+    def _run_segment(self, lane: _Lane, job: FileJob, index: int):
+        """Transcribe one popped segment, and finish its job if it was the last."""
+        self._notify("segment_started", job, index)
+        with lane.transcriber.tracer.context(
+                model=job.model, provider=job.provider,
+                file=job.file_path.stem, segment=index):
+            lane.transcriber.tracer.record(
+                "queue_wait", (time.monotonic() - job.submitted_at) * 1000)
+
+        started = time.monotonic()
+        start, duration = job.slices[index]
+        error = ""
+        try:
+            with BUS.context(**job.tags(index)):
+                result = transcribe_segment(
+                    lane.transcriber, job.file_path, index, start, duration,
+                    self.retries, job.log_callback,
+                    job.actual_starts[index] if job.actual_starts else None)
+        except Exception as e:
+            error = str(e)
+            job.log(f"Segment {index} of {job.file_path} raised: {e}", WARNING)
+            result = None
+        if result is not None:
+            result = compact_result(result)  # outside the lock
+
+        with self._cond:
+            lane.in_flight -= 1
+            lane.segment_seconds.append(time.monotonic() - started)
+            if result is None:
+                job.segment_status[index] = "error"
+                job.outcome.failed_segments.append(index)
+            else:
+                job.segment_status[index] = "completed"
+                job.outcome.segment_results[index] = result
+            finished = job.completed_segments == len(job.slices)
+            done, progress = job.completed_segments, job.progress
+        if result is not None:
+            BUS.publish(Completed(time.monotonic() - started, **job.tags(index)))
+        else:
+            BUS.publish(Failed(error or "no result after retries", **job.tags(index)))
+        if BUS.wants(Progress):
+            BUS.publish(Progress(progress, "transcription", done, len(job.slices),
+                                 **job.tags(None)))
+        self._notify("segment_completed" if result is not None else "segment_failed",
+                     job, index)
+        if finished:
+            self._finish(lane, job)
+
+    def _finish(self, lane: _Lane, job: FileJob):
+        """Merge a job's results and release its waiters, whatever goes wrong."""
+        try:
+            if job.merge and job.outcome.ok and job.slices:
+                try:
+                    job.outcome.merged_path = merge_file_results(
+                        lane.transcriber, job.outcome, output_path=job.output_path)
+                except Exception as e:
+                    # MergeInputError, an unwritable output path, a missing codec, ...
+                    job.outcome.error = f"merge failed: {e}"
+                    job.log(f"Merge failed for {job.file_path}: {e}",
+                            WARNING if isinstance(e, MergeInputError) else ERROR)
+        finally:
+            job.finished_at = time.monotonic()
+            job.outcome.elapsed = job.finished_at - (job.started_at or job.submitted_at)
+            with self._cond:
+                self._jobs.pop(job.id, None)
+                self._finished.append(self._file_stats(job, lane))
+            job._done.set()
+        if job.outcome.ok and not job.outcome.error:
+            BUS.publish(Completed(job.outcome.elapsed, job.outcome.merged_path,
+                                  **job.tags(None)))
+        else:
+            BUS.publish(Failed(job.outcome.error or
+                               f"segments {sorted(job.outcome.failed_segments)} failed",
+                               **job.tags(None)))
+        self._notify("job_completed" if job.outcome.ok else "job_failed", job)
+
+    # ---- introspection ----
+
+    def queue_depth(self) -> int:
+        """Segments waiting, over all lanes."""
+        with self._cond:
+            return sum(len(lane.heap) for lane in self._lanes.values())
+
+    @staticmethod
+    def _file_stats(job: FileJob, lane: _Lane) -> Dict[str, Any]:
+        return {
+            "id": job.id,
+            "file": str(job.file_path),
+            "model": job.model,
+            "provider": job.provider,
+            "segments": len(job.slices),
+            "completed": job.completed_segments,
+            "progress": job.progress,
+            "eta_seconds": job.eta(lane.seconds_per_segment()),
+            "done": job.done or job.finished_at is not None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of queue depth, in-flight segments and per-file progress/ETA,
+        for unfinished files and the last FINISHED_KEPT finished ones.
+        """
+        with self._cond:
+            files = list(self._finished)
+            files += [self._file_stats(job, self._lanes[job.lane])
+                      for job in self._jobs.values()]
+            return {
+                "queue_depth": sum(len(lane.heap) for lane in self._lanes.values()),
+                "in_flight": sum(lane.in_flight for lane in self._lanes.values()),
+                "files": files,
+            }
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            left = None if deadline is None else max(0, deadline - time.monotonic())
+            if not job.wait(left):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True, drop_pending: bool = False):
+        """
+        Stop accepting jobs; workers exit once their lanes are drained.
+        With `drop_pending` queued segments are discarded, so only the
+        segments in flight are waited for; their jobs never finish.
+        """
+        with self._cond:
+            self._closed = True
+            if drop_pending:
+                for (model, provider), lane in self._lanes.items():
+                    lane.heap.clear()
+                    QUEUE_DEPTH.labels(provider=provider, model=model).set(0)
+            self._cond.notify_all()
+        if wait:
+            for lane in self._lanes.values():
+                for thread in lane.threads:
+                    thread.join()
+
+
+_global_queue: Optional[JobQueue] = None
+_global_lock = threading.Lock()
+
+
+def get_job_queue(policy: str = "fifo", **kwargs) -> JobQueue:
+    """Process-wide job queue, created with the given options on first use."""
+    global _global_queue
+    with _global_lock:
+        if _global_queue is None:
+            _global_queue = JobQueue(policy, **kwargs)
+        return _global_queue
@@ -0,0 +1,293 @@
+"""
+Shared job store for multi-process / multi-host transcription.
+
+Files and their segments live in one SQLite database. Workers, in any
+number of processes on any number of hosts that can open the database,
+claim segments with expiring leases: a worker renews its lease while the
+API call runs, and a segment whose lease ran out (worker crashed, host
+lost) is handed to the next worker that asks. When the last segment of a
+file is done, one worker claims the merge the same way.
+
+Segment results are not stored in the database but written to
+`result_dir` under a path that depends only on the file and the slice
+(`WhisperTranscriber.result_file_for`), replaced atomically. A segment
+that ends up transcribed twice therefore leaves one complete result, and
+completing it twice is a no-op.
+
+Claims run in `BEGIN IMMEDIATE` transactions, so they are serialized by
+SQLite's file lock. The rollback journal is used rather than WAL because
+WAL needs shared memory and does not work across hosts; for several hosts
+put the database on a filesystem with working POSIX locks.
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.batch_runner.pipeline import Slice
+
+DEFAULT_LEASE_SECONDS = 180
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    model TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    duration REAL,
+    merge INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'open',  -- open, merging, done, failed
+    worker TEXT,
+    lease_expires REAL,
+    merged_path TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    file_id INTEGER NOT NULL REFERENCES files(id),
+    idx INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, leased, done, failed
+    worker TEXT,
+    lease_expires REAL,
+    not_before REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result_path TEXT,
+    error TEXT,
+    PRIMARY KEY (file_id, idx)
+);
+CREATE INDEX IF NOT EXISTS segments_claimable ON segments (status, not_before);
+"""
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SegmentClaim:
+    """A leased segment, as handed to a worker."""
+
+    def __init__(self, row: sqlite3.Row):
+        self.file_id = row["file_id"]
+        self.index = row["idx"]
+        self.start = row["start"]
+        self.duration = row["duration"]
+        self.attempts = row["attempts"]
+        self.file_path = Path(row["path"])
+        self.model = row["model"]
+        self.provider = row["provider"]
+
+    def __repr__(self):
+        return f"SegmentClaim({self.file_path.name}#{self.index}, attempt {self.attempts})"
+
+
+class JobStore:
+    """
+    SQLite-backed store of files and segment leases, see module docstring.
+
+    Args:
+        db_path: Database file; created if missing
+        lease_seconds: Lease length; workers renew well before it runs out
+        max_attempts: Attempts per segment before it (and its file) fails
+    """
+
+    def __init__(self, db_path: str | Path,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS,
+                 max_attempts: int = 3):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = str(db_path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._conn = sqlite3.connect(self.db_path, timeout=60,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(_SCHEMA)
+        # one connection shared by the worker threads of this process
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction holding the database lock from the start."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _query(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ---- submission ----
+
+    def add_file(self, file_path: str | Path, slices: List[Slice], model: str,
+                 provider: str, duration: Optional[float] = None,
+                 merge: bool = True) -> int:
+        """Add a file and its slices; returns the file id."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "INSERT INTO files (path, model, provider, duration, merge, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (str(Path(file_path).resolve()), model, provider, duration,
+                 int(merge), time.time()))
+            file_id = cur.lastrowid
+            conn.executemany(
+                "INSERT INTO segments (file_id, idx, start, duration) VALUES (?, ?, ?, ?)",
+                [(file_id, i, int(start), int(length))
+                 for i, (start, length) in enumerate(slices)])
+        return file_id
+
+    # ---- segment leases ----
+
+    def claim_segment(self, worker_id: str) -> Optional[SegmentClaim]:
+        """
+        Lease the next pending segment (oldest file first), or one whose
+        lease has expired. Returns None when nothing is claimable now.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT s.*, f.path, f.model, f.provider FROM segments s "
+                    "JOIN files f ON f.id = s.file_id "
+                    "WHERE f.status = 'open' AND ("
+                    "  (s.status = 'pending' AND s.not_before <= ?) OR"
+                    "  (s.status = 'leased' AND s.lease_expires < ?)) "
+                    "ORDER BY s.file_id, s.idx LIMIT 1", (now, now)).fetchone()
+                if row is None:
+                    return None
+                if row["status"] != "leased" or row["attempts"] < self.max_attempts:
+                    break
+                # every attempt crashed or hung its worker: give up on the file
+                conn.execute(
+                    "UPDATE segments SET status='failed', lease_expires=NULL, "
+                    "error=? WHERE file_id=? AND idx=?",
+                    (f"lease expired after {row['attempts']} attempts",
+                     row["file_id"], row["idx"]))
+                conn.execute("UPDATE files SET status='failed' WHERE id=?",
+                             (row["file_id"],))
+            conn.execute(
+                "UPDATE segments SET status='leased', worker=?, lease_expires=?, "
+                "attempts=attempts+1 WHERE file_id=? AND idx=?",
+                (worker_id, now + self.lease_seconds, row["file_id"], row["idx"]))
+        claim = SegmentClaim(row)
+        claim.attempts += 1
+        return claim
+
+    def renew(self, claim: SegmentClaim, worker_id: str) -> bool:
+        """Extend a lease; False if it was lost to another worker."""
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE segments SET lease_expires=? WHERE file_id=? AND idx=? "
+                "AND status='leased' AND worker=?",
+                (time.time() + self.lease_seconds, claim.file_id, claim.index, worker_id))
+        return cur.rowcount == 1
+
+    def complete(self, claim: SegmentClaim, result_path: str | Path):
+        """
+        Record a segment's result. Idempotent, and accepted even if the
+        lease expired meanwhile: the result file is valid either way.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE segments SET status='done', result_path=?, lease_expires=NULL, "
+                "error=NULL WHERE file_id=? AND idx=? AND status!='done'",
+                (str(result_path), claim.file_id, claim.index))
+
+    def fail(self, claim: SegmentClaim, worker_id: str, error: str = "") -> bool:
+        """
+        Give a segment back for a retry with backoff, or fail it for good.
+        False, and nothing changes, if the lease was lost to another worker.
+        """
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts FROM segments WHERE file_id=? AND idx=? "
+                "AND status='leased' AND worker=?",
+                (claim.file_id, claim.index, worker_id)).fetchone()
+            if row is None:
+                return False  # re-claimed, finished or failed by another worker
+            if row["attempts"] >= self.max_attempts:
+                conn.execute(
+                    "UPDATE segments SET status='failed', error=?, lease_expires=NULL "
+                    "WHERE file_id=? AND idx=?", (error, claim.file_id, claim.index))
+                conn.execute("UPDATE files SET status='failed' WHERE id=?",
+                             (claim.file_id,))
+            else:
+                backoff = min(60, 2 ** (row["attempts"] - 1) * 5)
+                conn.execute(
+                    "UPDATE segments SET status='pending', worker=NULL, lease_expires=NULL, "
+                    "not_before=?, error=? WHERE file_id=? AND idx=?",
+                    (time.time() + backoff, error, claim.file_id, claim.index))
+        return True
+
+    # ---- merges ----
+
+    def claim_merge(self, worker_id: str) -> Optional[Tuple[int, Path, List[Tuple[Slice, str]]]]:
+        """
+        Lease the merge of a file whose segments are all done.
+
+        Returns:
+            tuple: (file id, source path, [((start, duration), result path)])
+            None: if no file is ready
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT f.id, f.path FROM files f WHERE f.merge = 1 AND "
+                "(f.status = 'open' OR (f.status = 'merging' AND f.lease_expires < ?)) "
+                "AND NOT EXISTS (SELECT 1 FROM segments s WHERE s.file_id = f.id "
+                "AND s.status != 'done') ORDER BY f.id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                # files without merging are done as soon as their segments are
+                conn.execute(
+                    "UPDATE files SET status='done' WHERE merge = 0 AND status = 'open' "
+                    "AND NOT EXISTS (SELECT 1 FROM segments s WHERE s.file_id = files.id "
+                    "AND s.status != 'done')")
+                return None
+            conn.execute(
+                "UPDATE files SET status='merging', worker=?, lease_expires=? WHERE id=?",
+                (worker_id, now + self.lease_seconds, row["id"]))
+            segments = conn.execute(
+                "SELECT start, duration, result_path FROM segments WHERE file_id=? "
+                "ORDER BY idx", (row["id"],)).fetchall()
+        return row["id"], Path(row["path"]), \
+            [((s["start"], s["duration"]), s["result_path"]) for s in segments]
+
+    def complete_merge(self, file_id: int, merged_path: Optional[str]):
+        """Record the merged output, or a failed merge when None."""
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE files SET status=?, merged_path=?, lease_expires=NULL WHERE id=?",
+                ("done" if merged_path else "failed", merged_path, file_id))
+
+    # ---- introspection ----
+
+    def unfinished(self) -> int:
+        """Files still open or being merged."""
+        return self._query(
+            "SELECT COUNT(*) FROM files WHERE status IN ('open', 'merging')")[0][0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Segment counts by status, and file counts by status."""
+        segments = {r[0]: r[1] for r in self._query(
+            "SELECT status, COUNT(*) FROM segments GROUP BY status")}
+        files = {r[0]: r[1] for r in self._query(
+            "SELECT status, COUNT(*) FROM files GROUP BY status")}
+        workers = [r[0] for r in self._query(
+            "SELECT DISTINCT worker FROM segments WHERE status='leased'")]
+        return {"segments": segments, "files": files, "active_workers": workers}
+
+    def files(self) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT id, path, status, merged_path FROM files ORDER BY id")
+        return [dict(r) for r in rows]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,246 @@
+"""
+Headless slicing -> transcription -> merging pipeline.
+
+Nothing in here imports PyQt: it drives `WhisperTranscriber`,
+`get_time_slices` and `merge_segments` directly, so it runs on servers.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple, Dict, Any
+
+from src.time_slicer.time_slicer import get_time_slices, get_time_slices_by_packets
+from src.time_slicer.probe_media_file import probe_media_file
+from src.time_slicer.probe_service import get_probe_service
+from src.time_slicer.packet_index import get_packet_index
+from src.transcriber_core.transcriber import WhisperTranscriber
+from src.transcriber_core.clip_packing import (
+    plan_packs, ceil_duration, DEFAULT_PACK_BITRATE, DEFAULT_GAP_SECONDS)
+from src.hear_result_merger.merge_json import (
+    merge_segments, merged_output_path, JsonFileSink, MergeInputError)
+from src.hear_result_merger.word_store import WordStore
+from src.telemetry.events import BUS, Retry
+
+MEDIA_EXTENSIONS = {
+    '.mp3', '.mp4', '.m4a', '.wav', '.flac', '.ogg', '.opus', '.webm',
+    '.mkv', '.mov', '.avi', '.flv', '.aac', '.wma', '.mpeg', '.mpga',
+}
+
+# (display start, duration) as produced by get_time_slices
+Slice = Tuple[int, int]
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[Path]:
+    """
+    Resolve files, directories (searched recursively for media files) and
+    glob patterns into a sorted, de-duplicated list of media files.
+    """
+    found = []
+    for item in inputs:
+        candidates = [item] if os.path.exists(item) else glob.glob(item, recursive=True)
+        for candidate in candidates:
+            path = Path(candidate)
+            if path.is_dir():
+                found.extend(p for p in path.rglob('*')
+                             if p.is_file() and p.suffix.lower() in MEDIA_EXTENSIONS)
+            elif path.is_file():
+                found.append(path)
+    unique = {p.resolve(): None for p in found}
+    return sorted(unique)
+
+
+def plan_slices(file_path: Path, vbr_aware: bool = False,
+                cache_dir: Optional[str | Path] = None) -> Tuple[float, List[Slice]]:
+    """
+    Probe a file and cut it into slices.
+
+    Returns:
+        tuple: (duration in seconds, list of (start, duration) slices)
+    """
+    kwargs = {} if cache_dir is None else {'cache_dir': cache_dir}
+    if vbr_aware:
+        # the packet index places the cuts, the bit rate is not needed
+        duration = get_probe_service(**kwargs).duration(file_path)
+        return duration, get_time_slices_by_packets(get_packet_index(file_path, **kwargs))
+    duration, bitrate = probe_media_file(str(file_path), **kwargs)
+    return duration, get_time_slices(duration, bitrate)
+
+
+def compact_result(result: dict) -> WordStore | dict:
+    """
+    A segment's verbose_json result as a `WordStore`. A malformed result
+    stays a dict, for the merger to reject.
+    """
+    if "words" not in result:
+        return result
+    try:
+        return WordStore.from_verbose_json(result)
+    except (KeyError, TypeError, ValueError):
+        return result
+
+
+class FileTranscriptionResult:
+    """
+    Outcome of one file: per-segment results and the merged output path.
+
+    Segment results are held as `WordStore`s until the merge, so a long
+    file's words do not sit in memory as one dict per word.
+    """
+
+    def __init__(self, file_path: Path, slices: List[Slice]):
+        self.file_path = file_path
+        self.slices = slices
+        self.segment_results: Dict[int, WordStore | dict] = {}
+        self.failed_segments: List[int] = []
+        self.merged_path: Optional[str] = None
+        self.error: Optional[str] = None  # why the merge failed, if it did
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed_segments and len(self.segment_results) == len(self.slices)
+
+    def segment_result(self, index: int) -> dict:
+        """A segment's result as verbose_json."""
+        result = self.segment_results[index]
+        return result.to_verbose_json() if isinstance(result, WordStore) else result
+
+
+def transcribe_segment(transcriber: WhisperTranscriber, file_path: Path,
+                       index: int, start: int, duration: int,
+                       retries: int = 2,
+                       log_callback: Optional[Callable[[str], None]] = None,
+                       actual_start: Optional[int] = None) -> Optional[dict]:
+    """
+    Transcribe one slice, retrying with exponential backoff. `actual_start`
+    cuts the audio elsewhere than the slice's display start (the GUI's
+    per-segment offsets); default is the display start.
+    """
+    for attempt in range(retries + 1):
+        result = transcriber.transcribe(
+            input_file=file_path,
+            display_start=start,
+            actual_start=start if actual_start is None else actual_start,
+            duration=int(duration),
+            log_callback=log_callback,
+            segment_index=index,
+            attempt=attempt,
+        )
+        if result is not None:
+            return result
+        if attempt < retries:
+            delay = min(60, 2 ** attempt * 5)
+            if BUS.wants(Retry):
+                BUS.publish(Retry(attempt + 1, delay, file=Path(file_path).stem, segment=index))
+            time.sleep(delay)
+    return None
+
+
+def merge_file_results(transcriber: WhisperTranscriber,
+                       outcome: FileTranscriptionResult,
+                       quiet: bool = True,
+                       output_path: Optional[str | Path] = None) -> str:
+    """
+    Merge a file's segment results in memory and write the merged JSON,
+    to `output_path` if given, else to the usual place in result_dir.
+    """
+    results = [(outcome.slices[i][0], outcome.slices[i][1], outcome.segment_result(i))
+               for i in sorted(outcome.segment_results)]
+    merged = merge_segments(results, quiet=quiet)
+    if output_path is None:
+        output_path = merged_output_path(outcome.file_path.stem, str(transcriber.result_dir))
+    sink = JsonFileSink(str(output_path), transcriber.result_codec)
+    return sink.write(merged)
+
+
+def transcribe_file(transcriber: WhisperTranscriber, file_path: Path,
+                    slices: List[Slice],
+                    concurrency: int = 1,
+                    retries: int = 2,
+                    merge: bool = True,
+                    log_callback: Optional[Callable[[str], None]] = None,
+                    progress_callback: Optional[Callable[[int, int], None]] = None
+                    ) -> FileTranscriptionResult:
+    """
+    Transcribe all slices of a file with up to `concurrency` segments in
+    flight (API calls are further limited by the provider's rate limiter),
+    then merge the results unless a segment failed or `merge` is False.
+    """
+    outcome = FileTranscriptionResult(file_path, slices)
+    started = time.monotonic()
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = {
+            pool.submit(transcribe_segment, transcriber, file_path, i, start,
+                        duration, retries, log_callback): i
+            for i, (start, duration) in enumerate(slices)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                if log_callback:
+                    log_callback(f"Segment {i} raised: {e}")
+                result = None
+            if result is None:
+                outcome.failed_segments.append(i)
+            else:
+                outcome.segment_results[i] = compact_result(result)
+            done += 1
+            if progress_callback:
+                progress_callback(done, len(slices))
+
+    if merge and outcome.ok:
+        try:
+            outcome.merged_path = merge_file_results(transcriber, outcome)
+        except MergeInputError as e:
+            outcome.error = f"merge failed: {e}"
+            if log_callback:
+                log_callback(f"Merge failed for {file_path}: {e}")
+    outcome.elapsed = time.monotonic() - started
+    return outcome
+
+
+def transcribe_packed_clips(transcriber: WhisperTranscriber,
+                            clips: List[Tuple[Path, float]],
+                            max_bytes: int,
+                            bitrate_kbps: int = DEFAULT_PACK_BITRATE,
+                            gap_seconds: float = DEFAULT_GAP_SECONDS,
+                            merge: bool = True,
+                            log_callback: Optional[Callable[[str], None]] = None,
+                            progress_callback: Optional[
+                                Callable[[FileTranscriptionResult], None]] = None
+                            ) -> List[FileTranscriptionResult]:
+    """
+    Transcribe short files packed several per API call, see
+    `transcriber_core.clip_packing`. Each file gets a one-slice outcome and,
+    unless `merge` is False, its merged output like any other file.
+    """
+    outcomes = []
+    for pack in plan_packs(clips, max_bytes, bitrate_kbps, gap_seconds):
+        started = time.monotonic()
+        if log_callback:
+            log_callback(f"Packing {len(pack.clips)} clips into one request "
+                         f"({pack.duration:.0f}s)")
+        results = transcriber.transcribe_packed(pack, bitrate_kbps, log_callback)
+        for clip, result in zip(pack.clips, results):
+            outcome = FileTranscriptionResult(clip.path, [(0, ceil_duration(clip.duration))])
+            if result is None:
+                outcome.failed_segments.append(0)
+            else:
+                outcome.segment_results[0] = compact_result(result)
+                if merge:
+                    try:
+                        outcome.merged_path = merge_file_results(transcriber, outcome)
+                    except MergeInputError as e:
+                        if log_callback:
+                            log_callback(f"Merge failed for {clip.path}: {e}")
+            outcome.elapsed = time.monotonic() - started
+            outcomes.append(outcome)
+            if progress_callback:
+                progress_callback(outcome)
+    return outcomes
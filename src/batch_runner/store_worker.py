@@ -0,0 +1,163 @@
+"""
+Worker draining a shared JobStore.
+
+Run one per host (or several per host): each worker claims segments from
+the store, transcribes them with a per-lane WhisperTranscriber while a
+heartbeat thread keeps the lease alive, and records the result path. A
+worker that finds a file with all segments done claims its merge.
+"""
+
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.transcriber_core.transcriber import WhisperTranscriber
+from src.hear_result_merger.merge_json import (
+    merge_segments, merged_output_path, JsonFileSink, load_json, make_logger)
+from src.batch_runner.job_store import JobStore, SegmentClaim, default_worker_id
+
+
+class StoreWorker:
+    """
+    Args:
+        store: Shared job store
+        worker_id: Name recorded on leases, default "<host>-<pid>"
+        threads: Segments this process works on at once (API calls are
+            additionally bound by the provider's rate limiter)
+        idle_poll: Seconds between claim attempts when nothing is claimable
+        exit_when_idle: Stop once the store has no unfinished files
+        log_callback: Optional callback for status messages
+    """
+
+    def __init__(self, store: JobStore, worker_id: Optional[str] = None,
+                 threads: int = 2, idle_poll: float = 2,
+                 exit_when_idle: bool = True,
+                 log_callback: Optional[Callable[[str], None]] = None):
+        self.store = store
+        self.worker_id = worker_id or default_worker_id()
+        self.threads = max(1, threads)
+        self.idle_poll = idle_poll
+        self.exit_when_idle = exit_when_idle
+        self.log = log_callback or print
+        self._transcribers: Dict[Tuple[str, str], WhisperTranscriber] = {}
+        self._transcribers_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _transcriber(self, model: str, provider: str) -> WhisperTranscriber:
+        with self._transcribers_lock:
+            key = (model, provider)
+            if key not in self._transcribers:
+                transcriber = WhisperTranscriber()
+                if not transcriber.set_model_and_provider(model, provider):
+                    raise ValueError(f"Cannot use model '{model}' with provider '{provider}'")
+                self._transcribers[key] = transcriber
+            return self._transcribers[key]
+
+    # ---- segments ----
+
+    def _heartbeat(self, claim: SegmentClaim, done: threading.Event):
+        while not done.wait(self.store.lease_seconds / 3):
+            if not self.store.renew(claim, self.worker_id):
+                self.log(f"[{self.worker_id}] lost lease on {claim}, finishing anyway")
+                return
+
+    def process_segment(self, claim: SegmentClaim):
+        try:
+            transcriber = self._transcriber(claim.model, claim.provider)
+        except ValueError as e:
+            self.store.fail(claim, self.worker_id, str(e))
+            return
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(claim, done), daemon=True)
+        heartbeat.start()
+        try:
+            result = transcriber.transcribe(
+                input_file=claim.file_path,
+                display_start=claim.start,
+                actual_start=claim.start,
+                duration=claim.duration,
+                segment_index=claim.index,
+                attempt=claim.attempts)
+        except Exception as e:
+            result = None
+            self.log(f"[{self.worker_id}] {claim} raised: {e}")
+        finally:
+            done.set()
+            heartbeat.join()
+        if result is None:
+            self.log(f"[{self.worker_id}] {claim} failed")
+            self.store.fail(claim, self.worker_id, "transcription failed")
+            return
+        result_path = transcriber.result_codec.path_for(
+            transcriber.result_file_for(claim.file_path, claim.start, claim.duration))
+        self.store.complete(claim, result_path)
+        self.log(f"[{self.worker_id}] {claim} done")
+
+    # ---- merges ----
+
+    def process_merge(self, file_id: int, file_path: Path,
+                      segments: List[Tuple[Tuple[int, int], str]]):
+        try:
+            quiet = make_logger(quiet=True)
+            results = [(start, duration, load_json(result_path, quiet))
+                       for (start, duration), result_path in segments]
+            merged = merge_segments(results)
+            # any lane's transcriber knows result_dir and the result codec
+            transcriber = next(iter(self._transcribers.values()), None) or WhisperTranscriber()
+            sink = JsonFileSink(merged_output_path(file_path.stem, str(transcriber.result_dir)),
+                                transcriber.result_codec)
+            merged_path = sink.write(merged)
+        except Exception as e:
+            # corrupt results (MergeInputError) or a locked database must not
+            # leave the file in 'merging' with its worker thread gone
+            self.log(f"[{self.worker_id}] merge of {file_path} failed: {e}")
+            self.store.complete_merge(file_id, None)
+            return
+        self.store.complete_merge(file_id, str(merged_path))
+        self.log(f"[{self.worker_id}] merged {file_path} -> {merged_path}")
+
+    # ---- main loop ----
+
+    def _step(self) -> bool:
+        """Do one merge or segment; False when the store has nothing claimable."""
+        merge = self.store.claim_merge(self.worker_id)
+        if merge is not None:
+            self.process_merge(*merge)
+            return True
+        claim = self.store.claim_segment(self.worker_id)
+        if claim is not None:
+            self.process_segment(claim)
+            return True
+        return False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                if self._step():
+                    continue
+                if self.exit_when_idle and self.store.unfinished() == 0:
+                    return
+            except Exception as e:
+                # e.g. sqlite3.OperationalError while another host holds the
+                # database; leases held meanwhile expire and are reclaimed
+                self.log(f"[{self.worker_id}] {type(e).__name__}: {e}")
+            self._stop.wait(self.idle_poll)
+
+    def run(self):
+        """Work until stopped, or until the store is drained if exit_when_idle."""
+        self.log(f"[{self.worker_id}] working on {self.store.db_path} "
+                 f"with {self.threads} threads")
+        threads = [threading.Thread(target=self._loop, name=f"store-worker-{n}", daemon=True)
+                   for n in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(1)
+        except KeyboardInterrupt:
+            self.log(f"[{self.worker_id}] stopping; leases in flight will expire")
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
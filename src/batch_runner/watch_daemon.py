@@ -0,0 +1,349 @@
+"""
+Watch-folder ingestion.
+
+WatchDaemon watches directories (recursively) for new media files, waits
+until a file has stopped growing, slices it with `probe_media_file` and
+`get_time_slices` and submits it to the job queue. The merged transcript is
+written next to the source as `<stem>.transcript.json`.
+
+Change notification uses Linux inotify through ctypes, so there is no extra
+dependency; elsewhere, or when inotify is unavailable (e.g. some network
+filesystems), the directories are polled. Even with inotify a full rescan
+runs every `rescan-interval` seconds to catch anything the kernel dropped.
+
+Which files were handled is kept in `watch_state.sqlite`, keyed by path,
+size and mtime, so a restart does not transcribe a file again; files that
+were queued when the process stopped are picked up again.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import sqlite3
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.batch_runner.pipeline import MEDIA_EXTENSIONS, plan_slices
+from src.batch_runner.job_queue import JobQueue, FileJob, get_job_queue
+
+DEFAULT_STATE_DIR = "./tmp_audio_segments"
+OUTPUT_SUFFIX = ".transcript.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watched_files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    output TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+# inotify(7)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """Minimal inotify wrapper: recursive directory watches, changed paths out."""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+
+    def add_tree(self, root: Path):
+        for dirpath, _, _ in os.walk(root):
+            self._add(Path(dirpath))
+
+    def _add(self, directory: Path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed on {directory}")
+        self._dirs[wd] = directory
+
+    def read(self, timeout: float) -> Tuple[List[Path], bool]:
+        """
+        Wait up to `timeout` seconds for events.
+
+        Returns:
+            tuple: (changed file paths, True if the kernel queue overflowed)
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return [], False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+        changed, overflow, pos = [], False, 0
+        while pos + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, pos)
+            pos += _EVENT_HEADER.size
+            name = data[pos:pos + name_len].rstrip(b"\0")
+            pos += name_len
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(path)
+                    # files may have landed before the watch was in place
+                    changed.extend(p for p in path.rglob("*") if p.is_file())
+            else:
+                changed.append(path)
+        return changed, overflow
+
+    def close(self):
+        os.close(self._fd)
+
+
+class WatchState:
+    """
+    Persistent record of ingested files.
+
+    Args:
+        state_dir: Directory for `watch_state.sqlite`, None keeps it in memory
+    """
+
+    def __init__(self, state_dir: Optional[str | Path] = DEFAULT_STATE_DIR):
+        if state_dir is None:
+            db_path = ":memory:"
+        else:
+            Path(state_dir).mkdir(parents=True, exist_ok=True)
+            db_path = str(Path(state_dir) / "watch_state.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+    def status(self, path: Path, size: int, mtime_ns: int) -> Optional[str]:
+        """Recorded status of this version of the file, None if not seen."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status FROM watched_files WHERE path=? AND size=? AND mtime_ns=?",
+                (str(path), size, mtime_ns)).fetchone()
+        return row[0] if row else None
+
+    def set_status(self, path: Path, size: int, mtime_ns: int, status: str,
+                   output: Optional[str] = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watched_files VALUES (?, ?, ?, ?, ?, ?)",
+                (str(path), size, mtime_ns, status, output, time.time()))
+
+    def interrupted(self) -> List[Path]:
+        """Files that were queued when the previous run stopped."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM watched_files WHERE status='queued'").fetchall()
+        return [Path(r[0]) for r in rows]
+
+
+def transcript_path(file_path: Path) -> Path:
+    """Where the merged transcript of a watched file goes: next to it."""
+    return file_path.with_name(file_path.stem + OUTPUT_SUFFIX)
+
+
+class WatchDaemon:
+    """
+    Continuous ingestion from watched directories, see module docstring.
+
+    Args:
+        directories: Directories to watch, recursively
+        model: Model name to transcribe with
+        provider: Provider for the model
+        queue: Job queue to submit to, default the process-wide one
+        state_dir: Directory for the persistent state
+        stable_seconds: How long size and mtime must stay unchanged before
+            a file is considered complete
+        poll_interval: Seconds between checks of pending files (and between
+            rescans when polling)
+        rescan_interval: Seconds between full rescans while inotify works
+        use_inotify: False to always poll
+        vbr_aware: Slice on the packet index instead of the average bitrate
+        log_callback: Optional callback for status messages
+    """
+
+    def __init__(self, directories: Iterable[str | Path], model: str, provider: str,
+                 queue: Optional[JobQueue] = None,
+                 state_dir: Optional[str | Path] = DEFAULT_STATE_DIR,
+                 stable_seconds: float = 10,
+                 poll_interval: float = 5,
+                 rescan_interval: float = 300,
+                 use_inotify: bool = True,
+                 vbr_aware: bool = False,
+                 log_callback: Optional[Callable[[str], None]] = None):
+        self.directories = [Path(d).resolve() for d in directories]
+        for directory in self.directories:
+            if not directory.is_dir():
+                raise ValueError(f"Not a directory: {directory}")
+        self.model = model
+        self.provider = provider
+        self.queue = queue or get_job_queue()
+        self.state_dir = state_dir
+        self.state = WatchState(state_dir)
+        self.stable_seconds = stable_seconds
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.vbr_aware = vbr_aware
+        self.log = log_callback or print
+        # path -> (size, mtime_ns, monotonic time it was last seen changing)
+        self._pending: Dict[Path, Tuple[int, int, float]] = {}
+        self._jobs: Dict[int, Tuple[Path, int, int]] = {}
+        # held across submit: a job may finish before submit returns, its
+        # listener call must wait until the job is registered
+        self._jobs_lock = threading.RLock()
+        self._stop = threading.Event()
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+                for directory in self.directories:
+                    self._inotify.add_tree(directory)
+            except (OSError, AttributeError) as e:
+                self.log(f"inotify unavailable ({e}), polling every {poll_interval}s")
+                self._inotify = None
+        self.queue.add_listener(self._on_queue_event)
+
+    # ---- discovery ----
+
+    @staticmethod
+    def _is_candidate(path: Path) -> bool:
+        return path.suffix.lower() in MEDIA_EXTENSIONS and not path.name.startswith(".")
+
+    def _note(self, path: Path):
+        """Track a possibly new or changed file until it is stable."""
+        if not self._is_candidate(path):
+            return
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            self._pending.pop(path, None)
+            return
+        if self.state.status(path, st.st_size, st.st_mtime_ns) is not None:
+            return
+        previous = self._pending.get(path)
+        if previous is None or previous[:2] != (st.st_size, st.st_mtime_ns):
+            self._pending[path] = (st.st_size, st.st_mtime_ns, time.monotonic())
+
+    def rescan(self):
+        for directory in self.directories:
+            for path in directory.rglob("*"):
+                if path.is_file():
+                    self._note(path)
+
+    def _check_pending(self):
+        now = time.monotonic()
+        for path in list(self._pending):
+            self._note(path)  # refreshes the change time if it grew
+            entry = self._pending.get(path)
+            if entry and now - entry[2] >= self.stable_seconds:
+                del self._pending[path]
+                self._ingest(path, entry[0], entry[1])
+
+    # ---- ingestion ----
+
+    def _ingest(self, path: Path, size: int, mtime_ns: int):
+        try:
+            duration, slices = plan_slices(path, self.vbr_aware, self.state_dir)
+        except Exception as e:
+            self.log(f"[watch] cannot slice {path}: {e}")
+            self.state.set_status(path, size, mtime_ns, "failed")
+            return
+        if not slices:
+            self.log(f"[watch] nothing to transcribe in {path}")
+            self.state.set_status(path, size, mtime_ns, "failed")
+            return
+        self.state.set_status(path, size, mtime_ns, "queued")
+        try:
+            with self._jobs_lock:
+                job = self.queue.submit(path, slices, self.model, self.provider, duration,
+                                        output_path=transcript_path(path))
+                self._jobs[job.id] = (path, size, mtime_ns)
+        except Exception as e:
+            # model/provider not configured (ValueError), queue shut down
+            # (RuntimeError): fail the file rather than the daemon
+            self.log(f"[watch] cannot queue {path}: {e}")
+            self.state.set_status(path, size, mtime_ns, "failed")
+            return
+        self.log(f"[watch] queued {path} ({duration:.0f}s, {len(slices)} segments)")
+
+    def _on_queue_event(self, event: str, job: FileJob, index: Optional[int]):
+        if event not in ("job_completed", "job_failed"):
+            return
+        with self._jobs_lock:
+            entry = self._jobs.pop(job.id, None)
+        if entry is None:
+            return  # not one of ours
+        path, size, mtime_ns = entry
+        if event == "job_completed" and job.outcome.merged_path:
+            self.state.set_status(path, size, mtime_ns, "done", job.outcome.merged_path)
+            self.log(f"[watch] done {path} -> {job.outcome.merged_path}")
+        elif event == "job_completed":
+            self.state.set_status(path, size, mtime_ns, "failed")
+            self.log(f"[watch] failed {path}: {job.outcome.error or 'merge failed'}")
+        else:
+            self.state.set_status(path, size, mtime_ns, "failed")
+            self.log(f"[watch] failed {path}: segments {sorted(job.outcome.failed_segments)}")
+
+    # ---- main loop ----
+
+    def run(self):
+        """Watch until `stop()` is called."""
+        for path in self.state.interrupted():
+            if path.exists():
+                self.log(f"[watch] resuming {path}")
+                st = path.stat()
+                self._pending[path] = (st.st_size, st.st_mtime_ns, 0.0)
+        self.rescan()
+        self.log(f"[watch] watching {', '.join(map(str, self.directories))} "
+                 f"({'inotify' if self._inotify else 'polling'})")
+        last_rescan = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                if self._inotify:
+                    # events wake us up early; the timeout bounds how late
+                    # a pending file is seen as stable and stop() is noticed
+                    changed, overflow = self._inotify.read(self.poll_interval)
+                    for path in changed:
+                        self._note(path)
+                    rescan_due = overflow or \
+                        time.monotonic() - last_rescan >= self.rescan_interval
+                else:
+                    self._stop.wait(self.poll_interval)
+                    rescan_due = True
+                if rescan_due:
+                    self.rescan()
+                    last_rescan = time.monotonic()
+                self._check_pending()
+        finally:
+            self.queue.remove_listener(self._on_queue_event)
+            if self._inotify:
+                self._inotify.close()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,316 @@
+"""
+Merger micro-benchmark on synthetic segment transcripts.
+
+Builds deterministic `verbose_json` segment sets (one timeline of words
+cut into overlapping segments, like the engine's slices) for a matrix of
+segment lengths, scripts (Latin words / CJK characters), overlap sizes
+and rates of injected non-subsequence tokens, and times each merger
+stage on them:
+- subsequence: `is_subsequence` on every segment
+- lcs: `locate_non_subsequence_elements` on the segments failing it
+- merge_words: `merge_words` on the cleaned segments
+- merge_segments: the whole `merge_segments` call
+
+Every (case, stage) runs in a forked child process so its peak RSS is its
+own. Results can be saved as a baseline and later runs compared with it:
+
+    python -m src.benchmark.merger_bench --save-baseline
+    python -m src.benchmark.merger_bench            # compares, exit 1 on regression
+    python -m src.benchmark.merger_bench --lengths 60,600 --scripts cjk --noise 0.02
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS, timings only
+    resource = None
+
+from src.hear_result_merger.merge_json import (
+    SegmentResult, calculate_midpoints, get_overlap_intervals, merge_segments,
+    merge_words, test_and_remove_non_subsequential_words)
+from src.hear_result_merger.merge_json_algo import (
+    _silent, is_subsequence, locate_non_subsequence_elements)
+
+DEFAULT_BASELINE = "./tmp_audio_segments/benchmark/merger_baseline.json"
+STAGES = ("subsequence", "lcs", "merge_words", "merge_segments")
+
+_LATIN = (
+    "so the main idea here is that we split long recordings into pieces send "
+    "each piece to the model and then stitch the words back together using "
+    "their timestamps which works well as long as the overlap is long enough"
+).split()
+_CJK = list("我们今天要讨论的是如何把很长的录音切成小段然后分别转写再根据时间戳把结果合并起来这样做的好处是")
+# never occur in the generated text, so a segment holding one fails the
+# subsequence test and goes through the LCS cleanup
+_NOISE = {"latin": ["1984", "42"], "cjk": ["〇", "②"]}
+_WORDS_PER_SECOND = {"latin": 2.5, "cjk": 4.0}
+
+
+def synthetic_segments(script: str = "latin", segment_seconds: int = 300,
+                       overlap_seconds: float = 9, segments: int = 4,
+                       noise_rate: float = 0.0, seed: int = 0) -> List[SegmentResult]:
+    """
+    Overlapping segment results cut from one synthetic word timeline.
+
+    Args:
+        script: "latin" (space-separated words) or "cjk" (one character per word)
+        segment_seconds: Slice length; every slice but the last is extended
+            by `overlap_seconds`
+        segments: Number of slices
+        noise_rate: Share of words followed by an injected token that is
+            absent from the segment text
+        seed: Random seed, the same arguments always give the same segments
+
+    Returns:
+        list: (start, duration, verbose_json) tuples as merge_segments takes them
+    """
+    rng = random.Random(seed)
+    vocabulary = _LATIN if script == "latin" else _CJK
+    separator = " " if script == "latin" else ""
+    commas = (",", ".") if script == "latin" else ("，", "。")
+    step = 1 / _WORDS_PER_SECOND[script]
+    total = segment_seconds * segments
+
+    # global timeline: (start, word, trailing punctuation)
+    timeline = []
+    t = 0.0
+    while t < total:
+        roll = rng.random()
+        punctuation = commas[0] if roll < 0.08 else commas[1] if roll < 0.12 else ""
+        timeline.append((round(t, 2), rng.choice(vocabulary), punctuation))
+        t += step * rng.uniform(0.7, 1.3)
+
+    results = []
+    for i in range(segments):
+        start = i * segment_seconds
+        duration = segment_seconds + (overlap_seconds if i < segments - 1 else 0)
+        window = [w for w in timeline if start <= w[0] < start + duration]
+        words, text = [], ""
+        for global_start, word, punctuation in window:
+            local = round(global_start - start, 2)
+            words.append({"word": word, "start": local, "end": round(local + step * 0.8, 2)})
+            text += separator + word + punctuation
+            if noise_rate and rng.random() < noise_rate:
+                words.append({"word": rng.choice(_NOISE[script]),
+                              "start": local, "end": local})
+        results.append((start, duration, {
+            "task": "transcribe", "language": "english" if script == "latin" else "chinese",
+            "duration": duration, "text": text, "words": words,
+            "_source_name": f"synthetic_{i}"}))
+    return results
+
+
+def _stage_runner(stage: str, results: List[SegmentResult]) -> Callable[[], Any]:
+    """Stage callable, with everything outside the stage prepared up front."""
+    if stage == "subsequence":
+        return lambda: [is_subsequence(d["words"], d["text"], _silent) for _, _, d in results]
+    if stage == "lcs":
+        failing = [d for _, _, d in results if not is_subsequence(d["words"], d["text"], _silent)]
+        return lambda: [locate_non_subsequence_elements(d["words"], d["text"], _silent)
+                        for d in failing]
+    if stage == "merge_words":
+        ordered = sorted(results, key=lambda r: r[0])
+        overlaps = get_overlap_intervals([(s, s + d) for s, d, _ in ordered])
+        prepared = [(start, calculate_midpoints(overlaps, i, _silent),
+                     test_and_remove_non_subsequential_words(data, "", _silent))
+                    for i, (start, _, data) in enumerate(ordered)]
+
+        def run():
+            merged = OrderedDict([("duration", 0), ("text", ""), ("words", [])])
+            for start, (left, right), data in prepared:
+                merge_words(data, start, left, right, merged)
+            return merged
+        return run
+    if stage == "merge_segments":
+        return lambda: merge_segments(results)
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def _max_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def measure_stage(case: Dict[str, Any], stage: str, repeat: int = 3) -> Dict[str, Any]:
+    """Wall time (median of `repeat` runs) and RSS of one stage, in this process."""
+    results = synthetic_segments(**case)
+    run = _stage_runner(stage, results)
+    rss_before = _max_rss_mb()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+    rss_after = _max_rss_mb()
+    return {
+        "wall_ms": statistics.median(times),
+        "min_ms": min(times),
+        "peak_rss_mb": rss_after,
+        "rss_growth_mb": None if rss_after is None else rss_after - rss_before,
+        "words": sum(len(d["words"]) for _, _, d in results),
+        "chars": sum(len(d["text"]) for _, _, d in results),
+    }
+
+
+def _measure_in_child(connection, case, stage, repeat):
+    try:
+        connection.send(measure_stage(case, stage, repeat))
+    except Exception as e:
+        connection.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        connection.close()
+
+
+def measure_isolated(case: Dict[str, Any], stage: str, repeat: int = 3) -> Dict[str, Any]:
+    """measure_stage in a forked child, so peak RSS is not the whole suite's."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return measure_stage(case, stage, repeat)
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    child = context.Process(target=_measure_in_child, args=(sender, case, stage, repeat))
+    child.start()
+    sender.close()
+    result = receiver.recv()
+    child.join()
+    return result
+
+
+def case_key(case: Dict[str, Any], stage: str) -> str:
+    return (f"{case['script']}/len{case['segment_seconds']}/ov{case['overlap_seconds']:g}"
+            f"/noise{case['noise_rate']:g}/{stage}")
+
+
+def run_suite(scripts, lengths, overlaps, noise_rates, segments: int = 4,
+              stages=STAGES, repeat: int = 3, seed: int = 0,
+              progress: Optional[Callable[[str], None]] = None) -> Dict[str, Dict[str, Any]]:
+    """Measure every stage for every case; returns case key -> measurement."""
+    measurements = {}
+    for script, length, overlap, noise in itertools.product(
+            scripts, lengths, overlaps, noise_rates):
+        case = {"script": script, "segment_seconds": length, "overlap_seconds": overlap,
+                "segments": segments, "noise_rate": noise, "seed": seed}
+        for stage in stages:
+            if stage == "lcs" and not noise:
+                continue  # nothing fails the subsequence test without noise
+            key = case_key(case, stage)
+            measurements[key] = measure_isolated(case, stage, repeat)
+            if progress:
+                progress(f"{key}: {measurements[key].get('wall_ms', 0):.1f} ms")
+    return measurements
+
+
+def compare(measurements: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            time_tolerance: float = 1.25, rss_tolerance: float = 1.25,
+            min_delta_ms: float = 5.0) -> List[Dict[str, Any]]:
+    """
+    Rows of key, wall_ms, baseline_ms, time_ratio, rss ratio and status
+    ("regression", "improvement", "ok" or "new"). Time differences under
+    `min_delta_ms` count as ok whatever the ratio.
+    """
+    rows = []
+    for key, current in measurements.items():
+        row = {"key": key, **current}
+        base = baseline.get(key)
+        if not base or "wall_ms" not in current or "wall_ms" not in base:
+            row["status"] = "new"
+            rows.append(row)
+            continue
+        row["baseline_ms"] = base["wall_ms"]
+        row["time_ratio"] = current["wall_ms"] / max(base["wall_ms"], 1e-6)
+        growth, base_growth = current.get("rss_growth_mb"), base.get("rss_growth_mb")
+        # growths under a few MB are allocator noise
+        if growth is not None and base_growth is not None and max(growth, base_growth) > 4:
+            row["rss_ratio"] = growth / max(base_growth, 1.0)
+        significant = abs(current["wall_ms"] - base["wall_ms"]) >= min_delta_ms
+        if (significant and row["time_ratio"] > time_tolerance) or \
+                row.get("rss_ratio", 1.0) > rss_tolerance:
+            row["status"] = "regression"
+        elif significant and row["time_ratio"] < 1 / time_tolerance:
+            row["status"] = "improvement"
+        else:
+            row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def format_rows(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'case/stage':<44}{'words':>7}{'ms':>10}{'base ms':>10}{'ratio':>7}"
+             f"{'peak MB':>9}{'+MB':>7}  status"]
+    for row in rows:
+        if "error" in row:
+            lines.append(f"{row['key']:<44}  error: {row['error']}")
+            continue
+        base = f"{row['baseline_ms']:.1f}" if "baseline_ms" in row else "-"
+        ratio = f"{row['time_ratio']:.2f}" if "time_ratio" in row else "-"
+        peak = f"{row['peak_rss_mb']:.0f}" if row.get("peak_rss_mb") is not None else "-"
+        growth = f"{row['rss_growth_mb']:.0f}" if row.get("rss_growth_mb") is not None else "-"
+        lines.append(f"{row['key']:<44}{row['words']:>7}{row['wall_ms']:>10.1f}{base:>10}"
+                     f"{ratio:>7}{peak:>9}{growth:>7}  {row['status']}")
+    return "\n".join(lines)
+
+
+def _csv(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the merger stages on synthetic transcripts.")
+    parser.add_argument("--scripts", type=_csv(str), default=["latin", "cjk"])
+    parser.add_argument("--lengths", type=_csv(int), default=[60, 300],
+                        help="segment lengths in seconds (600 with noise takes minutes per stage)")
+    parser.add_argument("--overlaps", type=_csv(float), default=[9.0],
+                        help="overlap seconds between segments")
+    parser.add_argument("--noise", type=_csv(float), default=[0.0, 0.01],
+                        help="rates of injected non-subsequence tokens")
+    parser.add_argument("--segments", type=int, default=4, help="segments per case")
+    parser.add_argument("--stages", type=_csv(str), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this run as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="slowdown/RSS growth ratio counted as a regression")
+    parser.add_argument("--json", action="store_true", help="print rows as JSON")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+    measurements = run_suite(args.scripts, args.lengths, args.overlaps, args.noise,
+                             args.segments, args.stages, args.repeat, args.seed,
+                             progress=None if args.json else
+                             lambda m: print(m, file=sys.stderr, flush=True))
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        stored.update(measurements)
+        baseline_path.write_text(json.dumps(stored, indent=1, sort_keys=True))
+        print(f"Baseline saved to {baseline_path} ({len(measurements)} entries)")
+        baseline = {}
+    else:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+
+    rows = compare(measurements, baseline, args.tolerance, args.tolerance)
+    print(json.dumps(rows, indent=2) if args.json else format_rows(rows))
+    return 1 if any(row["status"] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""
+Local stand-in for the `/v1/audio/transcriptions` endpoint.
+
+Speaks the same multipart protocol as the real API and answers with a
+deterministic `verbose_json` (the same audio bytes always give the same
+words), with segments always and words when
+`timestamp_granularities[]=word` is sent. Latency, 429/5xx injection and
+per-API-key rate limits are configurable, so slicing and scheduling
+settings can be compared without spending API money.
+
+    python -m src.benchmark.mock_whisper_server --port 8999 \\
+        --latency lognormal:2,0.4 --per-audio-minute 0.3 --error-429 0.02 --rpm 20
+
+Then point a provider's endpoint in config.yaml at http://127.0.0.1:8999,
+or call `WhisperTranscriber.use_endpoint`.
+"""
+
+import argparse
+import email.parser
+import email.policy
+import hashlib
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+_VOCABULARY = (
+    "the quick brown fox jumps over lazy dog we are going to talk about audio "
+    "transcription models segments words timestamps merging overlap provider "
+    "latency throughput queue worker slice minute second today question answer "
+    "because however therefore example really important point next"
+).split()
+
+WORD_SECONDS = 0.4
+WORD_GAP = 0.05
+WORDS_PER_SEGMENT = 12
+
+
+class LatencyModel:
+    """
+    Response delay: a base distribution plus a cost per minute of audio.
+
+    Specs: "fixed:S", "uniform:LOW,HIGH", "lognormal:MEDIAN,SIGMA" (seconds).
+    """
+
+    def __init__(self, spec: str = "fixed:0", per_audio_minute: float = 0.0):
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v]
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}[kind]
+        if len(values) != expected:
+            raise ValueError(f"{kind} latency takes {expected} parameter(s): {spec}")
+        self.kind = kind
+        self.values = values
+        self.per_audio_minute = per_audio_minute
+
+    def sample(self, rng: random.Random, audio_seconds: float) -> float:
+        if self.kind == "fixed":
+            base = self.values[0]
+        elif self.kind == "uniform":
+            base = rng.uniform(*self.values)
+        else:
+            median, sigma = self.values
+            base = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return max(0.0, base + self.per_audio_minute * audio_seconds / 60)
+
+
+def audio_duration(data: bytes, assumed_bitrate: int) -> float:
+    """Duration of uploaded audio: ffprobe when installed, else size / bitrate."""
+    if shutil.which("ffprobe"):
+        with tempfile.NamedTemporaryFile(suffix=".bin") as f:
+            f.write(data)
+            f.flush()
+            proc = subprocess.run(
+                ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                 "-of", "default=nw=1:nk=1", f.name],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        try:
+            return float(proc.stdout.strip())
+        except ValueError:
+            pass
+    return len(data) * 8 / assumed_bitrate
+
+
+def fake_transcription(data: bytes, duration: float, word_granularity: bool) -> Dict[str, Any]:
+    """Deterministic verbose_json for the given audio bytes."""
+    seed = int.from_bytes(hashlib.sha1(data).digest()[:8], "big")
+    rng = random.Random(seed)
+    words = []
+    t = 0.0
+    while t + WORD_SECONDS <= duration:
+        words.append({"word": rng.choice(_VOCABULARY), "start": round(t, 2),
+                      "end": round(t + WORD_SECONDS, 2)})
+        t += WORD_SECONDS + WORD_GAP
+    segments = []
+    for i in range(0, len(words), WORDS_PER_SEGMENT):
+        chunk = words[i:i + WORDS_PER_SEGMENT]
+        segments.append({
+            "id": len(segments), "seek": 0,
+            "start": chunk[0]["start"], "end": chunk[-1]["end"],
+            "text": " " + " ".join(w["word"] for w in chunk),
+            "tokens": [], "temperature": 0.0, "avg_logprob": -0.2,
+            "compression_ratio": 1.3, "no_speech_prob": 0.01,
+        })
+    result = {
+        "task": "transcribe", "language": "english", "duration": round(duration, 2),
+        "text": " ".join(w["word"] for w in words), "segments": segments,
+    }
+    if word_granularity:
+        result["words"] = words
+    return result
+
+
+def parse_multipart(content_type: str, body: bytes) -> Dict[str, Tuple[Optional[str], bytes]]:
+    """Form fields of a multipart body: name -> (filename, raw bytes)."""
+    message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        fields[name] = (part.get_filename(), part.get_payload(decode=True) or b"")
+    return fields
+
+
+class _KeyLimits:
+    """Sliding-window requests-per-minute and concurrency per API key."""
+
+    def __init__(self, rpm: Optional[int], concurrent: Optional[int]):
+        self.rpm = rpm
+        self.concurrent = concurrent
+        self._lock = threading.Lock()
+        self._starts = defaultdict(deque)
+        self._in_flight = defaultdict(int)
+
+    def enter(self, key: str) -> Optional[float]:
+        """Admit a request; returns a Retry-After in seconds when over the limit."""
+        now = time.monotonic()
+        with self._lock:
+            starts = self._starts[key]
+            while starts and starts[0] <= now - 60:
+                starts.popleft()
+            if self.rpm and len(starts) >= self.rpm:
+                return starts[0] + 60 - now
+            if self.concurrent and self._in_flight[key] >= self.concurrent:
+                return 1.0
+            starts.append(now)
+            self._in_flight[key] += 1
+            return None
+
+    def leave(self, key: str):
+        with self._lock:
+            self._in_flight[key] -= 1
+
+
+class MockWhisperServer:
+    """
+    Args:
+        host, port: Listen address; port 0 picks a free port
+        latency: Response delay model
+        error_429: Probability of an injected 429 per request
+        error_5xx: Probability of an injected 500/502/503 per request
+        rpm_per_key: Requests per minute per API key, None = unlimited
+        concurrent_per_key: In-flight requests per API key, None = unlimited
+        seed: Seed for latency and error injection
+        assumed_bitrate: Bits per second used to size audio without ffprobe
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: Optional[LatencyModel] = None,
+                 error_429: float = 0.0, error_5xx: float = 0.0,
+                 rpm_per_key: Optional[int] = None,
+                 concurrent_per_key: Optional[int] = None,
+                 seed: int = 0, assumed_bitrate: int = 64000):
+        self.latency = latency or LatencyModel()
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.limits = _KeyLimits(rpm_per_key, concurrent_per_key)
+        self.assumed_bitrate = assumed_bitrate
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.stats = defaultdict(int)  # "requests", "status_<code>", "bytes"
+        self._stats_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, **amounts):
+        with self._stats_lock:
+            for key, amount in amounts.items():
+                self.stats[key] += amount
+
+    def _draw(self, audio_seconds: float) -> Tuple[float, Optional[int]]:
+        """(delay, injected error status or None)."""
+        with self._rng_lock:
+            delay = self.latency.sample(self._rng, audio_seconds)
+            roll = self._rng.random()
+            if roll < self.error_429:
+                return delay * 0.1, 429
+            if roll < self.error_429 + self.error_5xx:
+                return delay, self._rng.choice((500, 502, 503))
+            return delay, None
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status: int, payload: Dict[str, Any],
+                       headers: Optional[Dict[str, str]] = None):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                server._count(**{f"status_{status}": 1})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                server._count(requests=1, bytes=len(body))
+                if self.path.rstrip("/") != "/v1/audio/transcriptions":
+                    self._reply(404, {"error": {"message": f"No route {self.path}"}})
+                    return
+                key = self.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+                if not key:
+                    self._reply(401, {"error": {"message": "Missing API key"}})
+                    return
+                try:
+                    fields = parse_multipart(self.headers.get("Content-Type", ""), body)
+                except Exception as e:
+                    self._reply(400, {"error": {"message": f"Bad multipart body: {e}"}})
+                    return
+                if "file" not in fields:
+                    self._reply(400, {"error": {"message": "No file field"}})
+                    return
+
+                retry_after = server.limits.enter(key)
+                if retry_after is not None:
+                    self._reply(429, {"error": {"message": "Rate limit reached",
+                                                "type": "rate_limit_exceeded"}},
+                                {"Retry-After": str(math.ceil(retry_after))})
+                    return
+                try:
+                    audio = fields["file"][1]
+                    duration = audio_duration(audio, server.assumed_bitrate)
+                    delay, error = server._draw(duration)
+                    time.sleep(delay)
+                    if error == 429:
+                        self._reply(429, {"error": {"message": "Injected rate limit",
+                                                    "type": "rate_limit_exceeded"}},
+                                    {"Retry-After": "1"})
+                    elif error:
+                        self._reply(error, {"error": {"message": "Injected server error"}})
+                    else:
+                        granularity = fields.get("timestamp_granularities[]", (None, b""))[1]
+                        self._reply(200, fake_transcription(audio, duration,
+                                                            granularity == b"word"))
+                finally:
+                    server.limits.leave(key)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockWhisperServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="mock-whisper", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Mock Whisper transcription server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--latency", default="fixed:0",
+                        help="fixed:S | uniform:LOW,HIGH | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--per-audio-minute", type=float, default=0.0,
+                        help="extra seconds of latency per minute of audio")
+    parser.add_argument("--error-429", type=float, default=0.0, help="429 probability")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="5xx probability")
+    parser.add_argument("--rpm", type=int, default=None, help="requests/minute per key")
+    parser.add_argument("--concurrent", type=int, default=None, help="in-flight per key")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    server = MockWhisperServer(args.host, args.port,
+                               LatencyModel(args.latency, args.per_audio_minute),
+                               args.error_429, args.error_5xx, args.rpm,
+                               args.concurrent, args.seed).start()
+    print(f"Mock Whisper server on {server.url} (pid {os.getpid()}), Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+"""
+Throughput benchmark of the transcription engine against the mock server.
+
+Generates synthetic media with ffmpeg (cached under the bench directory),
+then runs every combination of queue policy x workers per lane x slice
+length through a JobQueue whose transcribers point at a
+MockWhisperServer, and reports files/hour, p95 segment latency and upload
+bytes/s per run.
+
+    python -m src.benchmark.throughput --files 6 --minutes 3 \\
+        --policies fifo,shortest-first --workers 2,4 --slice-seconds 60,300 \\
+        --latency lognormal:1,0.3 --per-audio-minute 0.5 --error-429 0.05
+
+Needs ffmpeg/ffprobe on PATH for the synthetic media and the cuts.
+"""
+
+import argparse
+import itertools
+import json
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.batch_runner.job_queue import JobQueue
+from src.benchmark.mock_whisper_server import LatencyModel, MockWhisperServer
+from src.telemetry.metrics import BYTES_UPLOADED
+from src.time_slicer.time_slicer import PADDING, pad_intervals_right
+from src.transcriber_core.transcriber import WhisperTranscriber
+
+DEFAULT_BENCH_DIR = "./tmp_audio_segments/benchmark"
+BENCH_MODEL = "mock-whisper"
+BENCH_PROVIDER = "mock"
+BENCH_API_KEY = "bench-key"
+
+
+def synthetic_media(bench_dir: Path, count: int, minutes: float,
+                    vary: bool = True) -> List[Path]:
+    """
+    `count` m4a files of sine tones; with `vary` the lengths spread from
+    half to 1.5x `minutes` so the queue policies have something to order.
+    """
+    media_dir = bench_dir / "media"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i in range(count):
+        factor = 0.5 + i / max(count - 1, 1) if vary else 1.0
+        seconds = int(minutes * 60 * factor)
+        path = media_dir / f"bench_{i:03d}_{seconds}s.m4a"
+        if not path.exists():
+            subprocess.run(
+                ["ffmpeg", "-y", "-v", "error", "-f", "lavfi",
+                 "-i", f"sine=frequency={220 + 40 * i}:duration={seconds}",
+                 "-ac", "1", "-c:a", "aac", "-b:a", "64k", str(path)],
+                check=True)
+        files.append(path)
+    return files
+
+
+def uniform_slices(duration: float, slice_seconds: int) -> List[tuple]:
+    """Back-to-back slices of `slice_seconds`, padded for the merger's overlap."""
+    starts = range(0, int(duration), slice_seconds)
+    slices = [(s, min(slice_seconds, int(duration) - s)) for s in starts]
+    return pad_intervals_right(slices, PADDING)
+
+
+def _media_duration(path: Path) -> float:
+    proc = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+         "-of", "default=nw=1:nk=1", str(path)],
+        stdout=subprocess.PIPE, text=True, check=True)
+    return float(proc.stdout.strip())
+
+
+def run_once(files: List[Path], server_url: str, run_dir: Path, policy: str,
+             workers: int, slice_seconds: int, retries: int = 2,
+             rate_limit_config: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Transcribe `files` through a fresh JobQueue against the mock server.
+
+    Returns:
+        dict: policy, workers, slice_seconds, files, segments, failed,
+        wall_seconds, files_per_hour, p50/p95_segment_seconds,
+        upload_bytes_per_second
+    """
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+    run_dir.mkdir(parents=True)
+
+    def factory(model: str, provider: str) -> WhisperTranscriber:
+        transcriber = WhisperTranscriber()
+        transcriber.use_endpoint(model, provider, server_url, BENCH_API_KEY,
+                                 rate_limit_config)
+        # fresh results, so no run is served from a previous run's files
+        transcriber.result_dir = run_dir
+        return transcriber
+
+    segment_started: Dict[tuple, float] = {}
+    segment_seconds: List[float] = []
+
+    def listener(event, job, index):
+        if event == "segment_started":
+            segment_started[(job.id, index)] = time.monotonic()
+        elif event in ("segment_completed", "segment_failed"):
+            segment_seconds.append(time.monotonic() - segment_started.pop((job.id, index)))
+
+    queue = JobQueue(policy, retries, workers, transcriber_factory=factory)
+    queue.add_listener(listener)
+    bytes_before = BYTES_UPLOADED.value(provider=BENCH_PROVIDER, model=BENCH_MODEL)
+    started = time.monotonic()
+    jobs = []
+    for path in files:
+        duration = _media_duration(path)
+        jobs.append(queue.submit(path, uniform_slices(duration, slice_seconds),
+                                 BENCH_MODEL, BENCH_PROVIDER, duration))
+    queue.wait_all()
+    wall = time.monotonic() - started
+    queue.shutdown()
+    uploaded = BYTES_UPLOADED.value(provider=BENCH_PROVIDER, model=BENCH_MODEL) - bytes_before
+
+    return {
+        "policy": policy,
+        "workers": workers,
+        "slice_seconds": slice_seconds,
+        "files": len(files),
+        "segments": len(segment_seconds),
+        "failed": sum(len(job.outcome.failed_segments) for job in jobs),
+        "wall_seconds": wall,
+        "files_per_hour": len(files) / wall * 3600,
+        "p50_segment_seconds": float(np.percentile(segment_seconds, 50)) if segment_seconds else None,
+        "p95_segment_seconds": float(np.percentile(segment_seconds, 95)) if segment_seconds else None,
+        "upload_bytes_per_second": uploaded / wall,
+    }
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+    lines = [f"{'policy':<16}{'workers':>8}{'slice s':>9}{'segments':>10}{'failed':>8}"
+             f"{'wall s':>9}{'files/h':>10}{'p95 seg s':>11}{'MB/s':>8}"]
+    for r in results:
+        p95 = f"{r['p95_segment_seconds']:.2f}" if r["p95_segment_seconds"] is not None else "-"
+        lines.append(f"{r['policy']:<16}{r['workers']:>8}{r['slice_seconds']:>9}"
+                     f"{r['segments']:>10}{r['failed']:>8}{r['wall_seconds']:>9.1f}"
+                     f"{r['files_per_hour']:>10.1f}{p95:>11}"
+                     f"{r['upload_bytes_per_second'] / 1024 / 1024:>8.2f}")
+    return "\n".join(lines)
+
+
+def _csv(cast):
+    return lambda value: [cast(v) for v in value.split(",") if v]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark queue policy, workers and slice length against a mock Whisper server.")
+    parser.add_argument("--bench-dir", default=DEFAULT_BENCH_DIR)
+    parser.add_argument("--files", type=int, default=4, help="synthetic files per run")
+    parser.add_argument("--minutes", type=float, default=2.0, help="mean file length")
+    parser.add_argument("--policies", type=_csv(str), default=["fifo"])
+    parser.add_argument("--workers", type=_csv(int), default=[2], help="workers per lane")
+    parser.add_argument("--slice-seconds", type=_csv(int), default=[60])
+    parser.add_argument("--latency", default="uniform:0.5,1.5",
+                        help="fixed:S | uniform:LOW,HIGH | lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--per-audio-minute", type=float, default=0.2)
+    parser.add_argument("--error-429", type=float, default=0.0)
+    parser.add_argument("--error-5xx", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=None, help="mock server requests/minute")
+    parser.add_argument("--concurrent", type=int, default=None, help="mock server in-flight limit")
+    parser.add_argument("--max-concurrent-calls", type=int, default=None,
+                        help="client-side max-concurrent-calls (default: workers per lane)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    bench_dir = Path(args.bench_dir)
+    files = synthetic_media(bench_dir, args.files, args.minutes)
+
+    results = []
+    for policy, workers, slice_seconds in itertools.product(
+            args.policies, args.workers, args.slice_seconds):
+        server = MockWhisperServer(
+            latency=LatencyModel(args.latency, args.per_audio_minute),
+            error_429=args.error_429, error_5xx=args.error_5xx,
+            rpm_per_key=args.rpm, concurrent_per_key=args.concurrent,
+            seed=args.seed).start()
+        try:
+            run_dir = bench_dir / "runs" / f"{policy}_w{workers}_s{slice_seconds}"
+            rate_limit_config = {"type": "concurrent", "concurrent-settings": {
+                "max-concurrent-calls": args.max_concurrent_calls or workers}}
+            result = run_once(files, server.url, run_dir, policy, workers,
+                              slice_seconds, rate_limit_config=rate_limit_config)
+            result["server"] = dict(server.stats)
+        finally:
+            server.stop()
+        results.append(result)
+        if not args.json:
+            print(f"{policy} x {workers} workers x {slice_seconds}s slices: "
+                  f"{result['files_per_hour']:.1f} files/h")
+
+    print(json.dumps(results, indent=2) if args.json else format_results(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@ from pathlib import Path
 from typing import Optional, Dict, Any, Callable
 from functools import lru_cache
 
+from src.telemetry.events import INFO, WARNING, log
+
 class ConfigManager:
     _instance = None
     
@@ -25,12 +27,13 @@ class ConfigManager:
         """Set the logging callback function"""
         self._log_callback = callback
     
-    def _log(self, message: str):
-        """Internal logging method"""
-        if self._log_callback:
-            self._log_callback(message)
+    def _log(self, template: str, *args, level: int = INFO):
+        """Internal logging method, `template % args` formatted lazily"""
+        # may run from _load_config, before _log_callback is set
+        if getattr(self, '_log_callback', None):
+            self._log_callback(template % args if args else template)
         else:
-            print(message)  # Fallback to print if no callback set
+            log(template, *args, level=level)  # Log event, printed if nobody subscribes
     
     def _load_config(self) -> dict:
         """Load configuration from yaml file"""
@@ -38,7 +41,7 @@ class ConfigManager:
             with open(self._config_path, 'r', encoding='utf-8') as f:
                 return yaml.safe_load(f)
         except Exception as e:
-            self._log(f"Error loading config: {e}")
+            self._log("Error loading config: %s", e, level=WARNING)
             return {}
     
     def get_proxy_for_provider(self, model: str, provider: str) -> Optional[Dict[str, str]]:
@@ -47,14 +50,14 @@ class ConfigManager:
             # Check if provider needs proxy
             proxy_name = self._config.get('api', {}).get('providers', {})\
                 .get(provider, {}).get('recommend-proxy', {})
-            self._log(f"Recommended proxy name for {provider}: {proxy_name}")
+            self._log("Recommended proxy name for %s: %s", provider, proxy_name)
             
             if not proxy_name:
                 return None
             
             # Get proxy configuration
             proxy_config = self._config.get('proxies', {}).get(proxy_name, {})
-            self._log(f"Proxy configuration for {proxy_name}: {proxy_config}")
+            self._log("Proxy configuration for %s: %s", proxy_name, proxy_config)
             
             if not proxy_config:
                 return None
@@ -68,11 +71,11 @@ class ConfigManager:
                 'http': f'http://{host}:{port}',
                 'https': f'http://{host}:{port}'
             }
-            self._log(f"Using proxy settings: {proxy_urls}")
+            self._log("Using proxy settings: %s", proxy_urls)
             return proxy_urls
             
         except Exception as e:
-            self._log(f"Error getting proxy settings: {e}")
+            self._log("Error getting proxy settings: %s", e, level=WARNING)
             return None
     
     def get_provider_endpoint(self, provider: str) -> Optional[str]:
@@ -92,4 +95,18 @@ class ConfigManager:
     
     def get_paths_config(self) -> Dict[str, str]:
         """Get paths configuration"""
-        return self._config.get('paths', {})
\ No newline at end of file
+        return self._config.get('paths', {})
+    
+    def get_transcription_task_config(self) -> Dict[str, Any]:
+        """Get the tasks.transcription configuration"""
+        return self._config.get('tasks', {}).get('transcription', {}) or {}
+
+    def get_default_model(self) -> Optional[str]:
+        """First model of tasks.transcription.models, None if none is listed"""
+        models = self.get_transcription_task_config().get('models') or {}
+        return next(iter(models), None)
+
+    def get_default_provider(self, model: str) -> Optional[str]:
+        """First provider configured for the model, None if it has none"""
+        providers = self.get_model_config(model).get('providers') or {}
+        return next(iter(providers), None)
@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import List, Optional
+
+from PyQt5.QtWidgets import QApplication, QPlainTextEdit
+from PyQt5.QtCore import QTimer
+
+from src.configuration_manager.configuration_manager import ConfigManager
+
+DEFAULT_MAX_LINES = 5000
+DEFAULT_FLUSH_INTERVAL = 75  # ms
+
+
+class LogBuffer:
+    """
+    Bounded, thread-safe log lines: the newest `max_lines` lines are kept,
+    older ones are appended to `spill_path` (opened on first spill). Lines
+    are counted like the view counts blocks, so a multi-line message takes
+    as many lines as it shows. Lines not yet shown are collected until the
+    view drains them.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES,
+                 spill_path: Optional[str | Path] = None):
+        self.max_lines = max_lines
+        self.spill_path = Path(spill_path) if spill_path else None
+        self._lines = deque()
+        # the view never shows more than max_lines, so neither is more pending
+        self._pending = deque(maxlen=max_lines)
+        self._spill_file = None
+        self._lock = threading.Lock()
+
+    def append(self, message: str):
+        """Add a (possibly multi-line) message; callable from any thread."""
+        lines = message.split("\n")
+        with self._lock:
+            self._pending.extend(lines)
+            self._lines.extend(lines)
+            while len(self._lines) > self.max_lines:
+                self._spill(self._lines.popleft())
+
+    def drain(self) -> List[str]:
+        """
+        Lines appended since the last drain. Also flushes the lines spilled
+        meanwhile, so the spill file is current after every view update.
+        """
+        with self._lock:
+            pending = list(self._pending)
+            self._pending.clear()
+            if self._spill_file is not None:
+                self._spill_file.flush()
+        return pending
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            return list(self._lines)
+
+    def clear(self):
+        """Forget retained lines, spilling them so the file has the whole history."""
+        with self._lock:
+            while self._lines:
+                self._spill(self._lines.popleft())
+            self._pending.clear()
+            if self._spill_file is not None:
+                self._spill_file.flush()
+
+    def _spill(self, line: str):
+        if self.spill_path is None:
+            return
+        if self._spill_file is None:
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self._spill_file = open(self.spill_path, "a", encoding="utf-8")
+        self._spill_file.write(line + "\n")
+
+    def close(self):
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+
+class LogView(QPlainTextEdit):
+    """
+    Read-only log display fed from a LogBuffer. Appends are batched on a
+    timer instead of repainting per message, the document keeps at most
+    `max_lines` blocks (lines), and it only follows the end while scrolled there.
+
+    Args:
+        name: Name of the spill file, <tmp_dir>/logs/<name>-<time>.log
+        parent: Optional parent widget
+    """
+
+    def __init__(self, name: str = "log", parent=None):
+        super().__init__(parent)
+        config = ConfigManager()
+        log_config = config.get_transcription_task_config().get('gui-log') or {}
+        max_lines = int(log_config.get('max-lines', DEFAULT_MAX_LINES))
+        spill_dir = Path(log_config.get('spill-dir') or
+                         Path(config.get_paths_config().get('tmp_dir', './tmp_audio_segments'))
+                         / "logs")
+        self.buffer = LogBuffer(
+            max_lines, spill_dir / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.log")
+
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)
+        self.setUndoRedoEnabled(False)
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.timer.start(int(log_config.get('flush-interval', DEFAULT_FLUSH_INTERVAL)))
+
+        # child widgets never get a closeEvent: close the spill file when
+        # the widget is deleted or, failing that, when the application quits
+        self.destroyed.connect(self.buffer.close)
+        app = QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.buffer.close)
+
+    def append(self, message: str):
+        """Queue a message for display; callable from any thread."""
+        self.buffer.append(message)
+
+    def flush(self):
+        pending = self.buffer.drain()
+        if not pending:
+            return
+        scroll_bar = self.verticalScrollBar()
+        at_end = scroll_bar.value() >= scroll_bar.maximum() - 4
+        self.appendPlainText("\n".join(pending))
+        if at_end:
+            scroll_bar.setValue(scroll_bar.maximum())
+
+    def clear(self):
+        self.buffer.clear()
+        super().clear()
@@ -5,8 +5,11 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtCore import Qt, QTimer, QEvent, QRectF
 from PyQt5.QtGui import QCursor, QPainter, QPen, QColor
 from .tab_interface import TabInterface
-from src.time_slicer.time_slicer import get_time_slices
+from src.time_slicer.time_slicer import get_time_slices, get_time_slices_by_packets
 from src.time_slicer.probe_media_file import probe_media_file
+from src.time_slicer.packet_index import get_packet_index
+from src.configuration_manager.configuration_manager import ConfigManager
+from src.telemetry.events import WARNING, log
 from .segment_bar import SegmentBar
 import os
 import sys
@@ -319,7 +322,7 @@ class TimeSlicerTab(TabInterface):
         if file_path:
             self.current_file_path = file_path
             self.drop_label.setText("File opened successfully from explorer!")
-            self.parse_file_duration_and_bitrate(file_path)
+            # update_file_info probes the file, no need to probe here as well
             self.update_file_info()
     # end click to open file #
 
@@ -356,7 +359,20 @@ class TimeSlicerTab(TabInterface):
 
     def update_segments(self):
         if self.file_duration:
-            slices = get_time_slices(self.file_duration, self.file_audio_bitrate)
+            slices = None
+            config = ConfigManager()
+            if config.get_transcription_task_config().get('vbr-aware-slicing', False):
+                # exact byte budget from the (cached) audio packet index
+                try:
+                    tmp_dir = config.get_paths_config().get('tmp_dir', './tmp_audio_segments')
+                    slices = get_time_slices_by_packets(
+                        get_packet_index(self.current_file_path, tmp_dir))
+                except Exception as e:
+                    log("Packet index unavailable, using average bitrate: %s", e,
+                        level=WARNING,
+                        file=os.path.splitext(os.path.basename(self.current_file_path))[0])
+            if slices is None:
+                slices = get_time_slices(self.file_duration, self.file_audio_bitrate)
             self.segment_bar.set_segments(slices)
         else:
             self.segment_bar.set_segments([])
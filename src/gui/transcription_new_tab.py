@@ -1,11 +1,18 @@
 from PyQt5.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel, 
-                            QPushButton, QFileDialog, QTextEdit, QProgressBar,
-                            QComboBox)
+                            QPushButton, QFileDialog, QProgressBar,
+                            QComboBox, QCheckBox)
 from PyQt5.QtCore import QTimer, QThread, pyqtSignal
+from pathlib import Path
+import threading
 from .tab_interface import TabInterface
 from .segment_bar import SegmentBar
+from .log_view import LogView
 from src.time_slicer.time_slicer import get_time_slices
 from src.transcriber_core.transcriber import WhisperTranscriber
+from src.batch_runner.job_queue import get_job_queue
+from src.telemetry.profiling import start_profiling, stop_profiling
+from src.telemetry.events import (
+    BUS, DEBUG, INFO, Log, StageStarted, Progress, Retry, Completed, Failed)
 from .flying_message import show_flying_message
 from .util.add_zero_wide_char_to_str import add_zero_wide_char_to_str
 class TranscriptionNewTab(TabInterface):
@@ -17,7 +24,6 @@ class TranscriptionNewTab(TabInterface):
         self.file_path = None
         self.duration = None
         self.slices = None
-        self.log_queue = []
 
     def _load_config(self):
         try:
@@ -91,8 +97,7 @@ class TranscriptionNewTab(TabInterface):
         
         # Middle section for log
         middle_section = QVBoxLayout()
-        self.log_display = QTextEdit()
-        self.log_display.setReadOnly(True)
+        self.log_display = LogView("transcription")
         middle_section.addWidget(self.log_display)
         
         # Bottom section for buttons
@@ -110,6 +115,11 @@ class TranscriptionNewTab(TabInterface):
         self.transcribe_button = QPushButton("Transcribe")
         self.transcribe_button.clicked.connect(self.start_transcription)
         self.transcribe_button.setEnabled(False) # Disable initially
+        #   Profile checkbox | per-stage profiles into the file's result directory
+        self.profile_checkbox = QCheckBox("Profile")
+        self.profile_checkbox.setToolTip(
+            "Write cProfile and sampled-stack profiles per stage and segment "
+            "to the file's result directory")
         # Add to bottom section
         bottom_section.addWidget(model_label)
         bottom_section.addStretch()
@@ -119,6 +129,7 @@ class TranscriptionNewTab(TabInterface):
         bottom_section.addStretch()
         bottom_section.addWidget(self.provider_selector)
         bottom_section.addStretch()
+        bottom_section.addWidget(self.profile_checkbox)
         bottom_section.addWidget(self.transcribe_button)
         
         # Add all sections to main layout
@@ -180,7 +191,8 @@ class TranscriptionNewTab(TabInterface):
                 self.transcriber, 
                 self.file_path, 
                 slices,
-                segment_offsets
+                segment_offsets,
+                profile=self.profile_checkbox.isChecked()
             )
             self.transcription_thread.log_signal.connect(self.update_log)
             self.transcription_thread.finished_signal.connect(self.transcription_finished)
@@ -201,13 +213,11 @@ class TranscriptionNewTab(TabInterface):
         self.segment_bar.set_segment_status(current_statuses)
 
     def log_callback(self, message):
-        self.log_queue.append(message)
+        # safe from worker threads, the view drains its buffer on a timer
+        self.log_display.append(message)
 
     def update_log(self, message):
         self.log_display.append(message)
-        self.log_display.verticalScrollBar().setValue(
-            self.log_display.verticalScrollBar().maximum()
-        )
 
     def transcription_finished(self, success):
         if success:
@@ -218,54 +228,111 @@ class TranscriptionNewTab(TabInterface):
         self.progress_bar.hide()
 
 class TranscriptionThread(QThread):
+    """
+    Submits one file to the process-wide job queue and relays its events
+    from the event bus as Qt signals. Segments are scheduled together with
+    every other queued file against the shared per-provider limits.
+    """
     log_signal = pyqtSignal(str)
     finished_signal = pyqtSignal(bool)
     progress_signal = pyqtSignal(int)
     segment_status_signal = pyqtSignal(int, str)  # New signal for segment status updates
 
-    def __init__(self, transcriber, file_path, slices, actual_starts):
+    # debug lines (ffmpeg output, request details) stay off the Qt queue;
+    # stage starts are debug-level but drive the segment bar
+    EVENT_TYPES = (Log, Progress, Retry, Completed, Failed)
+    # share of a segment's progress bar step covered by its ffmpeg cut;
+    # the rest fills when the transcription of the segment completes
+    CUT_SHARE = 0.3
+
+    def __init__(self, transcriber, file_path, slices, actual_starts, profile=False,
+                 merge=False):
         super().__init__()
         self.transcriber = transcriber
         self.file_path = file_path
         self.slices = slices # list of (start: int?, duration: int?)
         self.actual_starts = actual_starts # list of int, len == slices
+        self.profile = profile # profile stages into <result_dir>/<stem>/profile
+        self.merge = merge # merge the segment results when all succeeded
+        self.stem = Path(file_path).stem
+        self.job_id = None
+        # updated from several queue worker threads at once
+        self._progress_lock = threading.Lock()
+        self._done = 0
+        self._cut_fractions = {}  # segment index -> fraction of its cut done
         assert len(self.slices) == len(self.actual_starts)
 
+    def _is_ours(self, event):
+        # the queue is shared; until submit() returns, match on the file
+        if self.job_id is None:
+            return event.file == self.stem
+        return event.job == self.job_id
+
+    def _on_event(self, event):
+        # runs in queue worker threads; signals are queued to the GUI thread
+        if isinstance(event, StageStarted):
+            if event.stage == "segment" and event.segment is not None:
+                self.segment_status_signal.emit(event.segment, "in_progress")
+                self.log_signal.emit(f"\nProcessing segment {event.segment+1}/{len(self.slices)}")
+        elif isinstance(event, Progress):
+            with self._progress_lock:
+                if event.segment is None:
+                    self._done = max(self._done, event.done or 0)
+                elif event.stage == "ffmpeg_cut":
+                    self._cut_fractions[event.segment] = event.fraction
+                percent = self._progress_percent()
+            self.progress_signal.emit(percent)
+        elif isinstance(event, (Completed, Failed)) and event.segment is not None:
+            failed = isinstance(event, Failed)
+            # file-level Progress may be sampled away; count here as well
+            with self._progress_lock:
+                self._cut_fractions.pop(event.segment, None)
+                self._done += 1
+            self.segment_status_signal.emit(event.segment, "error" if failed else "completed")
+            if failed:
+                self.log_signal.emit(f"Failed to transcribe segment {event.segment+1}: {event.error}")
+            stats = self.queue.stats()
+            eta = next((f["eta_seconds"] for f in stats["files"] if f["id"] == event.job), None)
+            self.log_signal.emit(
+                f"Queue: {stats['queue_depth']} segments waiting, "
+                f"{stats['in_flight']} in flight"
+                + (f", ETA for this file {eta:.0f}s" if eta is not None else ""))
+        elif isinstance(event, (Completed, Failed)):
+            self.log_signal.emit(event.message)
+        elif isinstance(event, (Log, Retry)):
+            self.log_signal.emit(event.message)
+
+    def _progress_percent(self):
+        # call with _progress_lock held
+        partial = self.CUT_SHARE * sum(self._cut_fractions.values())
+        return int(100 * (self._done + partial) / len(self.slices))
+
     def run(self):
+        self.queue = get_job_queue()
+        subscriptions = [
+            BUS.subscribe(self._on_event, self.EVENT_TYPES, min_level=INFO,
+                          predicate=self._is_ours, sample_interval=0.1),
+            BUS.subscribe(self._on_event, (StageStarted,), min_level=DEBUG,
+                          predicate=self._is_ours),
+        ]
+        if self.profile:
+            start_profiling(self.transcriber.result_dir / self.stem / "profile")
         try:
-            total_slices = len(self.slices)
-            for i, (slice_start, duration) in enumerate(self.slices):
-                self.segment_status_signal.emit(i, "in_progress")
-                self.log_signal.emit(f"\nProcessing segment {i+1}/{total_slices}")
-                actual_start = self.actual_starts[i]
-                self.log_signal.emit(f"Slice start: {slice_start}s,\
-                                      Actual start: {actual_start}s,\
-                                          Duration: {duration}s")
-                
-                result = self.transcriber.transcribe(
-                    input_file=self.file_path,
-                    display_start=slice_start,
-                    actual_start=actual_start,
-                    duration=int(duration),
-                    log_callback=self.log_signal.emit
-                )
-                
-                if result is None:
-                    self.segment_status_signal.emit(i, "error")
-                    self.log_signal.emit(f"Failed to transcribe segment {i+1}")
-                    self.finished_signal.emit(False)
-                    return
-                
-                self.segment_status_signal.emit(i, "completed")
-                progress = int(((i + 1) / total_slices) * 100)
-                self.progress_signal.emit(progress)
-
-                # TODO: apply rate control here
-                import time # delay 30 seconds before launching next transcribe request, for API throttling.
-                time.sleep(10)
-            
-            self.finished_signal.emit(True)
+            job = self.queue.submit(
+                self.file_path, self.slices,
+                self.transcriber.current_model, self.transcriber.current_provider,
+                merge=self.merge,
+                actual_starts=self.actual_starts)
+            self.job_id = job.id
+            job.wait()
+            self.finished_signal.emit(job.outcome.ok and not job.outcome.error)
         except Exception as e:
-            self.segment_status_signal.emit(i, "error")
             self.log_signal.emit(f"Error during transcription: {str(e)}")
-            self.finished_signal.emit(False)
\ No newline at end of file
+            self.finished_signal.emit(False)
+        finally:
+            for subscription in subscriptions:
+                BUS.unsubscribe(subscription)
+            if self.profile:
+                profile_dir = stop_profiling()
+                if profile_dir:
+                    self.log_signal.emit(f"Profiles written to {profile_dir}")
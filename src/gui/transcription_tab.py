@@ -1,16 +1,26 @@
-from PyQt5.QtWidgets import QVBoxLayout, QLabel, QPushButton, QTextEdit, QApplication, QHBoxLayout
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QVBoxLayout, QLabel, QPushButton, QProgressBar, QHBoxLayout
+from PyQt5.QtCore import pyqtSignal
+from pathlib import Path
 from .tab_interface import TabInterface
 from .segment_bar import SegmentBar
-from src.time_slicer.time_slicer import get_time_slices
-import subprocess
-import os
-import sys
+from .log_view import LogView
+from .transcription_new_tab import TranscriptionThread
+from .flying_message import show_flying_message
+from src.transcriber_core.transcriber import WhisperTranscriber
+from src.batch_runner.pipeline import plan_slices
 from .util.add_zero_wide_char_to_str import add_zero_wide_char_to_str
 
 class TranscriptionTab(TabInterface):
+    """
+    One-click transcription with the configured default model and provider:
+    slices the file (unless the slicer tab already did), transcribes the
+    segments concurrently on the shared job queue and merges the results.
+    """
     def __init__(self):
         super().__init__("Transcription")
+        self.transcriber = WhisperTranscriber()
+        self.file_path = None
+        self.duration = None
         self.init_ui()
 
     def init_ui(self):
@@ -22,12 +32,38 @@ class TranscriptionTab(TabInterface):
         self.segment_bar = SegmentBar(mode="transcription")
         layout.addWidget(self.segment_bar)
 
+        self.progress_bar = QProgressBar()
+        self.progress_bar.hide()  # Initially hidden
+        layout.addWidget(self.progress_bar)
+
+        bottom_section = QHBoxLayout()
+        self.model_label = QLabel()
+        bottom_section.addWidget(self.model_label)
+        bottom_section.addStretch()
         self.transcribe_button = QPushButton("Quick Transcribe")
         self.transcribe_button.clicked.connect(self.start_transcription)
         self.transcribe_button.setEnabled(False)  # Disable initially
-        layout.addWidget(self.transcribe_button)
+        bottom_section.addWidget(self.transcribe_button)
+        layout.addLayout(bottom_section)
+
+        self.log_display = LogView("quick-transcription")
+        self.log_display.hide()  # shown once a transcription starts
+        layout.addWidget(self.log_display, stretch=1)
 
         self.setLayout(layout)
+        self._update_model_label()
+
+    def _default_model_and_provider(self):
+        config = self.transcriber.config_manager
+        model = config.get_default_model()
+        return model, config.get_default_provider(model) if model else None
+
+    def _update_model_label(self):
+        model, provider = self._default_model_and_provider()
+        if model and provider:
+            self.model_label.setText(f"Model: {model} | Provider: {provider}")
+        else:
+            self.model_label.setText("Model: ---not configured---")
 
     def update_from_other_tab(self, data):
         file_path = data.get("file_path")
@@ -48,76 +84,83 @@ class TranscriptionTab(TabInterface):
             self.segment_bar.set_segments([])
 
     def start_transcription(self):
-        file_path = self.file_path
-        duration = float(self.duration)
-        
-
-        # 获取项目根目录
-        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
-
-        # Set script's path relative to project root
-        script_path = './transcribe_audio.sh'
-
-        # Choose correct shell by OS
-        if sys.platform == "win32":
-            # Try Git Bash first on Windows
-            bash_paths = [
-                r"C:\Program Files\Git\bin\bash.exe",
-                r"C:\Program Files (x86)\Git\bin\bash.exe",
-                # more paths optionally...
-            ]
-            for bash_path in bash_paths:
-                if os.path.exists(bash_path):
-                    shell = [bash_path, "-c"]
-                    break
-            # Use cmd if no Git Bash
-            else:
-                shell = ["cmd", "/c"]
-        # Use bash on non-Windows systems
+        if not self.file_path:
+            show_flying_message(self, "No file selected")
+            return
+        model, provider = self._default_model_and_provider()
+        if not model or not provider or \
+                not self.transcriber.set_model_and_provider(model, provider):
+            show_flying_message(self, "No model or provider configured")
+            return
+
+        self.transcribe_button.setEnabled(False)
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.log_display.clear()
+        self.log_display.show()
+
+        slices = self.segment_bar.segments or None
+        actual_starts = None
+        if slices:
+            # start offsets the user may have moved in the segment bar
+            actual_starts = list(self.segment_bar.segment_start_offsets)
+            assert len(slices) == len(actual_starts)
+            self.segment_bar.set_segment_status({i: "pending" for i in range(len(slices))})
+        self.transcription_thread = QuickTranscriptionThread(
+            self.transcriber, self.file_path, slices, actual_starts)
+        self.transcription_thread.slices_signal.connect(self.update_slices)
+        self.transcription_thread.log_signal.connect(self.log_display.append)
+        self.transcription_thread.finished_signal.connect(self.transcription_finished)
+        self.transcription_thread.progress_signal.connect(self.progress_bar.setValue)
+        self.transcription_thread.segment_status_signal.connect(self.update_segment_status)
+        self.transcription_thread.start()
+
+    def update_slices(self, slices):
+        self.segment_bar.set_segments(slices)
+        self.segment_bar.set_segment_status({i: "pending" for i in range(len(slices))})
+
+    def update_segment_status(self, segment_index, status):
+        """Update the status of a specific segment in the segment bar"""
+        current_statuses = self.segment_bar.segment_status.copy()
+        current_statuses[segment_index] = status
+        self.segment_bar.set_segment_status(current_statuses)
+
+    def transcription_finished(self, success):
+        if success:
+            self.log_display.append("Transcription completed successfully")
         else:
-            shell = ["bash", "-c"]
-
-        # 构建完整的命令
-        command = f"{script_path} -i \"{file_path}\" -s 0 -t {int(duration)} "
-        full_command = shell + [command]
-
-        try:
-            self.transcribe_button.setEnabled(False)
-            print("Executing command:", " ".join(full_command))
-            process = subprocess.Popen(
-                full_command, 
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True, 
-                encoding='utf-8', 
-                cwd=project_root,
-                bufsize=1,
-                universal_newlines=True
-            )
-            
-            # Clear previous log display if it exists
-            if hasattr(self, 'log_display'):
-                self.layout().removeWidget(self.log_display)
-                self.log_display.deleteLater()
-                self.log_display = None
-
-            # Create a QTextEdit widget to display the log
-            self.log_display = QTextEdit()
-            self.log_display.setReadOnly(True)
-            self.layout().addWidget(self.log_display)
-
-            # Read and display output in real-time
-            for line in process.stdout:
-                self.log_display.append(line.strip())
-                QApplication.processEvents()  # Ensure GUI updates
-
-            return_code = process.wait()
-
-            if return_code == 0:
-                self.log_display.append("Transcription completed successfully A")
-            else:
-                self.log_display.append(f"Error during transcription. Return code: {return_code}")
-        except Exception as e:
-            self.log_display.append(f"Error executing transcription command: {e}")
-        finally:
-            self.transcribe_button.setEnabled(True)
\ No newline at end of file
+            self.log_display.append("Transcription failed")
+        self.transcribe_button.setEnabled(True)
+        self.progress_bar.hide()
+
+
+class QuickTranscriptionThread(TranscriptionThread):
+    """
+    TranscriptionThread that slices the file itself when no slices are
+    given (probing can take a while, so not on the GUI thread) and merges
+    the segment results.
+    """
+    slices_signal = pyqtSignal(list)
+
+    def __init__(self, transcriber, file_path, slices=None, actual_starts=None):
+        slices = slices or []
+        if actual_starts is None:
+            actual_starts = [start for start, _ in slices]
+        super().__init__(transcriber, file_path, slices, actual_starts, merge=True)
+
+    def run(self):
+        if not self.slices:
+            try:
+                vbr_aware = self.transcriber.config_manager.get_transcription_task_config()\
+                    .get('vbr-aware-slicing', False)
+                _, slices = plan_slices(Path(self.file_path), vbr_aware,
+                                        self.transcriber.tmp_dir)
+            except Exception as e:
+                self.log_signal.emit(f"Could not slice {self.file_path}: {e}")
+                self.finished_signal.emit(False)
+                return
+            self.slices = slices
+            self.actual_starts = [start for start, _ in slices]
+            self.slices_signal.emit(slices)
+            self.log_signal.emit(f"Sliced into {len(slices)} segments")
+        super().run()
@@ -0,0 +1,5 @@
+from .merge_json import (
+    merge_segments, merge_jsons, DirectorySource, JsonFileSink, MemorySink,
+    MergeInputError,
+)
+from .word_store import WordStore, FLAG_PUNCTUATION
@@ -3,12 +3,32 @@
 import json
 import sys
 import os
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Iterable, Optional, Callable, Any
 import difflib
 from collections import OrderedDict
 import re
 import time
-from merge_json_algo import *
+import numpy as np
+try:
+    from .merge_json_algo import *
+    from .merge_json_algo import _silent
+except ImportError:  # executed as a script from this directory
+    from merge_json_algo import *
+    from merge_json_algo import _silent
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+from src.result_codec.json_codec import (
+    ResultCodec, load_result)
+from src.telemetry.metrics import MERGES_TOTAL, MERGE_SECONDS
+from src.telemetry.profiling import profile_stage
+
+DEFAULT_RESULT_DIR = "./transcription_result"
+
+# (segment start in seconds, segment duration in seconds, verbose_json dict)
+SegmentResult = Tuple[float, float, Dict[str, Any]]
+
+class MergeInputError(ValueError):
+    """Raised when a segment result cannot be loaded or is malformed."""
+    pass
 
 class OrderedEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -16,22 +36,44 @@ class OrderedEncoder(json.JSONEncoder):
             return {k: self.default(v) for k, v in obj.items()}
         return super().default(obj)
 
-def load_json(file_path: str) -> Dict:
-    """Load JSON file."""
-    print(f"loading file {file_path}")
+def make_logger(quiet: bool = False,
+                log_callback: Optional[Callable[[str], None]] = None):
+    """
+    Build the print-like logger used by the merger and its algorithms.
+
+    Args:
+        quiet: Drop every debug message, for in-process use in hot loops.
+        log_callback: Optional callback receiving each formatted message,
+            same convention as `WhisperTranscriber.transcribe`.
+    """
+    if quiet:
+        return _silent
+    if log_callback:
+        return lambda *args, **kwargs: log_callback(" ".join(str(a) for a in args))
+    return print
+
+def load_json(file_path: str, log=print) -> Dict:
+    """
+    Load a JSON result file (plain, .gz or .zst), raising MergeInputError
+    on missing or invalid files.
+    """
+    log(f"loading file {file_path}")
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return load_result(file_path)
     except FileNotFoundError:
-        print(f"Error: File {file_path} not found.", file=sys.stderr)
-        sys.exit(1)
-    except json.JSONDecodeError:
-        print(f"Error: Invalid JSON in file {file_path}.", file=sys.stderr)
-        sys.exit(1)
+        raise MergeInputError(f"File {file_path} not found.")
+    except ValueError as e:  # invalid JSON, truncated or corrupt .gz/.zst
+        raise MergeInputError(f"Unreadable result file {file_path}: {e}")
+
+SEGMENT_FILENAME_PATTERN = re.compile(r'_ss(\d+)-t(\d+)\.json(\.gz|\.zst)?$')
+
+def is_segment_result_file(filename: str) -> bool:
+    """True for `*_ss{start}-t{duration}.json[.gz|.zst]` segment results."""
+    return SEGMENT_FILENAME_PATTERN.search(filename) is not None
 
 def parse_filename(filename: str) -> tuple:
     """Parse filename to extract start time and duration."""
-    match = re.search(r'_ss(\d+)-t(\d+)\.json$', filename)
+    match = SEGMENT_FILENAME_PATTERN.search(filename)
     if match:
         return int(match.group(1)), int(match.group(2)) # start at, duration
     raise ValueError(f"Invalid filename format: {filename}")
@@ -45,13 +87,15 @@ def round_timestamp(timestamp: float) -> float:
     """Round timestamp to 0.01 second precision."""
     return round(timestamp, 2)
 
-def initialize_json_file_names_and_transcript_segments(folder_name: str) -> Tuple[
+def initialize_json_file_names_and_transcript_segments(
+    folder_name: str, result_dir: str = DEFAULT_RESULT_DIR, log=print) -> Tuple[
     List[str], List[Tuple[float, float]]]:
     """
     Initialize JSON file names and transcript segment times for a given title prefix.
 
     Args:
     folder_name (str): Title prefix to filter JSON files.
+    result_dir (str): Directory holding one sub-folder per title.
 
     Returns:
     Tuple[List[str], List[Tuple[float, float]]]: 
@@ -59,23 +103,65 @@ def initialize_json_file_names_and_transcript_segments(folder_name: str) -> Tupl
         - List of transcript segment times (start, end).
 
     Note:
-    Assumes 'extract_sort_key', 'load_json', and 'parse_filename' functions exist.
-    JSON files are expected in '<project-root>/transcription_result/'.
+    JSON files are expected in '<result_dir>/<folder_name>/'.
     """
-    base_path = f"./transcription_result/{folder_name}"
+    base_path = os.path.join(result_dir, folder_name)
+    # Groq's extra "*_segments.json" copies and merged files are skipped
     json_files = [f for f in os.listdir(base_path) 
-                  if f.startswith(folder_name) and f.endswith('.json')]
+                  if f.startswith(folder_name) and is_segment_result_file(f)]
     json_files.sort(key=extract_sort_key)
     transcript_segments = [] # [(0, 35.00), (30.00, 65.00), ...]
     for file in json_files:
-        data = load_json(os.path.join(base_path, file))
         segment_start_time, duration = parse_filename(file)
         transcript_segments.append((segment_start_time, segment_start_time+duration))
     # Debug: Print return result
-    print("Debug: JSON files:", json_files)
-    print("Debug: Transcript segments:", transcript_segments)
+    log("Debug: JSON files:", json_files)
+    log("Debug: Transcript segments:", transcript_segments)
     return json_files, transcript_segments
 
+class DirectorySource:
+    """
+    Source of segment results stored as `<result_dir>/<title>/*_ss{start}-t{duration}.json`,
+    the layout written by `WhisperTranscriber`.
+
+    Iterating yields `(start, duration, verbose_json)` tuples sorted by start.
+    """
+    def __init__(self, full_title: str, result_dir: str = DEFAULT_RESULT_DIR, log=print):
+        self.full_title = full_title
+        self.result_dir = result_dir
+        self.log = log
+
+    def __iter__(self):
+        json_files, _ = initialize_json_file_names_and_transcript_segments(
+            self.full_title, self.result_dir, self.log)
+        for file in json_files:
+            segment_start_time, duration = parse_filename(file)
+            data = load_json(
+                os.path.join(self.result_dir, self.full_title, file), self.log)
+            data.setdefault("_source_name", file)
+            yield segment_start_time, duration, data
+
+class JsonFileSink:
+    """
+    Sink writing the merged result to a JSON file; with a compressing
+    codec the codec's suffix is appended to `file_path`.
+    """
+    def __init__(self, file_path: str, codec: Optional[ResultCodec] = None):
+        self.file_path = file_path
+        self.codec = codec
+
+    def write(self, merged_data: Dict) -> str:
+        return save_json(merged_data, self.file_path, self.codec)
+
+class MemorySink:
+    """Sink keeping the merged result in memory, as `self.result`."""
+    def __init__(self):
+        self.result = None
+
+    def write(self, merged_data: Dict) -> Dict:
+        self.result = merged_data
+        return merged_data
+
 def get_overlap_intervals(transcript_segments):
     """
     Pad a list of overlap intervals for transcript segments.
@@ -100,32 +186,37 @@ def get_segment_times(segments, idx):
     start_time, end_time = segments[idx][0], segments[idx][1]
     return start_time, end_time, start_time - end_time
 
-def calculate_midpoints(overlaps, idx):
+def calculate_midpoints(overlaps, idx, log=print):
     """
     Every segment overlaps with previous and next one(s), so there are 2
     overlappings and there should be 2 midpoints, named left and right.
     """
-    print(f"Debug: overlaps={overlaps}, idx={idx}")
+    log(f"Debug: overlaps={overlaps}, idx={idx}")
     left = (overlaps[idx][1] + overlaps[idx][0]) / 2
     right = (overlaps[idx+1][1] + overlaps[idx+1][0]) / 2
-    print(f"{left}, {right}")
+    log(f"{left}, {right}")
     return left, right
 
-def test_and_remove_non_subsequential_words(data, file):
-    probe_subsequence = is_subsequence(data["words"], data["text"])
-    print_test_result(file, probe_subsequence)
+def test_and_remove_non_subsequential_words(data, file, log=print):
+    """
+    Drop words that do not join up to a subsequence of data["text"].
+    Returns a shallow copy when words are removed; the input is not modified.
+    """
+    probe_subsequence = is_subsequence(data["words"], data["text"], log)
+    print_test_result(file, probe_subsequence, log)
     # preprocess clip segment
     if not probe_subsequence:
-        print("  entering redundant word deletion procedure")
+        log("  entering redundant word deletion procedure")
         remove_indices = locate_non_subsequence_elements(
-            data["words"], data["text"])
-        print("removed_unsebsequential_indices:", 
+            data["words"], data["text"], log)
+        log("removed_unsebsequential_indices:", 
             [data["words"][iw] for iw in sorted(list(remove_indices))])
+        data = dict(data)
         data["words"] = [
             word for i, word in enumerate(data["words"])
             if i not in remove_indices]
-        probe_subsequence_re = is_subsequence(data["words"], data["text"])
-        print_test_result(file, probe_subsequence_re)
+        probe_subsequence_re = is_subsequence(data["words"], data["text"], log)
+        print_test_result(file, probe_subsequence_re, log)
     return data
 
 def merge_words(
@@ -146,88 +237,163 @@ def merge_words(
     """
     punctuated_text = data["text"]
     idx_punc = 0  # points to offset in punctuated_text
-
-    for idx_word, word in enumerate(data["words"], start=0):
-        word_global_timestamp = word["start"] + segment_start_time
-        
-        if midpoint_left < word_global_timestamp < midpoint_right:
-            merged_data["words"].append((round_timestamp(word_global_timestamp), word["word"]))
-        
-        try:
-            stop_char = data["words"][idx_word+1]["word"][0]
-            idx_punc += len(word["word"])
-            
-            while punctuated_text[idx_punc] != stop_char:
-                punc_timestamp = round_timestamp(word_global_timestamp + 0.01)
-                if midpoint_left < punc_timestamp < midpoint_right:
-                    merged_data["words"].append((punc_timestamp,
-                        punctuated_text[idx_punc], "punctuation"))
-                idx_punc += 1
-        except IndexError:
-            pass
+    words = data["words"]
+    if not words:
+        return
+
+    # Column-wise window test instead of one comparison per word dict.
+    global_starts = np.fromiter(
+        (w["start"] for w in words), dtype=np.float64, count=len(words)
+    ) + segment_start_time
+    inside = (global_starts > midpoint_left) & (global_starts < midpoint_right)
+    global_starts = global_starts.tolist()
+    inside = inside.tolist()
+    merged_words = merged_data["words"]
+
+    for idx_word in range(len(words) - 1):
+        word_global_timestamp = global_starts[idx_word]
+        if inside[idx_word]:
+            merged_words.append((round_timestamp(word_global_timestamp), words[idx_word]["word"]))
+
+        next_word = words[idx_word+1]["word"]
+        if not next_word:
+            continue
+        idx_punc += len(words[idx_word]["word"])
+        # Everything between this word and the next word's first char is
+        # punctuation; str.find replaces the char-by-char walk. If the next
+        # word is not found, the remaining text is consumed, as before.
+        idx_next = punctuated_text.find(next_word[0], idx_punc)
+        if idx_next == -1:
+            idx_next = max(len(punctuated_text), idx_punc)
+        if idx_next > idx_punc:
+            punc_timestamp = round_timestamp(word_global_timestamp + 0.01)
+            if midpoint_left < punc_timestamp < midpoint_right:
+                merged_words.extend(
+                    (punc_timestamp, char, "punctuation")
+                    for char in punctuated_text[idx_punc:idx_next])
+        idx_punc = idx_next
+
+    if inside[-1]:
+        merged_words.append((round_timestamp(global_starts[-1]), words[-1]["word"]))
 
     return
 
-def merge_jsons(full_title: str, method: str = "midpoint") -> Dict:
-    """Merge JSON files for the given title."""
-    json_files, transcript_segments = initialize_json_file_names_and_transcript_segments(full_title)
+def merge_segments(results: Iterable[SegmentResult],
+                   method: str = "midpoint",
+                   sink=None,
+                   quiet: bool = True,
+                   log_callback: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Merge overlapping segment transcriptions into one transcript, in memory.
+
+    Args:
+        results: Iterable of (start, duration, verbose_json) tuples, e.g. a
+            list built by the caller or a `DirectorySource`. Order does not
+            matter, segments are sorted by start. Inputs are not modified.
+        method: Merge strategy, only "midpoint" is implemented.
+        sink: Optional object with a `write(merged)` method, such as
+            `JsonFileSink` or `MemorySink`.
+        quiet: Suppress debug output (default for library use).
+        log_callback: Optional callback for debug output when not quiet.
+
+    Returns:
+        OrderedDict: {"duration", "text", "words"}, words being
+        (timestamp, word[, "punctuation"]) tuples.
+
+    Raises:
+        MergeInputError: If no segment is given or a result lacks required keys.
+    """
+    started = time.perf_counter()
+    try:
+        with profile_stage("merge"):
+            merged_data = _merge_segments(results, method, sink, quiet, log_callback)
+    except Exception:
+        MERGES_TOTAL.labels(outcome="error").inc()
+        raise
+    MERGES_TOTAL.labels(outcome="ok").inc()
+    MERGE_SECONDS.observe(time.perf_counter() - started)
+    return merged_data
+
+def _merge_segments(results, method, sink, quiet, log_callback) -> Dict:
+    """merge_segments() without the metrics."""
+    if method != "midpoint":
+        raise ValueError(f"Unsupported merge method: {method}")
+    log = make_logger(quiet, log_callback)
+
+    results = sorted(results, key=lambda r: r[0])
+    if not results:
+        raise MergeInputError("No segment results to merge.")
+    transcript_segments = [(start, start + duration) for start, duration, _ in results]
     # overlaps:[(0,0), (30,35), (60,65), ..., (90,90)]
     overlaps = get_overlap_intervals(transcript_segments)
     merged_data = OrderedDict([("duration", 0), ("text", ""), ("words", [])])
 
-    for idx_file, file in enumerate(json_files, start=0):
-        # load data
-        data = load_json(os.path.join('./transcription_result', full_title, file))
-        # process clip segment times
-        segment_start_time, segment_end_time, duration = get_segment_times(
-            transcript_segments, idx_file)
-        midpoint_left, midpoint_right = calculate_midpoints(overlaps, idx_file)
+    for idx_file, (segment_start_time, _, data) in enumerate(results, start=0):
+        name = data.get("_source_name", f"segment_{idx_file}")
+        missing = [k for k in ("text", "words", "duration") if k not in data]
+        if missing:
+            raise MergeInputError(f"{name} lacks required keys: {missing}")
+        midpoint_left, midpoint_right = calculate_midpoints(overlaps, idx_file, log)
 
         # preprocess: validate whisper token words add up to subsequence of
         # whisper text, then remove non subsequence chars from data["words"]
-        data = test_and_remove_non_subsequential_words(data, file)
-
-        # prepare punctuated text
-        punctuated_text = data["text"]
-        idx_punc = 0 # points to offset in punctuated_text
+        with profile_stage("merge_cleanup"):
+            data = test_and_remove_non_subsequential_words(data, name, log)
 
         # Merge words
-        merge_words(data, segment_start_time, midpoint_left, midpoint_right, merged_data)
-        print("\r\n\r\n")
+        with profile_stage("merge_words"):
+            merge_words(data, segment_start_time, midpoint_left, midpoint_right, merged_data)
+        log("\r\n\r\n")
 
         # Update duration
         merged_data["duration"] = round_timestamp(max(merged_data["duration"], segment_start_time + data["duration"]))
 
     merged_data["text"] = "".join([w[1] for w in merged_data["words"]])
+    if sink is not None:
+        sink.write(merged_data)
     return merged_data
 
-def save_json(data: Dict, file_path: str):
-    """Save data as JSON file."""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, cls=OrderedEncoder)
+def merge_jsons(full_title: str, method: str = "midpoint",
+                result_dir: str = DEFAULT_RESULT_DIR, quiet: bool = False) -> Dict:
+    """Merge JSON files for the given title."""
+    log = make_logger(quiet)
+    return merge_segments(
+        DirectorySource(full_title, result_dir, log), method=method, quiet=quiet)
+
+def save_json(data: Dict, file_path: str, codec: Optional[ResultCodec] = None) -> str:
+    """Save data as JSON file (compact unless the codec says otherwise)."""
+    codec = codec or ResultCodec()
+    return str(codec.dump(data, file_path))
 
-def get_full_title_from_transcript_cuts(prefix: str) -> str:
+def get_full_title_from_transcript_cuts(prefix: str,
+                                        result_dir: str = DEFAULT_RESULT_DIR) -> str:
     """
     Get the full folder name based on an arbitrary prefix.
 
     Args:
     prefix (str): Arbitrary prefix to match against folder names.
+    result_dir (str): Directory holding one sub-folder per title.
 
     Returns:
-    str: Full folder name if found, empty string otherwise.
+    str: Full folder name if found.
+
+    Raises:
+    FileNotFoundError: If no folder matches the prefix.
     """
-    base_path = "./transcription_result"
-    for folder in os.listdir(base_path):
-        if os.path.isdir(os.path.join(base_path, folder)) and folder.startswith(prefix):
+    for folder in os.listdir(result_dir):
+        if os.path.isdir(os.path.join(result_dir, folder)) and folder.startswith(prefix):
             return folder
-    raise FileNotFoundError
+    raise FileNotFoundError(f"No result folder starting with '{prefix}' in {result_dir}")
 
-def main(title_prefix: str):
+def merged_output_path(full_title: str, result_dir: str = DEFAULT_RESULT_DIR) -> str:
+    """Path of the merged transcript for a title."""
+    return os.path.join(result_dir, full_title, f"merged_{full_title}.json")
+
+def main(title_prefix: str, result_dir: str = DEFAULT_RESULT_DIR):
     """Main function to merge JSON files."""
-    full_title = get_full_title_from_transcript_cuts(title_prefix)
-    merged_data = merge_jsons(full_title)
-    output_file = f"./transcription_result/{full_title}/merged_{full_title}.json"
-    save_json(merged_data, output_file)
+    full_title = get_full_title_from_transcript_cuts(title_prefix, result_dir)
+    merged_data = merge_segments(DirectorySource(full_title, result_dir), quiet=False)
+    output_file = JsonFileSink(merged_output_path(full_title, result_dir)).write(merged_data)
     print(f"Merged JSON saved to:")
     print(f"{output_file}")
 
@@ -235,4 +401,8 @@ if __name__ == "__main__":
     if len(sys.argv) != 2:
         print("Usage: python3 merge_json.py <title prefix>", file=sys.stderr)
         sys.exit(1)
-    main(sys.argv[1])
\ No newline at end of file
+    try:
+        main(sys.argv[1])
+    except (MergeInputError, FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
\ No newline at end of file
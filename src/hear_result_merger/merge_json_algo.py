@@ -18,9 +18,11 @@ def find_overlapping_intervals(intervals):
     return overlapping
 
 
-    from typing import List, Tuple
+def _silent(*args, **kwargs):
+    """Drop-in replacement for `print` used when the merger runs quietly."""
+    pass
 
-def is_subsequence(A2: list, B: str):
+def is_subsequence(A2: list, B: str, log=print):
     # Test if A2 (token-precise words) join up to the subsequence of B (full text of a segment returned by transcribe API like whisper)
     # A2: list of dict item: {"word", "start", "end"}
     A = "".join([w["word"] for w in A2])
@@ -29,19 +31,19 @@ def is_subsequence(A2: list, B: str):
         if A[i] == B[j]:
             i += 1
         j += 1
-    print("i:", i)
+    log("i:", i)
     return i == len(A)
 
 GREEN = "\033[32m"
 RED = "\033[31m"
 RESET = "\033[0m"
 
-def print_test_result(file, probe_subsequence):
+def print_test_result(file, probe_subsequence, log=print):
     color = GREEN if probe_subsequence else RED
     result = "passed" if probe_subsequence else "failed"
-    print(f"{file} {color}{result}{RESET} the subsequence test")
+    log(f"{file} {color}{result}{RESET} the subsequence test")
 
-def locate_non_subsequence_elements(A_raw: list, B: str):
+def locate_non_subsequence_elements(A_raw: list, B: str, log=print):
     """
     Identifies elements in A_raw that need to be removed to form a subsequence
     of B.
@@ -51,6 +53,7 @@ def locate_non_subsequence_elements(A_raw: list, B: str):
         'word' (str), 'start' (str(float)), and 'end' (str(float)).
         Each 'word' has a length of 1 or more.
     B (str): The target string to form a subsequence of.
+    log (callable): print-like sink for debug output.
 
     Returns:
     set: Indices in A_raw of elements to be removed.
@@ -98,6 +101,6 @@ def locate_non_subsequence_elements(A_raw: list, B: str):
     # Map flattened indices back to A_raw indices
     to_delete_in_A_raw = set(mapping[i] for i in to_delete_indices)
 
-    print("delete: ", [A[i] for i in to_delete_indices])
+    log("delete: ", [A[i] for i in to_delete_indices])
     
     return to_delete_in_A_raw
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""
+Compact columnar storage for word-level transcription results.
+
+A `verbose_json` result keeps one dict per word, and the merger keeps one
+tuple per word or punctuation mark. For hour-long transcripts that is a lot
+of small Python objects. `WordStore` keeps the same information as parallel
+arrays instead:
+
+    starts  float64[n]   word start, seconds
+    ends    float64[n]   word end, seconds
+    offsets int64[n+1]   word i is text[offsets[i]:offsets[i+1]] (UTF-8 bytes)
+    flags   uint8[n]     FLAG_PUNCTUATION marks merger punctuation entries
+    text    uint8[...]   all words concatenated, UTF-8
+
+Everything that is not a word (text, language, duration, segments, ...) is
+kept as a small JSON `meta` dict, so `from_verbose_json`/`to_verbose_json`
+round-trip. Timestamps are float64, the type `json` parses them to, so they
+come back exactly; float32 would shift hour-long offsets by up to ~0.1 ms.
+
+On-disk format (little endian), readable through a memory map:
+
+    header  "<4sHHqqq": magic b"WST1", version, reserved, n, text_len, meta_len
+    meta    meta_len bytes of UTF-8 JSON, zero padded to 8 bytes
+    starts, ends, offsets, flags, text   (each block zero padded to 8 bytes)
+"""
+
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Any
+
+import numpy as np
+
+FLAG_PUNCTUATION = 1
+
+_MAGIC = b"WST1"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHqqq")
+
+
+def _pad8(size: int) -> int:
+    return (8 - size % 8) % 8
+
+
+class WordStore:
+    """Parallel-array word table, see module docstring for the layout."""
+
+    def __init__(self,
+                 starts: np.ndarray,
+                 ends: np.ndarray,
+                 offsets: np.ndarray,
+                 text: np.ndarray,
+                 flags: Optional[np.ndarray] = None,
+                 meta: Optional[Dict[str, Any]] = None):
+        self.starts = np.asarray(starts, dtype=np.float64)
+        self.ends = np.asarray(ends, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.text = np.asarray(text, dtype=np.uint8)
+        self.flags = (np.zeros(len(self.starts), dtype=np.uint8)
+                      if flags is None else np.asarray(flags, dtype=np.uint8))
+        self.meta = meta if meta is not None else {}
+        if not (len(self.starts) == len(self.ends) == len(self.flags)
+                == len(self.offsets) - 1):
+            raise ValueError("WordStore columns have inconsistent lengths")
+
+    # ---- construction ----
+
+    @classmethod
+    def from_words(cls,
+                   words: Iterable[str],
+                   starts: Iterable[float],
+                   ends: Iterable[float],
+                   flags: Optional[Iterable[int]] = None,
+                   meta: Optional[Dict[str, Any]] = None) -> "WordStore":
+        encoded = [w.encode("utf-8") for w in words]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        if encoded:
+            np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        text = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(np.fromiter(starts, dtype=np.float64, count=len(encoded)),
+                   np.fromiter(ends, dtype=np.float64, count=len(encoded)),
+                   offsets, text,
+                   None if flags is None else np.fromiter(flags, dtype=np.uint8),
+                   meta)
+
+    @classmethod
+    def from_verbose_json(cls, result: Dict[str, Any]) -> "WordStore":
+        """Build a store from a Whisper `verbose_json` dict with word timestamps."""
+        words = result.get("words", [])
+        meta = {k: v for k, v in result.items() if k != "words"}
+        return cls.from_words((w["word"] for w in words),
+                              (w["start"] for w in words),
+                              (w["end"] for w in words),
+                              meta=meta)
+
+    @classmethod
+    def from_merged_words(cls, merged_words: List[Tuple],
+                          meta: Optional[Dict[str, Any]] = None) -> "WordStore":
+        """
+        Build a store from the merger's `(timestamp, word[, "punctuation"])`
+        tuples. Merged entries carry a single timestamp, used as start and end.
+        """
+        return cls.from_words((w[1] for w in merged_words),
+                              (w[0] for w in merged_words),
+                              (w[0] for w in merged_words),
+                              (FLAG_PUNCTUATION if len(w) > 2 else 0
+                               for w in merged_words),
+                              meta)
+
+    @classmethod
+    def concat(cls, stores: List["WordStore"],
+               meta: Optional[Dict[str, Any]] = None) -> "WordStore":
+        """Concatenate stores in order."""
+        if not stores:
+            return cls.from_words([], [], [], meta=meta)
+        text_bases = np.cumsum(
+            [0] + [s.offsets[-1] - s.offsets[0] for s in stores[:-1]])
+        offsets = np.concatenate(
+            [np.zeros(1, dtype=np.int64)] +
+            [s.offsets[1:] - s.offsets[0] + base
+             for s, base in zip(stores, text_bases)])
+        return cls(np.concatenate([s.starts for s in stores]),
+                   np.concatenate([s.ends for s in stores]),
+                   offsets,
+                   np.concatenate([s.text[s.offsets[0]:s.offsets[-1]] for s in stores]),
+                   np.concatenate([s.flags for s in stores]),
+                   meta)
+
+    # ---- access ----
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def word(self, i: int) -> str:
+        return self.text[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def iter_words(self) -> Iterator[str]:
+        buf = self.text.tobytes()
+        offs = self.offsets.tolist()
+        for a, b in zip(offs, offs[1:]):
+            yield buf[a:b].decode("utf-8")
+
+    def to_verbose_json(self) -> Dict[str, Any]:
+        """Inverse of `from_verbose_json`."""
+        result = dict(self.meta)
+        result["words"] = [
+            {"word": w, "start": s, "end": e}
+            for w, s, e in zip(self.iter_words(),
+                               self.starts.tolist(), self.ends.tolist())]
+        return result
+
+    def to_merged_words(self) -> List[Tuple]:
+        """Inverse of `from_merged_words`, timestamps rounded to 0.01s."""
+        return [(round(s, 2), w, "punctuation") if f & FLAG_PUNCTUATION
+                else (round(s, 2), w)
+                for w, s, f in zip(self.iter_words(),
+                                   self.starts.tolist(), self.flags.tolist())]
+
+    # ---- vectorized operations ----
+
+    def shifted(self, offset: float) -> "WordStore":
+        """Copy with `offset` seconds added to every timestamp; text is shared."""
+        return WordStore(self.starts + offset,
+                         self.ends + offset,
+                         self.offsets, self.text, self.flags, dict(self.meta))
+
+    def take(self, mask_or_indices) -> "WordStore":
+        """Select words by boolean mask or index array, keeping order."""
+        idx = np.asarray(mask_or_indices)
+        if idx.dtype == bool:
+            idx = np.flatnonzero(idx)
+        lengths = self.offsets[idx + 1] - self.offsets[idx]
+        offsets = np.zeros(len(idx) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if len(idx):
+            # gather byte ranges: repeat each word start, add intra-word position
+            starts_rep = np.repeat(self.offsets[idx], lengths)
+            intra = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+            text = self.text[starts_rep + intra]
+        else:
+            text = np.zeros(0, dtype=np.uint8)
+        return WordStore(self.starts[idx], self.ends[idx], offsets, text,
+                         self.flags[idx], dict(self.meta))
+
+    def between(self, left: float, right: float) -> "WordStore":
+        """Words whose start lies strictly inside (left, right), as in the merger."""
+        return self.take((self.starts > left) & (self.starts < right))
+
+    # ---- persistence ----
+
+    def save(self, path) -> Path:
+        path = Path(path)
+        meta = json.dumps(self.meta, ensure_ascii=False).encode("utf-8")
+        n, text_len = len(self), len(self.text)
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, 0, n, text_len, len(meta)))
+            for block in (meta,
+                          self.starts.astype("<f8").tobytes(),
+                          self.ends.astype("<f8").tobytes(),
+                          (self.offsets - self.offsets[0]).astype("<i8").tobytes(),
+                          self.flags.tobytes(),
+                          self.text[self.offsets[0]:self.offsets[-1]].tobytes()):
+                f.write(block)
+                f.write(b"\0" * _pad8(len(block)))
+        return path
+
+    @classmethod
+    def load(cls, path, use_mmap: bool = True) -> "WordStore":
+        """
+        Load a store written by `save`. With `use_mmap` the columns are
+        read-only views into a memory map, so opening is O(1) in file size.
+        """
+        with open(path, "rb") as f:
+            if use_mmap:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                buf = f.read()
+        magic, version, _, n, text_len, meta_len = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a WordStore v{_VERSION} file")
+        pos = _HEADER.size
+        meta = json.loads(bytes(buf[pos:pos + meta_len]).decode("utf-8"))
+        pos += meta_len + _pad8(meta_len)
+
+        def column(dtype, count):
+            nonlocal pos
+            arr = np.frombuffer(buf, dtype=dtype, count=count, offset=pos)
+            size = arr.nbytes
+            pos += size + _pad8(size)
+            return arr
+
+        starts = column("<f8", n)
+        ends = column("<f8", n)
+        offsets = column("<i8", n + 1)
+        flags = column(np.uint8, n)
+        text = column(np.uint8, text_len)
+        return cls(starts, ends, offsets, text, flags, meta)
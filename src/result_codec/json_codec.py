@@ -0,0 +1,175 @@
+"""
+JSON codec shared by `transcriber_core` (segment results) and
+`hear_result_merger` (merged results).
+
+- Uses orjson when installed, the stdlib json module otherwise.
+- Writes compact JSON by default; `pretty=True` keeps the old indent=2 layout.
+- Optionally compresses at rest (gzip, or zstd when `zstandard` is
+  installed). Reads detect compression from the file's magic bytes, so
+  callers never need to know how a file was written.
+"""
+
+import gzip
+import json
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Optional, Dict
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional, only needed for zstd compression
+    zstandard = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+# matches "<name>.json", "<name>.json.gz" and "<name>.json.zst"
+RESULT_FILE_PATTERN = re.compile(r"\.json(\.gz|\.zst)?$")
+
+
+def dumps(data: Any, pretty: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, non-ASCII characters kept as-is."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            pass  # e.g. non-str keys, let the stdlib handle or report it
+    if pretty:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+def loads(raw: bytes) -> Any:
+    """Parse JSON bytes, decompressing gzip/zstd payloads transparently."""
+    raw = _decompress(raw)
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def _decompress(raw: bytes) -> bytes:
+    """Decompress gzip/zstd payloads; truncated or corrupt ones raise ValueError."""
+    if raw[:2] == GZIP_MAGIC:
+        try:
+            return gzip.decompress(raw)
+        except (OSError, EOFError, zlib.error) as e:  # BadGzipFile is an OSError
+            raise ValueError(f"corrupt gzip data: {e}") from e
+    if raw[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("zstd data, but the zstandard package is not installed")
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        try:
+            data = decompressor.decompress(raw)
+        except zstandard.ZstdError as e:
+            raise ValueError(f"corrupt zstd data: {e}") from e
+        # a truncated frame decompresses without error, just incompletely
+        if not getattr(decompressor, "eof", True):
+            raise ValueError("truncated zstd data")
+        return data
+    return raw
+
+
+def _compress(raw: bytes, compression: Optional[str]) -> bytes:
+    if compression is None:
+        return raw
+    if compression == "gzip":
+        return gzip.compress(raw, compresslevel=6)
+    if compression == "zstd":
+        _require_zstandard()
+        return zstandard.ZstdCompressor(level=3).compress(raw)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise ValueError("zstd compression needs the zstandard package "
+                         "(pip install zstandard)")
+
+
+def normalize_compression(value: Any) -> Optional[str]:
+    """
+    Map config values (none/false/gzip/gz/zstd/zst) to a codec name. Raises
+    ValueError for unknown values, and for zstd without `zstandard`, so a
+    bad setting fails at startup rather than after a paid API call.
+    """
+    if value in (None, False, "", "none", "None"):
+        return None
+    value = str(value).lower()
+    if value in ("gzip", "gz"):
+        return "gzip"
+    if value in ("zstd", "zst"):
+        _require_zstandard()
+        return "zstd"
+    raise ValueError(f"Unknown compression: {value}")
+
+
+def is_result_file(name: str) -> bool:
+    return RESULT_FILE_PATTERN.search(str(name)) is not None
+
+
+def strip_result_suffix(name: str) -> str:
+    """'a_ss0-t600.json.gz' -> 'a_ss0-t600'"""
+    return RESULT_FILE_PATTERN.sub("", str(name))
+
+
+def load_result(path: str | Path) -> Any:
+    """
+    Load a JSON result file, compressed or not. Invalid JSON and truncated
+    or corrupt compressed data raise ValueError.
+    """
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+class ResultCodec:
+    """
+    Reader/writer for result files with fixed formatting options.
+
+    Args:
+        pretty: Indent output (2 spaces) instead of writing compact JSON
+        compression: None, "gzip" or "zstd"
+    """
+
+    def __init__(self, pretty: bool = False, compression: Optional[str] = None):
+        self.pretty = pretty
+        self.compression = normalize_compression(compression)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]]) -> "ResultCodec":
+        """Build from the `tasks.transcription.result-format` config section."""
+        config = config or {}
+        return cls(pretty=bool(config.get("pretty", False)),
+                   compression=config.get("compression"))
+
+    def path_for(self, path: str | Path) -> Path:
+        """Final path for a '.json' path, with the compression suffix added."""
+        path = Path(path)
+        return path.with_name(path.name + COMPRESSION_SUFFIXES[self.compression])
+
+    def dump(self, data: Any, path: str | Path) -> Path:
+        """
+        Write `data` to `path_for(path)` and return the written path. The
+        file is replaced atomically, so writers racing on the same result
+        (e.g. a re-dispatched segment) leave one complete copy.
+        """
+        out_path = self.path_for(path)
+        raw = _compress(dumps(data, self.pretty), self.compression)
+        tmp_path = out_path.with_name(
+            f"{out_path.name}.{os.getpid()}-{threading.get_ident()}.part")
+        with open(tmp_path, "wb") as f:
+            f.write(raw)
+        tmp_path.replace(out_path)
+        return out_path
+
+    load = staticmethod(load_result)
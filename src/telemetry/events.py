@@ -0,0 +1,294 @@
+"""
+Process-wide bus of typed engine events.
+
+Publishers describe what happened (a segment queued, a stage started,
+progress, a retry, completion, failure, a log line) as event objects;
+subscribers (the GUI, the CLI's progress output, ...) pick the types and
+levels they care about:
+
+    BUS.subscribe(on_event, types=(Completed, Failed), min_level=INFO)
+
+Events carry the tags of the enclosing `BUS.context(...)` blocks of the
+publishing thread (job, file, segment, model, provider, attempt). Log
+messages are formatted only when a subscriber reads them, and publishers
+check `BUS.wants(...)` first, so nothing is built for events nobody
+listens to. Frequent events (Progress) can be thinned per subscriber
+with `sample_interval`.
+"""
+
+import sys
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type
+
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "debug", INFO: "info", WARNING: "warning", ERROR: "error"}
+
+
+class Event:
+    """Base event: level, wall-clock time and the publisher's context tags."""
+
+    level = INFO
+    sampled = False  # may be thinned out by a subscriber's sample_interval
+
+    def __init__(self, **tags):
+        self.ts = time.time()
+        self.tags: Dict[str, Any] = {**BUS.current_tags(), **tags}
+
+    @property
+    def job(self) -> Optional[int]:
+        return self.tags.get("job")
+
+    @property
+    def file(self) -> Optional[str]:
+        return self.tags.get("file")
+
+    @property
+    def segment(self) -> Optional[int]:
+        return self.tags.get("segment")
+
+    @property
+    def message(self) -> str:
+        """Human-readable rendering, built on demand."""
+        return type(self).__name__
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"event": type(self).__name__, "ts": round(self.ts, 3),
+                "level": LEVEL_NAMES.get(self.level, self.level), **self.tags}
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.tags} {self.message!r}>"
+
+
+class Log(Event):
+    """A log line; `template % args` is only formatted when read."""
+
+    def __init__(self, template: str, *args, level: int = INFO, **tags):
+        super().__init__(**tags)
+        self.level = level
+        self._template = template
+        self._args = args
+        self._message: Optional[str] = None
+
+    @property
+    def message(self) -> str:
+        if self._message is None:
+            self._message = self._template % self._args if self._args else self._template
+        return self._message
+
+
+class SegmentQueued(Event):
+    level = DEBUG
+
+    def __init__(self, queue_depth: int, **tags):
+        super().__init__(**tags)
+        self.queue_depth = queue_depth
+
+    @property
+    def message(self) -> str:
+        return f"Segment {self.segment} of {self.file} queued ({self.queue_depth} waiting)"
+
+
+class StageStarted(Event):
+    """A traced stage began: segment, audio_source, ffmpeg_cut, api_call, ..."""
+
+    level = DEBUG
+
+    def __init__(self, stage: str, **tags):
+        super().__init__(**tags)
+        self.stage = stage
+
+    @property
+    def message(self) -> str:
+        return f"{self.stage} started for segment {self.segment} of {self.file}"
+
+
+class Progress(Event):
+    """Fraction done of a segment's stage, or of a whole file when `segment` is None."""
+
+    sampled = True
+
+    def __init__(self, fraction: float, stage: Optional[str] = None,
+                 done: Optional[int] = None, total: Optional[int] = None,
+                 speed: Optional[float] = None, **tags):
+        super().__init__(**tags)
+        self.fraction = max(0.0, min(1.0, fraction))
+        self.stage = stage
+        self.done = done
+        self.total = total
+        self.speed = speed  # e.g. ffmpeg's processing speed, x realtime
+
+    @property
+    def message(self) -> str:
+        what = f"segment {self.segment}" if self.segment is not None else self.file
+        counts = f" ({self.done}/{self.total})" if self.total else ""
+        speed = f" at {self.speed:g}x" if self.speed else ""
+        return f"{self.stage or 'progress'} {what}: {self.fraction:.0%}{counts}{speed}"
+
+
+class Retry(Event):
+    level = WARNING
+
+    def __init__(self, attempt: int, delay: float, reason: str = "", **tags):
+        super().__init__(**tags)
+        self.attempt = attempt
+        self.delay = delay
+        self.reason = reason
+
+    @property
+    def message(self) -> str:
+        return (f"Retrying segment {self.segment} of {self.file} in {self.delay:.0f}s "
+                f"(attempt {self.attempt + 1}){': ' + self.reason if self.reason else ''}")
+
+
+class Completed(Event):
+    """A segment, or a whole file when `segment` is None, finished."""
+
+    def __init__(self, seconds: Optional[float] = None, output: Optional[str] = None, **tags):
+        super().__init__(**tags)
+        self.seconds = seconds
+        self.output = output
+
+    @property
+    def message(self) -> str:
+        what = f"Segment {self.segment} of {self.file}" if self.segment is not None else self.file
+        took = f" in {self.seconds:.0f}s" if self.seconds is not None else ""
+        return f"{what} done{took}" + (f", merged: {self.output}" if self.output else "")
+
+
+class Failed(Event):
+    """A segment, or a whole file when `segment` is None, failed."""
+
+    level = ERROR
+
+    def __init__(self, error: str = "", **tags):
+        super().__init__(**tags)
+        self.error = error
+
+    @property
+    def message(self) -> str:
+        what = f"Segment {self.segment} of {self.file}" if self.segment is not None else self.file
+        return f"{what} failed" + (f": {self.error}" if self.error else "")
+
+
+class Subscription:
+    def __init__(self, handler: Callable[[Event], None], types: Tuple[Type[Event], ...],
+                 min_level: int, predicate: Optional[Callable[[Event], bool]],
+                 sample_interval: float):
+        self.handler = handler
+        self.types = types
+        self.min_level = min_level
+        self.predicate = predicate
+        self.sample_interval = sample_interval
+        self._last: Dict[tuple, float] = {}
+
+    def accepts_type(self, event_type: Type[Event], level: Optional[int]) -> bool:
+        return issubclass(event_type, self.types) and \
+            (level is None or level >= self.min_level)
+
+    def deliver(self, event: Event):
+        if self.predicate is not None and not self.predicate(event):
+            return
+        if event.sampled and self.sample_interval:
+            # the last update of a stage (fraction 1) always goes through
+            key = (type(event), event.job, event.file, event.segment)
+            now = time.monotonic()
+            if now - self._last.get(key, float("-inf")) < self.sample_interval and \
+                    getattr(event, "fraction", 0) < 1:
+                return
+            self._last[key] = now
+        self.handler(event)
+
+
+class EventBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions: Tuple[Subscription, ...] = ()
+        self._local = threading.local()
+
+    # ---- context ----
+
+    def _tags(self):
+        if not hasattr(self._local, "tags"):
+            self._local.tags = [{}]
+        return self._local.tags
+
+    @contextmanager
+    def context(self, **tags) -> Iterator[None]:
+        """Tag every event published in this thread within the block."""
+        stack = self._tags()
+        stack.append({**stack[-1], **tags})
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def current_tags(self) -> Dict[str, Any]:
+        return dict(self._tags()[-1])
+
+    # ---- subscribers ----
+
+    def subscribe(self, handler: Callable[[Event], None],
+                  types: Tuple[Type[Event], ...] = (Event,),
+                  min_level: int = INFO,
+                  predicate: Optional[Callable[[Event], bool]] = None,
+                  sample_interval: float = 0.0) -> Subscription:
+        """
+        Args:
+            handler: Called with each accepted event, in the publishing thread
+            types: Event classes (and their subclasses) to receive
+            min_level: Lowest level received
+            predicate: Optional further filter, e.g. on `event.job`
+            sample_interval: Minimum seconds between two sampled events
+                (Progress) of the same job/file/segment
+        """
+        subscription = Subscription(handler, tuple(types), min_level, predicate,
+                                    sample_interval)
+        with self._lock:
+            self._subscriptions = self._subscriptions + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = tuple(s for s in self._subscriptions if s is not subscription)
+
+    def wants(self, event_type: Type[Event], level: Optional[int] = None) -> bool:
+        """Whether any subscriber takes `event_type` (at `level`); cheap, call before building events."""
+        level = event_type.level if level is None and event_type is not Log else level
+        return any(s.accepts_type(event_type, level) for s in self._subscriptions)
+
+    def publish(self, event: Event):
+        for subscription in self._subscriptions:
+            if subscription.accepts_type(type(event), event.level):
+                try:
+                    subscription.deliver(event)
+                except Exception:
+                    # printed, not published: a failing Log subscriber would recurse
+                    print(f"Event subscriber failed on {type(event).__name__}:",
+                          file=sys.stderr)
+                    traceback.print_exc()
+
+
+BUS = EventBus()
+
+
+def publish(event_type: Type[Event], *args, **kwargs) -> bool:
+    """Build and publish an event only if someone subscribes to it."""
+    level = kwargs.get("level", event_type.level)
+    if not BUS.wants(event_type, level):
+        return False
+    BUS.publish(event_type(*args, **kwargs))
+    return True
+
+
+def log(template: str, *args, level: int = INFO, **tags):
+    """
+    Publish a log line. Without any Log subscriber (plain library or
+    script use) it is printed instead, as before the event bus.
+    """
+    if not BUS.wants(Log):
+        print(template % args if args else template)
+        return
+    publish(Log, template, *args, level=level, **tags)
@@ -0,0 +1,269 @@
+"""
+In-process metrics: counters, gauges and histograms with labels, and an
+optional HTTP endpoint serving them in the Prometheus text format.
+
+    SEGMENTS_IN_FLIGHT.labels(provider="groq", model="whisper-1").inc()
+
+The metrics the engine updates are defined at the bottom of this module;
+`start_metrics_server(port)` exposes the registry at
+http://127.0.0.1:<port>/metrics.
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str],
+                   extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Child:
+    """One labelled time series of a metric."""
+
+    def __init__(self, metric: "_Metric", values: Tuple[str, ...]):
+        self._metric = metric
+        self._values = values
+
+    def inc(self, amount: float = 1):
+        self._metric._inc(self._values, amount)
+
+    def dec(self, amount: float = 1):
+        self._metric._inc(self._values, -amount)
+
+    def set(self, value: float):
+        self._metric._set(self._values, value)
+
+    def observe(self, value: float):
+        self._metric._observe(self._values, value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def labels(self, **labels) -> _Child:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return _Child(self, tuple(str(labels[n]) for n in self.labelnames))
+
+    def _default(self) -> _Child:
+        if self.labelnames:
+            raise ValueError(f"{self.name} needs labels {self.labelnames}")
+        return _Child(self, ())
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def _inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _set(self, key, value):
+        raise TypeError(f"{self.kind} {self.name} cannot be set")
+
+    def _observe(self, key, value):
+        raise TypeError(f"{self.kind} {self.name} cannot observe")
+
+    def value(self, **labels) -> float:
+        """Current value of one series (for tests and status lines)."""
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} "
+                             f"{_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _inc(self, key, amount):
+        if amount < 0:
+            raise ValueError(f"counter {self.name} cannot decrease")
+        super()._inc(key, amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def dec(self, amount: float = 1):
+        self._default().dec(amount)
+
+    def _set(self, key, value):
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def _inc(self, key, amount):
+        raise TypeError(f"histogram {self.name} cannot be incremented")
+
+    def _observe(self, key, value):
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._series[key] = (counts, total + value)
+
+    def value(self, **labels) -> float:
+        """Number of observations of one series."""
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            counts, _ = self._series.get(key, ([0], 0.0))
+            return float(sum(counts))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _format_value(bound)
+                    lines.append(f"{self.name}_bucket"
+                                 f"{_format_labels(self.labelnames, key, ('le', le))} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"metric {metric.name} already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+_LANE = ("provider", "model")
+
+SEGMENTS_IN_FLIGHT = REGISTRY.gauge(
+    "transcriber_segments_in_flight", "Segments being cut or transcribed", _LANE)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "transcriber_queue_depth", "Segments waiting in the job queue", _LANE)
+SEGMENTS_TOTAL = REGISTRY.counter(
+    "transcriber_segments_total", "Segments finished, by outcome", _LANE + ("outcome",))
+RETRIES_TOTAL = REGISTRY.counter(
+    "transcriber_retries_total", "Segment attempts after the first", _LANE)
+ERRORS_TOTAL = REGISTRY.counter(
+    "transcriber_errors_total",
+    "Failed API calls and cuts by error class (http_429, timeout, ffmpeg, ...)",
+    _LANE + ("error",))
+BYTES_UPLOADED = REGISTRY.counter(
+    "transcriber_uploaded_bytes_total", "Request bytes sent to the API", _LANE)
+AUDIO_SECONDS = REGISTRY.counter(
+    "transcriber_audio_seconds_total", "Seconds of audio transcribed", _LANE)
+API_LATENCY = REGISTRY.histogram(
+    "transcriber_api_latency_seconds", "API call duration, upload included", _LANE)
+CACHE_REQUESTS = REGISTRY.counter(
+    "transcriber_cache_requests_total", "Cache lookups by cache and result (hit/miss)",
+    ("cache", "result"))
+MERGES_TOTAL = REGISTRY.counter(
+    "merger_merges_total", "Merges by outcome", ("outcome",))
+MERGE_SECONDS = REGISTRY.histogram(
+    "merger_merge_seconds", "Time to merge a file's segment results", (),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scraped every few seconds, keep the console quiet
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve REGISTRY at http://host:port/metrics from a daemon thread (once per process)."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="metrics-server",
+                         daemon=True).start()
+    return _server
@@ -0,0 +1,258 @@
+"""
+Opt-in profiling of the engine and the merger, stage by stage.
+
+While a Profiler is active, every traced span (ffmpeg_cut, api_call,
+json_parse, ...; see tracing.py) and every merger stage runs under its own
+cProfile profiler (an enclosing stage's profiler is paused meanwhile), and
+a sampling thread records the stacks of the threads inside a stage. On
+`stop()` the output directory gets:
+- stages/<stage>.pstats and .txt: deterministic profile of each stage,
+  all segments together (open with `python -m pstats` or snakeviz)
+- stages/<stage>.folded: sampled stacks in collapsed format (flamegraph.pl,
+  speedscope)
+- segments/<file>/segment_<n>.pstats and .txt: everything that ran for
+  one segment, with its most sampled functions
+- summary.txt: time, calls and top sampled stacks per stage
+
+When no profiler is active `profile_stage` returns a shared null context,
+so the instrumented code pays one global lookup per stage.
+
+    profiler = start_profiling("profiles/run1")
+    ...
+    stop_profiling()
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+_NULL = nullcontext()
+
+
+def _stage_key(tags: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Segment a stage belongs to, from its tracing tags: "<file>/segment_<n>"."""
+    if not tags or "file" not in tags or "segment" not in tags:
+        return None
+    return f"{tags['file']}/segment_{tags['segment']}"
+
+
+def _safe_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(name))
+
+
+class Profiler:
+    """
+    Args:
+        output_dir: Where profiles are written on stop()
+        sample_interval: Seconds between stack samples, 0 disables sampling
+        max_stack_depth: Innermost frames kept per sampled stack
+    """
+
+    def __init__(self, output_dir: str | Path, sample_interval: float = 0.01,
+                 max_stack_depth: int = 40):
+        self.output_dir = Path(output_dir)
+        self.sample_interval = sample_interval
+        self.max_stack_depth = max_stack_depth
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._active: Dict[int, tuple] = {}  # thread id -> (stage, segment key)
+        self._stage_stats: Dict[str, pstats.Stats] = {}
+        self._segment_stats: Dict[str, pstats.Stats] = {}
+        self._stage_seconds: Dict[str, float] = defaultdict(float)
+        self._stage_calls: Counter = Counter()
+        self._stage_stacks: Dict[str, Counter] = defaultdict(Counter)
+        self._segment_leaves: Dict[str, Counter] = defaultdict(Counter)
+        self._skipped: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    # ---- stages ----
+
+    def _stack(self) -> List[tuple]:
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str, tags: Optional[Dict[str, Any]] = None) -> Iterator[None]:
+        stack = self._stack()
+        key = _stage_key(tags) or (stack[-1][1] if stack else None)
+        if stack and stack[-1][2] is not None:
+            stack[-1][2].disable()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one active cProfile per interpreter; the
+            # sampler still covers this stage
+            profile = None
+            self._skipped[name] += 1
+        stack.append((name, key, profile))
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] = (name, key)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profile is not None:
+                profile.disable()
+            stack.pop()
+            with self._lock:
+                if stack:
+                    self._active[thread_id] = stack[-1][:2]
+                else:
+                    self._active.pop(thread_id, None)
+                self._stage_seconds[name] += elapsed
+                self._stage_calls[name] += 1
+                if profile is not None:
+                    self._add(self._stage_stats, name, profile)
+                    if key is not None:
+                        self._add(self._segment_stats, key, profile)
+            if stack and stack[-1][2] is not None:
+                stack[-1][2].enable()
+
+    @staticmethod
+    def _add(stats_by_key: Dict[str, pstats.Stats], key: str, profile: cProfile.Profile):
+        if key in stats_by_key:
+            stats_by_key[key].add(profile)
+        else:
+            stats_by_key[key] = pstats.Stats(profile)
+
+    # ---- sampling ----
+
+    def _format_frame(self, frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            samples = []
+            for thread_id, (stage, key) in active.items():
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_stack_depth:
+                    stack.append(self._format_frame(frame))
+                    frame = frame.f_back
+                samples.append((stage, key, ";".join(reversed(stack)), stack[0]))
+            del frames
+            with self._lock:
+                for stage, key, folded, leaf in samples:
+                    self._stage_stacks[stage][folded] += 1
+                    if key is not None:
+                        self._segment_leaves[key][leaf] += 1
+
+    # ---- lifecycle ----
+
+    def start(self) -> "Profiler":
+        if self.sample_interval and self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, name="profiler-sampler",
+                                             daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self) -> Path:
+        """Stop sampling and write all profiles; returns the output directory."""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        with self._lock:
+            self._write()
+        return self.output_dir
+
+    @staticmethod
+    def _stats_text(stats: pstats.Stats, limit: int = 40) -> str:
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats("cumulative").print_stats(limit)
+        stats.stream = sys.stdout
+        return out.getvalue()
+
+    def _write(self):
+        stages_dir = self.output_dir / "stages"
+        segments_dir = self.output_dir / "segments"
+        stages_dir.mkdir(parents=True, exist_ok=True)
+        for name, stats in self._stage_stats.items():
+            stats.dump_stats(str(stages_dir / f"{_safe_name(name)}.pstats"))
+            (stages_dir / f"{_safe_name(name)}.txt").write_text(
+                self._stats_text(stats), encoding="utf-8")
+        for name, stacks in self._stage_stacks.items():
+            (stages_dir / f"{_safe_name(name)}.folded").write_text(
+                "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()),
+                encoding="utf-8")
+        for key, stats in self._segment_stats.items():
+            file_part, _, segment_part = key.rpartition("/")
+            path = segments_dir / _safe_name(file_part) / _safe_name(segment_part)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(path.with_suffix(".pstats")))
+            leaves = self._segment_leaves.get(key, Counter())
+            sampled = "".join(f"{count:>7}  {leaf}\n" for leaf, count in leaves.most_common(20))
+            path.with_suffix(".txt").write_text(
+                ("Most sampled functions:\n" + sampled + "\n" if sampled else "")
+                + self._stats_text(stats, 25), encoding="utf-8")
+        (self.output_dir / "summary.txt").write_text(self.summary(), encoding="utf-8")
+
+    def summary(self, top: int = 5) -> str:
+        lines = [f"{'stage':<20}{'calls':>8}{'total s':>10}{'mean ms':>10}{'samples':>9}"]
+        for name, seconds in sorted(self._stage_seconds.items(), key=lambda i: -i[1]):
+            calls = self._stage_calls[name]
+            samples = sum(self._stage_stacks[name].values())
+            lines.append(f"{name:<20}{calls:>8}{seconds:>10.2f}"
+                         f"{seconds / calls * 1000:>10.1f}{samples:>9}")
+        for name, stacks in self._stage_stacks.items():
+            lines.append(f"\n{name}: top sampled stacks")
+            for stack, count in stacks.most_common(top):
+                frames = stack.split(";")
+                lines.append(f"  {count:>6}  {' <- '.join(reversed(frames[-4:]))}")
+        if self._skipped:
+            lines.append(f"\ncProfile unavailable (another profiler active) for: "
+                         f"{dict(self._skipped)}; sampled stacks only")
+        return "\n".join(lines) + "\n"
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def start_profiling(output_dir: str | Path, sample_interval: float = 0.01) -> Profiler:
+    """Activate process-wide profiling into `output_dir` (no-op if already active)."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler(output_dir, sample_interval).start()
+        return _profiler
+
+
+def stop_profiling() -> Optional[Path]:
+    """Deactivate profiling and write its output; returns the output directory."""
+    global _profiler
+    with _profiler_lock:
+        profiler, _profiler = _profiler, None
+    return profiler.stop() if profiler is not None else None
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def profile_stage(name: str, tags: Optional[Dict[str, Any]] = None):
+    """Context manager profiling a stage when profiling is active, else a no-op."""
+    profiler = _profiler
+    if profiler is None:
+        return _NULL
+    return profiler.stage(name, tags)
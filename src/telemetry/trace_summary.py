@@ -0,0 +1,122 @@
+"""
+Summarize a span trace (see tracing.py): latency percentiles per span and
+throughput per provider x model.
+
+    python -m src.telemetry.trace_summary [trace.jsonl ...] [--since HOURS]
+
+Rotated files (trace.jsonl.1, ...) of a given trace are read as well.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from src.telemetry.tracing import DEFAULT_TRACE_FILE
+
+
+def read_spans(paths: Iterable[str | Path], since: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Span records of the given traces and their rotated files, oldest file first."""
+    for path in paths:
+        path = Path(path)
+        rotated = sorted(path.parent.glob(path.name + ".*"),
+                         key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else 0,
+                         reverse=True)
+        for file in [p for p in rotated if p.suffix[1:].isdigit()] + [path]:
+            if not file.exists():
+                continue
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of a crashed writer
+                    if since is None or record.get("ts", 0) >= since:
+                        yield record
+
+
+def summarize(spans: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Returns:
+        dict: "<provider>/<model>" -> {
+            "spans": {name: {"count", "p50_ms", "p95_ms", "mean_ms"}},
+            "segments", "failed", "audio_seconds", "upload_bytes",
+            "wall_seconds", "segments_per_minute", "audio_speedup"}
+    """
+    durations = defaultdict(lambda: defaultdict(list))
+    lanes = defaultdict(lambda: {"segments": 0, "failed": 0, "audio_seconds": 0.0,
+                                 "upload_bytes": 0, "first": None, "last": None})
+    for span in spans:
+        lane_key = f"{span.get('provider', '-')}/{span.get('model', '-')}"
+        durations[lane_key][span["span"]].append(span["ms"])
+        lane = lanes[lane_key]
+        end = span["ts"] + span["ms"] / 1000
+        lane["first"] = span["ts"] if lane["first"] is None else min(lane["first"], span["ts"])
+        lane["last"] = end if lane["last"] is None else max(lane["last"], end)
+        if span["span"] == "segment":
+            if span.get("ok", True):
+                lane["segments"] += 1
+                lane["audio_seconds"] += float(span.get("audio_seconds", 0))
+            else:
+                lane["failed"] += 1
+        elif span["span"] == "upload":
+            lane["upload_bytes"] += int(span.get("bytes", 0))
+
+    summary = {}
+    for lane_key, by_name in durations.items():
+        lane = lanes[lane_key]
+        wall = max((lane["last"] or 0) - (lane["first"] or 0), 1e-9)
+        summary[lane_key] = {
+            "spans": {
+                name: {"count": len(values),
+                       "p50_ms": float(np.percentile(values, 50)),
+                       "p95_ms": float(np.percentile(values, 95)),
+                       "mean_ms": float(np.mean(values))}
+                for name, values in sorted(by_name.items())},
+            "segments": lane["segments"],
+            "failed": lane["failed"],
+            "audio_seconds": lane["audio_seconds"],
+            "upload_bytes": lane["upload_bytes"],
+            "wall_seconds": wall,
+            "segments_per_minute": lane["segments"] / wall * 60,
+            "audio_speedup": lane["audio_seconds"] / wall,
+        }
+    return summary
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines: List[str] = []
+    for lane_key, lane in sorted(summary.items()):
+        lines.append(f"{lane_key}: {lane['segments']} segments ({lane['failed']} failed) "
+                     f"in {lane['wall_seconds']:.0f}s, "
+                     f"{lane['segments_per_minute']:.2f} segments/min, "
+                     f"{lane['audio_speedup']:.1f}x realtime, "
+                     f"{lane['upload_bytes'] / 1024 / 1024:.1f} MB uploaded")
+        lines.append(f"    {'span':<18}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'mean ms':>11}")
+        for name, stats in lane["spans"].items():
+            lines.append(f"    {name:<18}{stats['count']:>7}{stats['p50_ms']:>11.1f}"
+                         f"{stats['p95_ms']:>11.1f}{stats['mean_ms']:>11.1f}")
+    return "\n".join(lines) if lines else "No spans found."
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize a transcription span trace.")
+    parser.add_argument("traces", nargs="*", default=[DEFAULT_TRACE_FILE],
+                        help=f"trace files (default: {DEFAULT_TRACE_FILE})")
+    parser.add_argument("--since", type=float, metavar="HOURS",
+                        help="only spans from the last HOURS hours")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+    since = time.time() - args.since * 3600 if args.since else None
+    summary = summarize(read_spans(args.traces, since))
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
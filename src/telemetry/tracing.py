@@ -0,0 +1,154 @@
+"""
+Structured timing spans, written as JSON lines to a rotating trace file.
+
+    tracer = get_tracer()
+    with tracer.context(model="whisper-1", provider="groq", segment=3, attempt=0):
+        with tracer.span("ffmpeg_cut") as span:
+            ...
+            span.set(bytes=os.path.getsize(out))
+
+Every span line carries the tags of the enclosing `context` blocks of its
+thread, its own attributes, the wall-clock start (`ts`) and the duration
+in milliseconds (`ms`). A disabled tracer hands out no-op spans, so
+instrumented code never checks whether tracing is on.
+"""
+
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from src.telemetry.profiling import profile_stage
+from src.telemetry.events import BUS, StageStarted
+
+DEFAULT_TRACE_FILE = "./tmp_audio_segments/trace.jsonl"
+
+
+class Span:
+    """An open span; attributes added with `set` are written when it closes."""
+
+    def __init__(self, name: str, tags: Dict[str, Any]):
+        self.name = name
+        self.attrs = dict(tags)
+        self.ts = time.time()
+        self._started = time.perf_counter()
+        self.ms: Optional[float] = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self) -> Dict[str, Any]:
+        self.ms = (time.perf_counter() - self._started) * 1000
+        return {"span": self.name, "ts": round(self.ts, 3), "ms": round(self.ms, 3),
+                **self.attrs}
+
+
+class Tracer:
+    """
+    Args:
+        path: Trace file, None disables tracing
+        max_bytes: Size at which the file is rotated
+        backups: Rotated files kept (trace.jsonl.1 ... .N)
+    """
+
+    def __init__(self, path: Optional[str | Path] = DEFAULT_TRACE_FILE,
+                 max_bytes: int = 10 * 1024 * 1024, backups: int = 5):
+        self.path = Path(path) if path else None
+        self._local = threading.local()
+        self._handler = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handler = logging.handlers.RotatingFileHandler(
+                self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    @property
+    def enabled(self) -> bool:
+        return self._handler is not None
+
+    def _tags(self) -> Dict[str, Any]:
+        if not hasattr(self._local, "tags"):
+            self._local.tags = [{}]
+        return self._local.tags
+
+    @contextmanager
+    def context(self, **tags) -> Iterator[None]:
+        """Tag every span opened in this thread within the block."""
+        stack = self._tags()
+        stack.append({**stack[-1], **tags})
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def current_tags(self) -> Dict[str, Any]:
+        return dict(self._tags()[-1])
+
+    @contextmanager
+    def span(self, name: str, **attrs) -> Iterator[Span]:
+        """
+        A timed stage; also published as a StageStarted event and profiled
+        while profiling.py is active.
+        """
+        tags = self._tags()[-1]
+        span = Span(name, {**tags, **attrs})
+        if BUS.wants(StageStarted):
+            BUS.publish(StageStarted(name))
+        try:
+            with profile_stage(name, tags):
+                yield span
+        except BaseException as e:
+            span.set(error=type(e).__name__)
+            raise
+        finally:
+            self.emit(span.finish())
+
+    def record(self, name: str, ms: float, ts: Optional[float] = None, **attrs):
+        """
+        Write a span measured elsewhere, e.g. a wait between two threads;
+        `ts` is its wall-clock start, default `ms` before now.
+        """
+        if ts is None:
+            ts = time.time() - ms / 1000
+        self.emit({"span": name, "ts": round(ts, 3), "ms": round(ms, 3),
+                   **self._tags()[-1], **attrs})
+
+    def emit(self, record: Dict[str, Any]):
+        if self._handler is None:
+            return
+        line = json.dumps(record, default=str, ensure_ascii=False)
+        # handle() holds the handler's lock, so concurrent spans cannot race
+        # the file rollover
+        self._handler.handle(logging.makeLogRecord({"msg": line, "args": None}))
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer(trace_config: Optional[Dict[str, Any]] = None,
+               default_dir: Optional[str | Path] = None) -> Tracer:
+    """
+    Process-wide tracer, configured from `tasks.transcription.trace` on
+    first use (enabled by default, `<default_dir>/trace.jsonl`).
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            config = trace_config or {}
+            if not config.get("enabled", True):
+                _tracer = Tracer(None)
+            else:
+                default = Path(default_dir) / "trace.jsonl" if default_dir else DEFAULT_TRACE_FILE
+                _tracer = Tracer(config.get("path") or default,
+                                 int(float(config.get("max-size", 10)) * 1024 * 1024),
+                                 int(config.get("backups", 5)))
+        return _tracer
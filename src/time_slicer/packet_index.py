@@ -0,0 +1,176 @@
+"""
+Audio packet index: timestamp, size and byte position of every packet of a
+file's first audio stream, built in one ffprobe pass and cached per file.
+
+With it the slicer can place cuts on an exact byte budget instead of
+trusting the stream's average bit rate, which VBR audio and many MKV/Opus
+files do not report reliably (or at all).
+"""
+
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = "./tmp_audio_segments"
+_INDEX_VERSION = 1
+
+
+class PacketIndex:
+    """
+    Sorted packet table of one audio stream.
+
+    Attributes:
+        times: float64 packet presentation times in seconds
+        sizes: int64 packet sizes in bytes
+        positions: int64 byte offsets in the source file, -1 when unknown
+        cum_bytes: int64 prefix sums, cum_bytes[i] = bytes of packets [0, i)
+    """
+
+    def __init__(self, times: np.ndarray, sizes: np.ndarray,
+                 positions: np.ndarray, duration: Optional[float] = None):
+        order = np.argsort(times, kind="stable")
+        self.times = np.asarray(times, dtype=np.float64)[order]
+        self.sizes = np.asarray(sizes, dtype=np.int64)[order]
+        self.positions = np.asarray(positions, dtype=np.int64)[order]
+        self.cum_bytes = np.zeros(len(self.sizes) + 1, dtype=np.int64)
+        np.cumsum(self.sizes, out=self.cum_bytes[1:])
+        if duration is None:
+            duration = float(self.times[-1]) if len(self.times) else 0.0
+        self.duration = duration
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def total_bytes(self) -> int:
+        return int(self.cum_bytes[-1])
+
+    @property
+    def average_bitrate(self) -> int:
+        """Average audio bit rate in bits per second."""
+        if self.duration <= 0:
+            return 0
+        return int(self.total_bytes * 8 / self.duration)
+
+    def _packet_at(self, t: float) -> int:
+        """Index of the first packet at or after t."""
+        return int(np.searchsorted(self.times, t, side="left"))
+
+    def bytes_between(self, start: float, end: float) -> int:
+        """Payload bytes of the packets in [start, end)."""
+        return int(self.cum_bytes[self._packet_at(end)] -
+                   self.cum_bytes[self._packet_at(start)])
+
+    def time_for_byte_budget(self, start: float, budget: int) -> float:
+        """
+        Latest time t such that the packets in [start, t) fit in `budget`
+        bytes; the stream duration if everything after start fits.
+        """
+        first = self._packet_at(start)
+        limit = self.cum_bytes[first] + budget
+        # number of whole packets that fit, counted from packet 0
+        last = int(np.searchsorted(self.cum_bytes, limit, side="right")) - 1
+        if last >= len(self.times):
+            return self.duration
+        return float(self.times[last])
+
+    def position_at(self, t: float) -> int:
+        """Byte offset of the first packet at or after t, -1 when unknown."""
+        i = self._packet_at(t)
+        if i >= len(self.positions):
+            return -1
+        return int(self.positions[i])
+
+    # ---- persistence ----
+
+    def save(self, path: Path):
+        np.savez(path, version=_INDEX_VERSION, times=self.times,
+                 sizes=self.sizes, positions=self.positions,
+                 duration=self.duration)
+
+    @classmethod
+    def load(cls, path: Path) -> "PacketIndex":
+        with np.load(path) as data:
+            if int(data["version"]) != _INDEX_VERSION:
+                raise ValueError(f"Outdated packet index {path}")
+            return cls(data["times"], data["sizes"], data["positions"],
+                       float(data["duration"]))
+
+
+def _file_key(file_path: Path) -> str:
+    """Cache key from resolved path, size and modification time."""
+    st = file_path.stat()
+    raw = f"{file_path.resolve()}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def build_packet_index(file_path: str | Path, stream: str = "a:0") -> PacketIndex:
+    """
+    Read all packets of one stream with ffprobe, streaming its CSV output.
+
+    Raises:
+        RuntimeError: If ffprobe fails or the stream has no packets.
+    """
+    cmd = ["ffprobe", "-v", "error", "-select_streams", stream,
+           "-show_entries", "packet=pts_time,dts_time,duration_time,size,pos",
+           "-of", "csv=p=0", str(file_path)]
+    times, sizes, positions = [], [], []
+    end_time = 0.0
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          encoding="utf-8") as process:
+        for line in process.stdout:
+            # ffprobe emits fields in its own order: pts_time,dts_time,
+            # duration_time,size,pos
+            fields = line.strip().split(",")
+            if len(fields) < 5:
+                continue
+            pts, dts, dur, size, pos = fields[:5]
+            t = pts if pts not in ("", "N/A") else dts
+            if t in ("", "N/A") or size in ("", "N/A"):
+                continue
+            t = float(t)
+            times.append(t)
+            sizes.append(int(size))
+            positions.append(int(pos) if pos not in ("", "N/A") else -1)
+            if dur not in ("", "N/A"):
+                end_time = max(end_time, t + float(dur))
+        stderr = process.stderr.read()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffprobe failed on {file_path}: {stderr.strip()}")
+    if not times:
+        raise RuntimeError(f"No packets found in stream {stream} of {file_path}")
+    end_time = max(end_time, max(times))
+    return PacketIndex(np.array(times), np.array(sizes), np.array(positions),
+                       end_time)
+
+
+def get_packet_index(file_path: str | Path,
+                     cache_dir: Optional[str | Path] = DEFAULT_CACHE_DIR) -> PacketIndex:
+    """
+    Packet index of a file's first audio stream, from cache when the file's
+    path, size and mtime are unchanged, otherwise built and cached.
+
+    Args:
+        file_path: Media file path
+        cache_dir: Directory holding `packet_index/<key>.npz`, None disables caching
+    """
+    file_path = Path(file_path)
+    if cache_dir is None:
+        return build_packet_index(file_path)
+    index_dir = Path(cache_dir) / "packet_index"
+    cache_file = index_dir / f"{_file_key(file_path)}.npz"
+    if cache_file.exists():
+        try:
+            return PacketIndex.load(cache_file)
+        except Exception:
+            cache_file.unlink(missing_ok=True)
+    index = build_packet_index(file_path)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    tmp_file = index_dir / f"{cache_file.stem}.{os.getpid()}.tmp.npz"
+    index.save(tmp_file)
+    tmp_file.replace(cache_file)
+    return index
@@ -1,20 +1,62 @@
-import ffmpeg
+from src.time_slicer.packet_index import get_packet_index, DEFAULT_CACHE_DIR
+from src.time_slicer.probe_service import get_probe_service
 
-def probe_media_file(file_path):
+def probe_media_file(file_path, cache_dir=DEFAULT_CACHE_DIR):
     """
     Probes the media file to get its duration and audio bitrate.
 
+    Probe results are cached per (path, size, mtime) in `cache_dir`, so
+    reopening or reloading an unchanged file does not run ffprobe again.
+    When the container reports no audio bit rate (common for MKV/Opus), the
+    average is measured from the file's packet index, which is cached in
+    `cache_dir` and can then be reused for VBR-aware slicing.
+
     :param file_path: Path to the media file
+    :param cache_dir: Probe and packet index cache directory, None keeps
+        nothing on disk
     :return: Tuple (duration, audio_bitrate)
     """
-    probe = ffmpeg.probe(file_path)
-    duration = float(probe['streams'][0]['duration'])
+    probe = get_probe_service(cache_dir).probe(file_path)
     audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
     if audio_stream is None:
         raise ValueError("No audio stream found in the file")
-    
+
+    duration = probe['streams'][0].get('duration') or audio_stream.get('duration') \
+        or probe.get('format', {}).get('duration')
+    if duration is None:
+        raise ValueError("Could not determine media duration")
+    duration = float(duration)
+
     audio_bitrate = int(audio_stream.get('bit_rate', 0))
+    if audio_bitrate == 0:
+        audio_bitrate = get_packet_index(file_path, cache_dir).average_bitrate
     if audio_bitrate == 0:
         raise ValueError("Could not determine audio bit rate")
-    
-    return duration, audio_bitrate
\ No newline at end of file
+
+    return duration, audio_bitrate
+
+
+def probe_audio_stream(file_path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Probes the media file's first audio stream.
+
+    :param file_path: Path to the media file
+    :param cache_dir: Probe cache directory, None keeps nothing on disk
+    :return: ffprobe's stream dict (codec_name, bit_rate, ...), None if
+        the file has no audio stream
+    """
+    probe = get_probe_service(cache_dir).probe(file_path)
+    return next((stream for stream in probe['streams'] if stream.get('codec_type') == 'audio'), None)
+
+
+def probe_audio_codec(file_path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Probes the codec of the media file's first audio stream.
+
+    :param file_path: Path to the media file
+    :param cache_dir: Probe cache directory, None keeps nothing on disk
+    :return: Codec name as reported by ffprobe (e.g. 'aac', 'opus', 'mp3'),
+        None if the file has no audio stream
+    """
+    audio_stream = probe_audio_stream(file_path, cache_dir)
+    return audio_stream.get('codec_name') if audio_stream else None
@@ -0,0 +1,153 @@
+"""
+Cached and parallel media probing.
+
+`ffmpeg.probe` reads and analyzes the container every time. ProbeService
+keeps probe results in a small SQLite store keyed by (path, size, mtime),
+so reopening or reloading a file is a lookup. When only the duration is
+needed it runs a format-only probe with bounded probesize/analyzeduration,
+and `probe_many` probes a batch of files on a thread pool (the work is
+done by ffprobe subprocesses, so threads parallelize fine).
+"""
+
+import json
+import os
+import sqlite3
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Any
+
+from src.time_slicer.packet_index import DEFAULT_CACHE_DIR
+from src.telemetry.metrics import CACHE_REQUESTS
+
+# bounded analysis for the duration-only probe: 5MB / 5s of stream
+FAST_PROBESIZE = 5 * 1024 * 1024
+FAST_ANALYZEDURATION = 5 * 1000 * 1000  # microseconds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (path, size, mtime_ns, mode)
+)
+"""
+
+
+def _run_ffprobe(file_path: str, fast: bool) -> Dict[str, Any]:
+    cmd = ["ffprobe", "-v", "error", "-of", "json", "-show_format"]
+    if fast:
+        cmd += ["-probesize", str(FAST_PROBESIZE),
+                "-analyzeduration", str(FAST_ANALYZEDURATION)]
+    else:
+        cmd += ["-show_streams"]
+    cmd.append(file_path)
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          encoding="utf-8")
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffprobe failed on {file_path}: {proc.stderr.strip()}")
+    return json.loads(proc.stdout)
+
+
+class ProbeService:
+    """
+    Persistent probe cache.
+
+    Args:
+        cache_dir: Directory for `probe_cache.sqlite`, None keeps it in memory
+    """
+
+    def __init__(self, cache_dir: Optional[str | Path] = DEFAULT_CACHE_DIR):
+        if cache_dir is None:
+            self._db_path = ":memory:"
+        else:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            self._db_path = str(Path(cache_dir) / "probe_cache.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False,
+                                     timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+
+    @staticmethod
+    def _key(file_path: str | Path):
+        path = str(Path(file_path).resolve())
+        st = os.stat(path)
+        return path, st.st_size, st.st_mtime_ns
+
+    def _lookup(self, key, mode: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM probes WHERE path=? AND size=? AND mtime_ns=? AND mode=?",
+                (*key, mode)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _store(self, key, mode: str, result: Dict[str, Any]):
+        with self._lock, self._conn:
+            # drop results of older versions of the same path
+            self._conn.execute(
+                "DELETE FROM probes WHERE path=? AND mode=? AND (size!=? OR mtime_ns!=?)",
+                (key[0], mode, key[1], key[2]))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)",
+                (*key, mode, json.dumps(result)))
+
+    def probe(self, file_path: str | Path, duration_only: bool = False) -> Dict[str, Any]:
+        """
+        ffprobe JSON of a file ('format' and, unless `duration_only`,
+        'streams'), from cache when the file is unchanged.
+        """
+        key = self._key(file_path)
+        if duration_only:
+            # a cached full probe answers duration questions too
+            cached = self._lookup(key, "full") or self._lookup(key, "format")
+        else:
+            cached = self._lookup(key, "full")
+        if cached is not None:
+            CACHE_REQUESTS.labels(cache="probe", result="hit").inc()
+            return cached
+        CACHE_REQUESTS.labels(cache="probe", result="miss").inc()
+        mode = "format" if duration_only else "full"
+        result = _run_ffprobe(key[0], fast=duration_only)
+        self._store(key, mode, result)
+        return result
+
+    def duration(self, file_path: str | Path) -> float:
+        return float(self.probe(file_path, duration_only=True)["format"]["duration"])
+
+    def probe_many(self, file_paths: Iterable[str | Path],
+                   duration_only: bool = False,
+                   max_workers: int = 8) -> Dict[str, Any]:
+        """
+        Probe many files concurrently.
+
+        Returns:
+            dict: path -> probe result, or the exception raised for that file
+        """
+        file_paths = [str(p) for p in file_paths]
+
+        def one(path):
+            try:
+                return self.probe(path, duration_only)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return dict(zip(file_paths, pool.map(one, file_paths)))
+
+
+_services: Dict[Optional[str], ProbeService] = {}
+_services_lock = threading.Lock()
+
+
+def get_probe_service(cache_dir: Optional[str | Path] = DEFAULT_CACHE_DIR) -> ProbeService:
+    """Process-wide ProbeService per cache directory (None: in memory only)."""
+    key = None if cache_dir is None else str(Path(cache_dir).resolve())
+    with _services_lock:
+        if key not in _services:
+            _services[key] = ProbeService(cache_dir)
+        return _services[key]
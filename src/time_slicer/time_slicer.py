@@ -48,6 +48,58 @@ def get_time_slices(total_duration, audio_bitrate):
 
     return pad_intervals_right(slices, PADDING)
 
+def get_time_slices_by_packets(packet_index, max_file_size=15 * 1024 * 1024,
+                               target_slice_duration=SLICE_DURATION_MINUTES * 60,
+                               padding=PADDING):
+    """
+    VBR-aware variant of get_time_slices: cut positions come from a
+    PacketIndex, so every slice including its right padding holds at most
+    `max_file_size` bytes of audio payload, whatever the bit rate does locally.
+
+    :param packet_index: PacketIndex of the file's audio stream
+    :param max_file_size: Byte budget per padded slice (default 15MB)
+    :param target_slice_duration: Preferred slice length in seconds
+    :param padding: Overlap added to the right of every slice but the last
+    :return: List of tuples (start_time, duration), already padded
+    """
+    total_duration = packet_index.duration
+    slices = []
+    current_time = 0
+
+    def fits(start, end):
+        return packet_index.bytes_between(start, min(end + padding, total_duration)) \
+            <= max_file_size
+
+    while current_time < total_duration:
+        budget_end = packet_index.time_for_byte_budget(current_time, max_file_size)
+        if budget_end < total_duration:
+            budget_end -= padding  # the padding has to fit as well
+        end = min(current_time + target_slice_duration, budget_end, total_duration)
+        if end < total_duration:
+            # prefer human-friendly 30s boundaries, else whole seconds
+            rounded = math.floor(end / 30) * 30
+            end = rounded if rounded > current_time else math.floor(end)
+            if end <= current_time:
+                raise ValueError(
+                    f"Cannot fit {padding + 1}s of audio at {current_time}s "
+                    f"into {max_file_size} bytes")
+            slices.append((current_time, end - current_time))
+        else:
+            slices.append((current_time, math.ceil(total_duration - current_time)))
+        current_time = end
+
+    # rebalance a short tail with its predecessor when both halves still fit;
+    # the new last half reaches further back than the old tail did
+    if len(slices) > 1 and slices[-1][1] < target_slice_duration / 2:
+        start = slices[-2][0]
+        middle = start + round((total_duration - start) / 2 / 30) * 30
+        if start < middle < total_duration and fits(start, middle) \
+                and fits(middle, total_duration):
+            slices[-2] = (start, middle - start)
+            slices[-1] = (middle, math.ceil(total_duration - middle))
+
+    return pad_intervals_right(slices, padding)
+
 def pad_intervals_right(intervals, padding):
     """
     Extend each interval to the right by a given amount to create overlapping.
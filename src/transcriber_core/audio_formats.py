@@ -0,0 +1,13 @@
+# Audio codecs the transcription API accepts as-is, mapped to the container
+# their bitstream is remuxed into. Anything else is re-encoded to AAC/m4a.
+STREAM_COPY_CONTAINERS = {
+    'aac': 'm4a',
+    'mp3': 'mp3',
+    'opus': 'ogg',
+    'vorbis': 'ogg',
+    'flac': 'flac',
+    'pcm_s16le': 'wav',
+}
+REENCODE_CONTAINER = 'm4a'
+# ffmpeg's native AAC encoder default, used to estimate re-encoded segment sizes
+REENCODE_BITRATE_KBPS = 128
@@ -0,0 +1,229 @@
+"""
+Persistent cache of demuxed audio-only tracks.
+
+Slicing a 4GB video means ffmpeg seeks through the video container for
+every segment, on every run and for every model. The cache extracts the
+first audio stream once into `<cache_dir>/<key>.<ext>` and all later
+cuts read from that small file instead.
+
+- Key: resolved path, size, mtime and a content fingerprint (SHA-1 of the
+  first and last MiB plus the size; hashing whole multi-GB videos would
+  cost more than the extraction it saves).
+- Codecs the API accepts are copied into Matroska audio (.mka) untouched;
+  others are encoded once to AAC (.m4a), so later cuts can stream-copy.
+- Total size is bounded; least recently used tracks are evicted first.
+- The GUI, the CLI and store workers may share the cache: the index is
+  updated under an exclusive lock on `index.lock`, and a track being cut
+  from holds a shared lock on the track file, so no process evicts it
+  meanwhile (POSIX only; elsewhere locking is per process).
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Callable, Dict, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+from src.time_slicer.probe_media_file import probe_audio_codec
+from src.transcriber_core.audio_formats import STREAM_COPY_CONTAINERS
+from src.telemetry.metrics import CACHE_REQUESTS
+
+_FINGERPRINT_CHUNK = 1024 * 1024
+_INDEX_FILE = "index.json"
+_LOCK_FILE = "index.lock"
+
+
+def content_fingerprint(file_path: Path) -> str:
+    """SHA-1 over size, first and last MiB of a file."""
+    size = file_path.stat().st_size
+    sha = hashlib.sha1(str(size).encode())
+    with open(file_path, 'rb') as f:
+        sha.update(f.read(_FINGERPRINT_CHUNK))
+        if size > 2 * _FINGERPRINT_CHUNK:
+            f.seek(-_FINGERPRINT_CHUNK, os.SEEK_END)
+            sha.update(f.read(_FINGERPRINT_CHUNK))
+    return sha.hexdigest()
+
+
+class AudioTrackCache:
+    """
+    LRU-bounded store of extracted audio tracks, shared across runs.
+
+    Args:
+        cache_dir: Directory for tracks and the index file
+        max_bytes: Upper bound of the summed track sizes
+    """
+
+    def __init__(self, cache_dir: str | Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._stat_keys: Dict[tuple, str] = {}  # (path, size, mtime) -> key
+
+    # ---- index ----
+
+    def _index_path(self) -> Path:
+        return self.cache_dir / _INDEX_FILE
+
+    @contextmanager
+    def _index_locked(self) -> Iterator[None]:
+        """Exclusive access to the index, across threads and processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.cache_dir / _LOCK_FILE, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index: dict):
+        tmp = self._index_path().with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        tmp.replace(self._index_path())
+
+    # ---- track locks ----
+
+    @staticmethod
+    def _share(track: Path):
+        """Open `track` holding a shared lock that keeps it from eviction."""
+        handle = open(track, 'rb')
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_SH)
+        return handle
+
+    @staticmethod
+    def _in_use(track: Path) -> bool:
+        """Whether some thread or process holds a shared lock on `track`."""
+        if fcntl is None:
+            return False
+        try:
+            with open(track, 'rb') as handle:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return True
+                fcntl.flock(handle, fcntl.LOCK_UN)
+        except FileNotFoundError:
+            pass
+        return False
+
+    # ---- keys ----
+
+    def key_for(self, input_file: Path) -> str:
+        input_file = Path(input_file).resolve()
+        st = input_file.stat()
+        stat_key = (str(input_file), st.st_size, st.st_mtime_ns)
+        if stat_key not in self._stat_keys:
+            raw = f"{stat_key[0]}|{st.st_size}|{st.st_mtime_ns}|{content_fingerprint(input_file)}"
+            self._stat_keys[stat_key] = hashlib.sha1(raw.encode('utf-8')).hexdigest()
+        return self._stat_keys[stat_key]
+
+    # ---- public API ----
+
+    @contextmanager
+    def use_track(self, input_file: str | Path,
+                  log_callback: Optional[Callable[[str], None]] = None) -> Iterator[Path]:
+        """
+        Path of the cached audio-only track of `input_file`, extracting it
+        on a miss; the track is not evicted until the block exits. Raises
+        RuntimeError if ffmpeg fails.
+        """
+        input_file = Path(input_file).resolve()
+        key = self.key_for(input_file)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        handle = None
+        with key_lock:
+            with self._index_locked():
+                index = self._read_index()
+                entry = index.get(key)
+                if entry and (self.cache_dir / entry['file']).exists():
+                    track = self.cache_dir / entry['file']
+                    handle = self._share(track)
+                    entry['last_used'] = time.time()
+                    self._write_index(index)
+                    CACHE_REQUESTS.labels(cache="audio_track", result="hit").inc()
+
+            if handle is None:
+                CACHE_REQUESTS.labels(cache="audio_track", result="miss").inc()
+                track = self._extract(input_file, key, log_callback)
+                with self._index_locked():
+                    handle = self._share(track)
+                    index = self._read_index()
+                    index[key] = {
+                        'file': track.name,
+                        'bytes': track.stat().st_size,
+                        'source': str(input_file),
+                        'last_used': time.time(),
+                    }
+                    self._evict(index, keep=key)
+                    self._write_index(index)
+        try:
+            yield track
+        finally:
+            handle.close()  # closing drops the shared lock
+
+    def _extract(self, input_file: Path, key: str,
+                 log_callback: Optional[Callable[[str], None]]) -> Path:
+        codec = probe_audio_codec(str(input_file))
+        if codec is None:
+            raise RuntimeError(f"No audio stream in {input_file}")
+        if codec in STREAM_COPY_CONTAINERS:
+            ext, codec_args = 'mka', ['-acodec', 'copy']
+        else:
+            ext, codec_args = 'm4a', ['-acodec', 'aac']
+        track = self.cache_dir / f"{key}.{ext}"
+        tmp = self.cache_dir / f"{key}.{os.getpid()}.part.{ext}"
+        cmd = ['ffmpeg', '-v', 'error', '-y', '-i', str(input_file),
+               '-map', '0:a:0', '-vn', '-sn', '-dn', *codec_args, str(tmp)]
+        if log_callback:
+            log_callback(f"Extracting audio track to cache: {' '.join(cmd)}")
+        proc = subprocess.run(cmd, stdout=subprocess.DEVNULL,
+                              stderr=subprocess.PIPE, encoding='utf-8')
+        if proc.returncode != 0:
+            tmp.unlink(missing_ok=True)
+            raise RuntimeError(f"Audio track extraction failed: {proc.stderr.strip()}")
+        tmp.replace(track)
+        return track
+
+    def _evict(self, index: dict, keep: Optional[str] = None):
+        """
+        Drop least recently used tracks until the total fits max_bytes,
+        skipping tracks that are being cut from. Call with the index locked.
+        """
+        total = sum(e['bytes'] for e in index.values())
+        for key, entry in sorted(index.items(), key=lambda kv: kv[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key == keep or self._in_use(self.cache_dir / entry['file']):
+                continue
+            (self.cache_dir / entry['file']).unlink(missing_ok=True)
+            total -= entry['bytes']
+            del index[key]
+
+    def total_bytes(self) -> int:
+        with self._index_locked():
+            return sum(e['bytes'] for e in self._read_index().values())
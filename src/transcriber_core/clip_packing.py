@@ -0,0 +1,220 @@
+"""
+Short-clip packing.
+
+Every API call costs a request slot (and, for serialized providers, a
+cooldown) however short the audio is. For many short inputs (voice memos,
+songs) several clips are concatenated into one upload, separated by a
+little silence, and the returned words and segments are split back into
+one result per clip by timestamp.
+
+Each clip is decoded, resampled to 16 kHz mono (what Whisper works at),
+trimmed/padded to exactly its probed duration and re-encoded, so the
+offset of every clip in the pack is known exactly and the upload size is
+predictable from the bitrate.
+"""
+
+import math
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Dict, Any
+
+from src.transcriber_core.timestamp_transform import TimestampTransform
+
+PACK_SAMPLE_RATE = 16000
+DEFAULT_PACK_BITRATE = 64  # kbit/s, mono speech
+DEFAULT_GAP_SECONDS = 2.0
+
+
+class PackedClip:
+    """One input of a pack and where it starts within the packed audio."""
+
+    def __init__(self, path: Path, duration: float, offset: float):
+        self.path = Path(path)
+        self.duration = duration
+        self.offset = offset
+
+    def __repr__(self):
+        return f"PackedClip({self.path.name}, {self.duration:.1f}s @ {self.offset:.1f}s)"
+
+
+class ClipPack:
+    """Clips concatenated into one upload."""
+
+    def __init__(self, gap_seconds: float = DEFAULT_GAP_SECONDS):
+        self.gap_seconds = gap_seconds
+        self.clips: List[PackedClip] = []
+
+    @property
+    def duration(self) -> float:
+        if not self.clips:
+            return 0.0
+        last = self.clips[-1]
+        return last.offset + last.duration
+
+    def duration_with(self, clip_duration: float) -> float:
+        return self.duration + (self.gap_seconds if self.clips else 0) + clip_duration
+
+    def add(self, path: Path, duration: float):
+        offset = self.duration + (self.gap_seconds if self.clips else 0)
+        self.clips.append(PackedClip(path, duration, offset))
+
+
+def estimated_size(duration: float, bitrate_kbps: int = DEFAULT_PACK_BITRATE) -> int:
+    """Upload size in bytes for `duration` seconds at the pack bitrate, +2% container."""
+    return int(duration * bitrate_kbps * 1000 / 8 * 1.02)
+
+
+def plan_packs(clips: Sequence[Tuple[Path, float]],
+               max_bytes: int,
+               bitrate_kbps: int = DEFAULT_PACK_BITRATE,
+               gap_seconds: float = DEFAULT_GAP_SECONDS,
+               max_duration: Optional[float] = None) -> List[ClipPack]:
+    """
+    Greedily fill packs with clips, in the given order.
+
+    Args:
+        clips: (path, duration in seconds) of each short input
+        max_bytes: Upload size limit per pack
+        bitrate_kbps: Encoding bitrate of the packed audio
+        gap_seconds: Silence between clips
+        max_duration: Optional cap on the packed duration
+
+    Returns:
+        list: ClipPacks; a clip too large for any pack gets a pack of its own
+    """
+    packs: List[ClipPack] = []
+    current = ClipPack(gap_seconds)
+    for path, duration in clips:
+        total = current.duration_with(duration)
+        fits = estimated_size(total, bitrate_kbps) <= max_bytes and \
+            (max_duration is None or total <= max_duration)
+        if current.clips and not fits:
+            packs.append(current)
+            current = ClipPack(gap_seconds)
+        current.add(path, duration)
+    if current.clips:
+        packs.append(current)
+    return packs
+
+
+def pack_command(pack: ClipPack, output_file: Path,
+                 bitrate_kbps: int = DEFAULT_PACK_BITRATE) -> List[str]:
+    """ffmpeg command concatenating the pack's clips with silence between them."""
+    cmd = ["ffmpeg", "-y", "-v", "error"]
+    for clip in pack.clips:
+        cmd += ["-i", str(clip.path)]
+    filters, labels = [], []
+    for i, clip in enumerate(pack.clips):
+        # exact clip length, whatever the decoder produces at the edges
+        filters.append(
+            f"[{i}:a:0]aresample={PACK_SAMPLE_RATE},"
+            f"aformat=sample_fmts=fltp:channel_layouts=mono,"
+            f"atrim=duration={clip.duration:.3f},apad=whole_dur={clip.duration:.3f},"
+            f"asetpts=N/SR/TB[c{i}]")
+        if i:
+            filters.append(
+                f"anullsrc=r={PACK_SAMPLE_RATE}:cl=mono,"
+                f"atrim=duration={pack.gap_seconds:.3f}[g{i}]")
+            labels.append(f"[g{i}]")
+        labels.append(f"[c{i}]")
+    filters.append(f"{''.join(labels)}concat=n={len(labels)}:v=0:a=1[out]")
+    cmd += ["-filter_complex", ";".join(filters), "-map", "[out]",
+            "-c:a", "aac", "-b:a", f"{bitrate_kbps}k", str(output_file)]
+    return cmd
+
+
+def _midpoint(item: Dict[str, Any]) -> float:
+    return (item.get("start", 0.0) + item.get("end", item.get("start", 0.0))) / 2
+
+
+def _clamped(item: Dict[str, Any], duration: float) -> Dict[str, Any]:
+    item = dict(item)
+    for edge in ("start", "end"):
+        if edge in item:
+            item[edge] = min(max(item[edge], 0.0), duration)
+    return item
+
+
+def _split_text(text: str, words: List[List[dict]]) -> List[str]:
+    """
+    Cut a pack's punctuated text into the parts spoken in each clip: a clip
+    starts where its first word is found (searching on from the previous
+    clip's words, as merge_words walks the text) and runs up to the next
+    clip's start, so trailing punctuation stays with it.
+    """
+    starts: List[Optional[int]] = []
+    cursor = 0
+    for clip_words in words:
+        start = None
+        for word in clip_words:
+            token = word.get("word", "").strip()
+            if not token:
+                continue
+            found = text.find(token, cursor)
+            if found == -1:
+                continue  # the API's word differs from its text, skip it
+            if start is None:
+                start = found
+            cursor = found + len(token)
+        starts.append(start)
+
+    parts = []
+    for i, start in enumerate(starts):
+        if start is None:
+            parts.append("")
+            continue
+        end = next((s for s in starts[i + 1:] if s is not None), len(text))
+        parts.append(text[start:end].strip())
+    return parts
+
+
+def split_packed_result(result: Dict[str, Any], pack: ClipPack) -> List[Dict[str, Any]]:
+    """
+    Split the transcription of a pack into one result per clip.
+
+    A word or segment belongs to the clip whose span (extended by half the
+    gap on both sides) contains its midpoint; its timestamps are shifted
+    back to the clip's own timeline and clamped to it.
+    """
+    half_gap = pack.gap_seconds / 2
+    bounds = [clip.offset + clip.duration + half_gap for clip in pack.clips]
+
+    def owner(item) -> int:
+        mid = _midpoint(item)
+        for i, bound in enumerate(bounds):
+            if mid < bound:
+                return i
+        return len(bounds) - 1
+
+    words: List[List[dict]] = [[] for _ in pack.clips]
+    segments: List[List[dict]] = [[] for _ in pack.clips]
+    for word in result.get("words") or []:
+        words[owner(word)].append(word)
+    for segment in result.get("segments") or []:
+        segments[owner(segment)].append(segment)
+
+    texts = _split_text(result.get("text") or "", words)
+    results = []
+    for i, clip in enumerate(pack.clips):
+        part = {k: v for k, v in result.items()
+                if k not in ("words", "segments", "text", "duration")}
+        if "words" in result:
+            part["words"] = words[i]
+        if "segments" in result:
+            part["segments"] = segments[i]
+        part = TimestampTransform(offset=-clip.offset).apply(part)
+        for key in ("words", "segments"):
+            if key in part:
+                part[key] = [_clamped(item, clip.duration) for item in part[key]]
+        if segments[i]:
+            part["text"] = "".join(s.get("text", "") for s in segments[i]).strip()
+        else:
+            part["text"] = texts[i]
+        part["duration"] = clip.duration
+        part.pop("real_duration", None)
+        results.append(part)
+    return results
+
+
+def ceil_duration(duration: float) -> int:
+    """Whole-second slice length covering a clip."""
+    return int(math.ceil(duration))
@@ -0,0 +1,63 @@
+"""
+Parse ffmpeg's machine-readable progress output (`-progress pipe:1`).
+
+ffmpeg writes blocks of `key=value` lines, each closed by
+`progress=continue` or, for the last one, `progress=end`:
+
+    out_time_us=12032000
+    speed=41.3x
+    progress=continue
+
+`PROGRESS_ARGS` are the global options that send these blocks to stdout
+and leave stderr to errors only.
+"""
+
+from typing import IO, Iterator, Optional
+
+PROGRESS_ARGS = ('-progress', 'pipe:1', '-nostats', '-loglevel', 'error')
+
+
+class FfmpegProgress:
+    """One progress block: output position, speed and whether ffmpeg is done."""
+
+    def __init__(self, out_seconds: float, speed: Optional[float], done: bool):
+        self.out_seconds = out_seconds
+        self.speed = speed
+        self.done = done
+
+    def fraction(self, duration: float) -> float:
+        """Fraction of `duration` seconds written, 1.0 once ffmpeg is done."""
+        if self.done:
+            return 1.0
+        if not duration:
+            return 0.0
+        return max(0.0, min(1.0, self.out_seconds / duration))
+
+
+def _parse_speed(value: str) -> Optional[float]:
+    # "41.3x", " 1.02x", or "N/A" before the first frame
+    try:
+        return float(value.strip().rstrip('x'))
+    except ValueError:
+        return None
+
+
+def read_progress(stream: IO[str]) -> Iterator[FfmpegProgress]:
+    """
+    Yield a FfmpegProgress for every block ffmpeg writes to `stream`,
+    until it closes the stream.
+    """
+    out_us = 0
+    speed = None
+    for line in stream:
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            continue
+        if key in ('out_time_us', 'out_time_ms'):
+            # out_time_ms is microseconds as well (a long-standing misnomer)
+            if value.isdigit():
+                out_us = int(value)
+        elif key == 'speed':
+            speed = _parse_speed(value)
+        elif key == 'progress':
+            yield FfmpegProgress(out_us / 1_000_000, speed, value == 'end')
@@ -0,0 +1,262 @@
+"""
+Rate limiting for {provider x model} API calls, as configured under
+`api.models.<model>.providers.<provider>.rate-limit` in config.yaml:
+
+- serialized: one call at a time, `cooldown-seconds` between the previous
+  call returning and the next one starting.
+- concurrent: at most `max-concurrent-calls` in flight and at most
+  `requests-per-minute` started in any 60 second window.
+
+RateLimiter enforces this within one process. SharedRateLimiter keeps the
+state in an SQLite file instead, so every process on the host using the
+same state directory (GUI, batch runs, watchers, workers) shares one budget.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Any, Iterator
+
+from src.transcriber_core.processes import pid_alive
+
+
+class RateLimiter:
+    """
+    In-process limiter shared by every thread calling one provider x model.
+
+    Args:
+        limit_type: "serialized" or "concurrent"
+        requests_per_minute: Start rate cap for concurrent mode, None = no cap
+        max_concurrent_calls: In-flight cap for concurrent mode
+        cooldown_seconds: Pause between calls in serialized mode
+    """
+
+    def __init__(self, limit_type: str = "serialized",
+                 requests_per_minute: Optional[int] = None,
+                 max_concurrent_calls: int = 1,
+                 cooldown_seconds: float = 0):
+        if limit_type not in ("serialized", "concurrent"):
+            raise ValueError(f"Unknown rate-limit type: {limit_type}")
+        self.limit_type = limit_type
+        self.requests_per_minute = requests_per_minute
+        self.max_concurrent_calls = 1 if limit_type == "serialized" else max(1, max_concurrent_calls)
+        self.cooldown_seconds = cooldown_seconds if limit_type == "serialized" else 0
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._starts = deque()  # start times within the last minute
+        self._last_finished = 0.0
+
+    @classmethod
+    def from_config(cls, rate_limit_config: Optional[Dict[str, Any]]) -> "RateLimiter":
+        config = rate_limit_config or {}
+        limit_type = config.get("type", "serialized")
+        concurrent = config.get("concurrent-settings") or {}
+        serialized = config.get("serialized-settings") or {}
+        return cls(limit_type,
+                   requests_per_minute=concurrent.get("requests-per-minute"),
+                   max_concurrent_calls=int(concurrent.get("max-concurrent-calls", 1)),
+                   cooldown_seconds=float(serialized.get("cooldown-seconds", 0)))
+
+    def _wait_time(self, now: float) -> float:
+        """Seconds until a call may start, 0 if it may start now."""
+        if self._in_flight >= self.max_concurrent_calls:
+            return float("inf")  # woken up by release()
+        wait = 0.0
+        if self.cooldown_seconds and self._last_finished:
+            wait = max(wait, self._last_finished + self.cooldown_seconds - now)
+        if self.requests_per_minute:
+            while self._starts and self._starts[0] <= now - 60:
+                self._starts.popleft()
+            if len(self._starts) >= self.requests_per_minute:
+                wait = max(wait, self._starts[0] + 60 - now)
+        return wait
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    break
+                self._cond.wait(None if wait == float("inf") else wait)
+            self._in_flight += 1
+            self._starts.append(now)
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._last_finished = time.monotonic()
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one call slot for the duration of the block."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+_SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS holders (
+    key TEXT NOT NULL,
+    token TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    acquired_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS starts (
+    key TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS starts_key ON starts (key, started_at);
+CREATE TABLE IF NOT EXISTS last_finished (
+    key TEXT PRIMARY KEY,
+    finished_at REAL NOT NULL
+);
+"""
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Host-wide limiter: in-flight calls, recent starts and the last finish
+    time live in `<state_dir>/rate_limits.sqlite`, updated in
+    `BEGIN IMMEDIATE` transactions, so all processes see one budget.
+    Waiting processes poll; calls held by processes that died are dropped,
+    as are holds older than `stale_seconds`.
+
+    Args:
+        key: Budget name, "<model>@<provider>"
+        state_dir: Directory of the shared database
+        stale_seconds: Age after which a held slot is considered leaked
+        poll_interval: Longest sleep between checks while waiting
+        others as for RateLimiter
+    """
+
+    def __init__(self, key: str, state_dir: str | Path,
+                 limit_type: str = "serialized",
+                 requests_per_minute: Optional[int] = None,
+                 max_concurrent_calls: int = 1,
+                 cooldown_seconds: float = 0,
+                 stale_seconds: float = 900,
+                 poll_interval: float = 0.25):
+        super().__init__(limit_type, requests_per_minute, max_concurrent_calls,
+                         cooldown_seconds)
+        self.key = key
+        self.stale_seconds = stale_seconds
+        self.poll_interval = poll_interval
+        Path(state_dir).mkdir(parents=True, exist_ok=True)
+        self.db_path = str(Path(state_dir) / "rate_limits.sqlite")
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, timeout=60, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.executescript(_SHARED_SCHEMA)
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, rate_limit_config: Optional[Dict[str, Any]],
+                    key: str = "", state_dir: str | Path = ".") -> "SharedRateLimiter":
+        base = RateLimiter.from_config(rate_limit_config)
+        return cls(key, state_dir, base.limit_type, base.requests_per_minute,
+                   base.max_concurrent_calls, base.cooldown_seconds)
+
+    def _purge(self, now: float):
+        rows = self._conn.execute(
+            "SELECT token, pid, acquired_at FROM holders WHERE key=?", (self.key,)).fetchall()
+        for token, pid, acquired_at in rows:
+            if acquired_at < now - self.stale_seconds or not pid_alive(pid):
+                self._conn.execute("DELETE FROM holders WHERE token=?", (token,))
+        self._conn.execute("DELETE FROM starts WHERE key=? AND started_at <= ?",
+                           (self.key, now - 60))
+
+    def _try_acquire(self) -> float:
+        """Take a slot if possible; returns 0 on success, else seconds to wait."""
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                self._purge(now)
+                in_flight = self._conn.execute(
+                    "SELECT COUNT(*) FROM holders WHERE key=?", (self.key,)).fetchone()[0]
+                wait = 0.0
+                if in_flight >= self.max_concurrent_calls:
+                    wait = self.poll_interval
+                if self.cooldown_seconds:
+                    row = self._conn.execute(
+                        "SELECT finished_at FROM last_finished WHERE key=?",
+                        (self.key,)).fetchone()
+                    if row:
+                        wait = max(wait, row[0] + self.cooldown_seconds - now)
+                if self.requests_per_minute:
+                    starts = self._conn.execute(
+                        "SELECT started_at FROM starts WHERE key=? ORDER BY started_at",
+                        (self.key,)).fetchall()
+                    if len(starts) >= self.requests_per_minute:
+                        wait = max(wait, starts[0][0] + 60 - now)
+                if wait <= 0:
+                    token = uuid.uuid4().hex
+                    self._conn.execute("INSERT INTO holders VALUES (?, ?, ?, ?)",
+                                       (self.key, token, os.getpid(), now))
+                    self._conn.execute("INSERT INTO starts VALUES (?, ?)", (self.key, now))
+                    self._tokens().append(token)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        return max(0.0, wait)
+
+    def _tokens(self) -> list:
+        if not hasattr(self._local, "tokens"):
+            self._local.tokens = []
+        return self._local.tokens
+
+    def acquire(self):
+        while True:
+            wait = self._try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(min(wait, self.poll_interval))
+
+    def release(self):
+        tokens = self._tokens()
+        token = tokens[-1]
+        with self._db_lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM holders WHERE token=?", (token,))
+                self._conn.execute("INSERT OR REPLACE INTO last_finished VALUES (?, ?)",
+                                   (self.key, time.time()))
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+        # only now: if the release failed, the slot is still ours to release
+        tokens.pop()
+
+
+_limiters: Dict[tuple, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str, provider: str,
+                     rate_limit_config: Optional[Dict[str, Any]],
+                     shared_state_dir: Optional[str | Path] = None) -> RateLimiter:
+    """
+    Process-wide limiter per (model, provider), created on first use. With
+    `shared_state_dir` the budget is shared with every process using that
+    directory.
+    """
+    with _limiters_lock:
+        key = (model, provider)
+        if key not in _limiters:
+            if shared_state_dir is not None:
+                _limiters[key] = SharedRateLimiter.from_config(
+                    rate_limit_config, f"{model}@{provider}", shared_state_dir)
+            else:
+                _limiters[key] = RateLimiter.from_config(rate_limit_config)
+        return _limiters[key]
@@ -0,0 +1,156 @@
+"""
+Temp workspace for audio segments cut by ffmpeg.
+
+Every (file, slice, attempt) gets its own slot directory, so any number of
+segments can be in flight without overwriting each other. Slots live under
+a per-process directory `ws-<pid>`; directories of dead processes are
+reclaimed when a new workspace starts, so crashed runs do not leak files.
+
+The total bytes reserved by live slots is capped; `allocate` blocks until
+enough reservations have been released. Small segments go to tmpfs
+(/dev/shm) when it has room, which keeps short uploads off the disk.
+"""
+
+import atexit
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Iterator
+
+from src.transcriber_core.processes import pid_alive
+
+# API hard limit per upload, the worst case a slot can grow to
+DEFAULT_RESERVATION = 25 * 1024 * 1024
+_MEMORY_ROOT = Path("/dev/shm")
+_WS_PREFIX = "ws-"
+
+
+class WorkspaceSlot:
+    """Private directory for one segment attempt."""
+
+    def __init__(self, directory: Path, reserved_bytes: int):
+        self.directory = directory
+        self.reserved_bytes = reserved_bytes
+
+    def path_for(self, name: str) -> Path:
+        return self.directory / name
+
+
+class TempWorkspace:
+    """
+    Collision-free temp paths with a byte budget.
+
+    Args:
+        root: Disk directory for slots (usually paths.tmp_dir)
+        max_bytes: Cap on bytes reserved by live slots of this process
+        memory_max_segment_bytes: Segments expected up to this size go to
+            tmpfs when available; 0 disables tmpfs
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int,
+                 memory_max_segment_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.memory_max_segment_bytes = memory_max_segment_bytes
+        self._reserved = 0
+        self._counter = 0
+        self._cond = threading.Condition()
+
+        self.disk_dir = Path(root) / f"{_WS_PREFIX}{os.getpid()}"
+        self.memory_dir = None
+        if memory_max_segment_bytes > 0 and os.access(_MEMORY_ROOT, os.W_OK):
+            self.memory_dir = _MEMORY_ROOT / "openai-api-transcriber" / f"{_WS_PREFIX}{os.getpid()}"
+
+        for base in (Path(root), self.memory_dir and self.memory_dir.parent):
+            if base is not None:
+                self.reclaim_orphans(base)
+        atexit.register(self.close)
+
+    def close(self):
+        """Remove this process's workspace directories."""
+        for directory in (self.disk_dir, self.memory_dir):
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    @staticmethod
+    def reclaim_orphans(base: Path) -> int:
+        """Remove `ws-<pid>` directories whose process is gone; returns count."""
+        removed = 0
+        if not base.is_dir():
+            return removed
+        for entry in base.iterdir():
+            if not (entry.is_dir() and entry.name.startswith(_WS_PREFIX)):
+                continue
+            try:
+                pid = int(entry.name[len(_WS_PREFIX):])
+            except ValueError:
+                continue
+            if pid != os.getpid() and not pid_alive(pid):
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+        return removed
+
+    @property
+    def reserved_bytes(self) -> int:
+        return self._reserved
+
+    def _choose_base(self, expected_bytes: int) -> Path:
+        if self.memory_dir is not None and expected_bytes <= self.memory_max_segment_bytes:
+            self.memory_dir.mkdir(parents=True, exist_ok=True)
+            # leave headroom for other tmpfs users
+            if shutil.disk_usage(self.memory_dir).free > 4 * expected_bytes:
+                return self.memory_dir
+        return self.disk_dir
+
+    @contextmanager
+    def allocate(self, file_stem: str, slice_index: int, attempt: int = 0,
+                 expected_bytes: Optional[int] = None,
+                 cleanup: bool = True,
+                 timeout: Optional[float] = None) -> Iterator[WorkspaceSlot]:
+        """
+        Reserve a slot for one segment attempt, blocking while the byte cap
+        is reached. The slot directory is removed on exit unless `cleanup`
+        is False; the reservation is always released.
+
+        Raises:
+            TimeoutError: If no room frees up within `timeout` seconds.
+        """
+        need = min(expected_bytes or DEFAULT_RESERVATION, self.max_bytes)
+        with self._cond:
+            # a single oversized reservation still runs when nothing else does
+            if not self._cond.wait_for(
+                    lambda: self._reserved == 0 or self._reserved + need <= self.max_bytes,
+                    timeout):
+                raise TimeoutError("Temp workspace budget exhausted")
+            self._reserved += need
+            self._counter += 1
+            serial = self._counter
+
+        directory = self._choose_base(need) / f"{file_stem}_s{slice_index}_a{attempt}_{serial}"
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            yield WorkspaceSlot(directory, need)
+        finally:
+            if cleanup:
+                shutil.rmtree(directory, ignore_errors=True)
+            with self._cond:
+                self._reserved -= need
+                self._cond.notify_all()
+
+
+_workspaces: Dict[str, TempWorkspace] = {}
+_workspaces_lock = threading.Lock()
+
+
+def get_workspace(root: str | Path, max_bytes: int,
+                  memory_max_segment_bytes: int = 0) -> TempWorkspace:
+    """
+    Process-wide workspace under `root`, created with the given limits on
+    first use; every transcriber of the process shares its byte cap.
+    """
+    key = str(Path(root).resolve())
+    with _workspaces_lock:
+        if key not in _workspaces:
+            _workspaces[key] = TempWorkspace(root, max_bytes, memory_max_segment_bytes)
+        return _workspaces[key]
@@ -0,0 +1,114 @@
+import math
+from typing import Optional, Sequence, Dict, Any, List
+
+import numpy as np
+
+
+class TimestampTransform:
+    """
+    Batched timestamp transform for Whisper `verbose_json` results.
+
+    A timestamp t is mapped to
+
+        remap(t) * scale + offset
+
+    where `remap` is an optional piecewise-linear function given by knots
+    (src_times -> dst_times), extrapolated linearly past both ends. All word
+    and segment timestamps of a result are transformed as whole NumPy columns.
+    """
+
+    def __init__(self,
+                 offset: float = 0.0,
+                 scale: float = 1.0,
+                 remap_src: Optional[Sequence[float]] = None,
+                 remap_dst: Optional[Sequence[float]] = None):
+        self.offset = offset
+        self.scale = scale
+        if (remap_src is None) != (remap_dst is None):
+            raise ValueError("remap_src and remap_dst must be given together")
+        if remap_src is not None:
+            self.remap_src = np.asarray(remap_src, dtype=np.float64)
+            self.remap_dst = np.asarray(remap_dst, dtype=np.float64)
+            if len(self.remap_src) != len(self.remap_dst) or len(self.remap_src) < 2:
+                raise ValueError("remap needs at least 2 matching knots")
+            if np.any(np.diff(self.remap_src) <= 0):
+                raise ValueError("remap_src must be strictly increasing")
+        else:
+            self.remap_src = self.remap_dst = None
+
+    def is_identity(self) -> bool:
+        return self.offset == 0 and self.scale == 1 and self.remap_src is None
+
+    def apply_array(self, times: np.ndarray) -> np.ndarray:
+        """Transform an array of timestamps, NaN entries stay NaN."""
+        t = np.asarray(times, dtype=np.float64)
+        if self.remap_src is not None:
+            src, dst = self.remap_src, self.remap_dst
+            mapped = np.interp(t, src, dst)
+            # np.interp clamps; continue the first/last piece instead
+            lo_slope = (dst[1] - dst[0]) / (src[1] - src[0])
+            hi_slope = (dst[-1] - dst[-2]) / (src[-1] - src[-2])
+            below, above = t < src[0], t > src[-1]
+            mapped[below] = dst[0] + (t[below] - src[0]) * lo_slope
+            mapped[above] = dst[-1] + (t[above] - src[-1]) * hi_slope
+            t = mapped
+        if self.scale != 1:
+            t = t * self.scale
+        if self.offset != 0:
+            t = t + self.offset
+        return t
+
+    def apply_scalar(self, value: float) -> float:
+        return float(self.apply_array(np.array([value]))[0])
+
+    def _apply_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Return new dicts with transformed 'start'/'end'; every other value
+        (text, tokens, ...) is shared with the input, not copied.
+        """
+        n = len(items)
+        if n == 0:
+            return []
+        nan = math.nan
+        starts = self.apply_array(np.fromiter(
+            (it.get('start', nan) for it in items), dtype=np.float64, count=n)).tolist()
+        ends = self.apply_array(np.fromiter(
+            (it.get('end', nan) for it in items), dtype=np.float64, count=n)).tolist()
+        adjusted = []
+        for it, start, end in zip(items, starts, ends):
+            new_item = dict(it)
+            if 'start' in it:
+                new_item['start'] = start
+            if 'end' in it:
+                new_item['end'] = end
+            adjusted.append(new_item)
+        return adjusted
+
+    def apply(self, result: dict) -> dict:
+        """
+        Transform a transcription result.
+
+        Args:
+            result: Whisper verbose_json result, left unmodified
+
+        Returns:
+            dict: New result with transformed 'duration', word and segment
+                timestamps, and 'real_duration' holding the original duration.
+                The input is returned as-is for an identity transform.
+        """
+        if not result or self.is_identity():
+            return result
+
+        adjusted = dict(result)
+
+        # preserve whisper-transcribed duration
+        if 'duration' in result:
+            adjusted['real_duration'] = result['duration']
+            adjusted['duration'] = self.apply_scalar(result['duration'])
+
+        if 'words' in result:
+            adjusted['words'] = self._apply_items(result['words'])
+        if 'segments' in result:
+            adjusted['segments'] = self._apply_items(result['segments'])
+
+        return adjusted
@@ -1,9 +1,32 @@
+import io
 import os
-import json
+import subprocess
+import threading
+import time
 import requests
+from contextlib import ExitStack
+from urllib3.filepost import encode_multipart_formdata
 from pathlib import Path
-from typing import Optional, Callable
+from typing import Optional, Callable, List
 from src.configuration_manager.configuration_manager import ConfigManager
+from src.transcriber_core.timestamp_transform import TimestampTransform
+from src.result_codec.json_codec import ResultCodec
+from src.time_slicer.probe_media_file import probe_audio_stream
+from src.transcriber_core.audio_formats import (
+    STREAM_COPY_CONTAINERS, REENCODE_CONTAINER, REENCODE_BITRATE_KBPS)
+from src.transcriber_core.audio_track_cache import AudioTrackCache, content_fingerprint
+from src.transcriber_core.temp_workspace import get_workspace
+from src.transcriber_core.rate_limiter import RateLimiter, get_rate_limiter
+from src.transcriber_core.transport import TranscriptionRequest, get_transport
+from src.transcriber_core.ffmpeg_progress import PROGRESS_ARGS, read_progress
+from src.telemetry.tracing import get_tracer
+from src.telemetry.events import BUS, DEBUG, INFO, WARNING, Progress, log
+from src.telemetry.metrics import (
+    SEGMENTS_IN_FLIGHT, SEGMENTS_TOTAL, RETRIES_TOTAL, ERRORS_TOTAL,
+    BYTES_UPLOADED, AUDIO_SECONDS, API_LATENCY)
+from src.transcriber_core.clip_packing import (
+    ClipPack, DEFAULT_PACK_BITRATE, pack_command, split_packed_result,
+    estimated_size, ceil_duration)
 
 class WhisperTranscriber:
     def __init__(self):
@@ -16,12 +39,39 @@ class WhisperTranscriber:
         # Create necessary directories
         self.tmp_dir.mkdir(exist_ok=True)
         self.result_dir.mkdir(exist_ok=True)
+
+        # compact JSON by default, see tasks.transcription.result-format
+        task_config = self.config_manager.get_transcription_task_config()
+        self.result_codec = ResultCodec.from_config(task_config.get('result-format'))
+
+        # demuxed audio-only tracks reused across segments, runs and models
+        cache_config = task_config.get('audio-track-cache') or {}
+        self.audio_track_cache = None
+        if cache_config.get('enabled', True):
+            self.audio_track_cache = AudioTrackCache(
+                self.tmp_dir / 'audio_tracks',
+                int(cache_config.get('max-size', 4096)) * 1024 * 1024)
+
+        # per-segment temp slots under a byte cap; also reclaims the slots
+        # of crashed runs
+        workspace_config = task_config.get('temp-workspace') or {}
+        self.workspace = get_workspace(
+            self.tmp_dir,
+            int(workspace_config.get('max-size', 512)) * 1024 * 1024,
+            int(workspace_config.get('memory-segment-max-size', 32)) * 1024 * 1024)
         
         # self.api_key = Path("api_key_archive").read_text().strip()
         # self.api_endpoint = Path("api_endpoint").read_text().strip() + "/v1/audio/transcriptions"
         
         self.current_model = None
         self.current_provider = None
+        self.rate_limiter = None
+        self._audio_streams = {}  # resolved input path -> probed audio stream
+
+        # per-stage timing spans, see tasks.transcription.trace
+        self.tracer = get_tracer(task_config.get('trace'), self.tmp_dir)
+        # live, record or replay, see tasks.transcription.transport
+        self.transport = get_transport(task_config.get('transport'), self.tmp_dir)
 
     def set_model_and_provider(self, model: str, provider: str) -> bool:
         """
@@ -52,7 +102,7 @@ class WhisperTranscriber:
             return False
         
         self.api_key = self.config_manager.get_provider_token(provider)
-        if not self.api_key:
+        if not self.api_key and self.transport.mode != "replay":
             print(f"Error: No API token configured for provider '{provider}'")
             return False
         
@@ -68,19 +118,57 @@ class WhisperTranscriber:
         self.current_model = model
         self.current_provider = provider
         self.rate_limit_config = model_config['providers'][provider].get('rate-limit', {})
+        # shared by every transcriber of this process using the same pair,
+        # and with other processes too unless shared-rate-limit is off
+        shared_config = self.config_manager.get_transcription_task_config().get(
+            'shared-rate-limit') or {}
+        shared_dir = None
+        if shared_config.get('enabled', True):
+            shared_dir = shared_config.get('state-dir') or self.tmp_dir
+        self.rate_limiter = get_rate_limiter(model, provider, self.rate_limit_config,
+                                             shared_dir)
         
         # Add API endpoint suffix for transcription
         self.api_endpoint = f"{self.api_endpoint}/v1/audio/transcriptions"
         
         return True
 
+    def use_endpoint(self, model: str, provider: str, endpoint: str, api_key: str,
+                     rate_limit_config: Optional[dict] = None,
+                     timestamp_granularities: str = 'word',
+                     proxies: Optional[dict] = None):
+        """
+        Point the transcriber at an API base URL directly, bypassing
+        config.yaml; for mock servers and benchmarks. The rate limiter is
+        private to this transcriber.
+
+        Args:
+            model: Model name sent with each request
+            provider: Provider name used in logs, traces and metrics
+            endpoint: Base URL, "/v1/audio/transcriptions" is appended
+            api_key: Bearer token
+            rate_limit_config: A `rate-limit` section as in config.yaml
+            timestamp_granularities: 'word' or 'segment'
+            proxies: Optional requests proxies
+        """
+        self.current_model = model
+        self.current_provider = provider
+        self.api_endpoint = f"{endpoint.rstrip('/')}/v1/audio/transcriptions"
+        self.api_key = api_key
+        self.proxy_settings = proxies
+        self.timestamp_granularities = timestamp_granularities
+        self.rate_limit_config = rate_limit_config or {}
+        self.rate_limiter = RateLimiter.from_config(self.rate_limit_config)
+
     def transcribe(self, 
                    input_file: str | Path, 
                    display_start: int,
                    actual_start: int, 
                    duration: int,
                    cleanup_tmp: bool = True,
-                   log_callback: Optional[Callable[[str], None]] = None) -> Optional[dict]:
+                   log_callback: Optional[Callable[[str], None]] = None,
+                   segment_index: Optional[int] = None,
+                   attempt: int = 0) -> Optional[dict]:
         """
         Transcribe an audio segment using OpenAI's Whisper API.
         
@@ -91,11 +179,45 @@ class WhisperTranscriber:
             duration: Duration to transcribe in seconds
             cleanup_tmp: Whether to remove temporary files after transcription
             log_callback: Optional callback function for logging
+            segment_index: Index of the slice within the file, names the temp
+                slot (defaults to display_start)
+            attempt: Retry counter, so retries never share temp files
             
         Returns:
             dict: Transcription result from Whisper API
             None: If transcription fails
         """
+        lane = self._metric_labels()
+        if attempt:
+            RETRIES_TOTAL.labels(**lane).inc()
+        in_flight = SEGMENTS_IN_FLIGHT.labels(**lane)
+        in_flight.inc()
+        try:
+            tags = dict(model=self.current_model, provider=self.current_provider,
+                        file=Path(input_file).stem,
+                        segment=display_start if segment_index is None else segment_index,
+                        attempt=attempt)
+            with self.tracer.context(**tags), BUS.context(**tags):
+                with self.tracer.span("segment", audio_seconds=duration) as span:
+                    result = self._transcribe(input_file, display_start, actual_start,
+                                              duration, cleanup_tmp, log_callback,
+                                              segment_index, attempt)
+                    span.set(ok=result is not None)
+        finally:
+            in_flight.dec()
+        SEGMENTS_TOTAL.labels(**lane, outcome="ok" if result is not None else "error").inc()
+        if result is not None:
+            AUDIO_SECONDS.labels(**lane).inc(duration)
+        return result
+
+    def _metric_labels(self) -> dict:
+        return {'provider': self.current_provider or '', 'model': self.current_model or ''}
+
+    def _transcribe(self, input_file, display_start, actual_start, duration,
+                    cleanup_tmp, log_callback, segment_index, attempt) -> Optional[dict]:
+        """transcribe() without the tracing context."""
+        # holds the cached track, if any, so it is not evicted mid-cut
+        sources = ExitStack()
         try:
             # Set the log callback for configuration manager
             self.config_manager.set_log_callback(log_callback)
@@ -105,98 +227,190 @@ class WhisperTranscriber:
             # Prepare file paths
             input_path = Path(input_file).resolve()
             file_stem = input_path.stem
-            output_format = self._get_output_format(input_path)
-            audio_segment = self.tmp_dir / f"{file_stem}_cut.{output_format}"
-            
-            # Cut audio segment using ffmpeg
-            self._log(log_callback, "Cutting audio segment...")
-            if not self._cut_audio_segment(
-                input_path, audio_segment, actual_start, duration, log_callback):
-                return None
-
-            # Prepare output directory and file
-            result_dir = self.result_dir / file_stem
-            result_dir.mkdir(exist_ok=True)
-            result_file = result_dir / \
-                f"{audio_segment.stem}_ss{display_start}-t{duration}.json"
-            self._log(log_callback, f"...{result_file}")
-
-            # Call Whisper API
-            self._log(log_callback, "Calling Whisper API...")
-            result = self._call_whisper_api(
-                audio_segment, 
-                result_file, 
-                actual_start,
-                display_start,
-                log_callback
-            )
+            with self.tracer.span("audio_source"):
+                source_path = self._get_audio_source(input_path, sources, log_callback)
+                output_format, stream_copy = self._plan_extraction(source_path, log_callback)
+
+            # every (file, slice, attempt) cuts into its own workspace slot
+            wait_started = time.perf_counter()
+            with self.workspace.allocate(
+                    file_stem,
+                    display_start if segment_index is None else segment_index,
+                    attempt,
+                    expected_bytes=self._expected_segment_bytes(
+                        source_path, duration, stream_copy),
+                    cleanup=cleanup_tmp) as slot:
+                self.tracer.record("workspace_wait",
+                                   (time.perf_counter() - wait_started) * 1000)
+                audio_segment = slot.path_for(f"{file_stem}_cut.{output_format}")
 
-            # Cleanup if requested
-            if cleanup_tmp and audio_segment.exists():
-                self._log(log_callback, "Cleaning up temporary files...")
-                audio_segment.unlink()
+                # Cut audio segment using ffmpeg
+                self._log(log_callback, "Cutting audio segment...")
+                if not self._traced_cut(
+                    source_path, audio_segment, actual_start, duration, log_callback,
+                    stream_copy=stream_copy):
+                    if not stream_copy:
+                        return None
+                    # odd bitstreams may refuse to remux, re-encode instead
+                    self._log(log_callback, "Stream copy failed, re-encoding...", level=WARNING)
+                    audio_segment = slot.path_for(f"{file_stem}_cut.{REENCODE_CONTAINER}")
+                    if not self._traced_cut(
+                        source_path, audio_segment, actual_start, duration, log_callback,
+                        stream_copy=False):
+                        return None
+                sources.close()
+
+                # Prepare output directory and file
+                result_file = self.result_file_for(input_path, display_start, duration)
+                result_file.parent.mkdir(parents=True, exist_ok=True)
+                self._log(log_callback, "...%s", result_file, level=DEBUG)
+
+                # Call Whisper API
+                self._log(log_callback, "Calling Whisper API...")
+                result = self._call_whisper_api(
+                    audio_segment, 
+                    result_file, 
+                    actual_start,
+                    display_start,
+                    log_callback,
+                    source_key=self._source_key(
+                        lambda: f"{content_fingerprint(input_path)}@{actual_start}+{duration}")
+                )
+
+                # the slot and its files are removed on exit when cleanup_tmp
+                if cleanup_tmp:
+                    self._log(log_callback, "Cleaning up temporary files...", level=DEBUG)
 
             
             if result:
                 self._log(log_callback, "Transcription completed successfully C.")
             else:
-                self._log(log_callback, "Transcription failed.")
+                self._log(log_callback, "Transcription failed.", level=WARNING)
 
             return result
 
         except Exception as e:
-            self._log(log_callback, f"Transcription failed: {e}")
+            self._log(log_callback, "Transcription failed: %s", e, level=WARNING)
             return None
+        finally:
+            sources.close()
+
+    def _get_audio_source(self, input_path: Path, sources: ExitStack,
+                          log_callback: Optional[Callable[[str], None]] = None) -> Path:
+        """
+        Cached audio-only track of the input if the cache is enabled, else
+        the input. The track stays in use until `sources` is closed.
+        """
+        if self.audio_track_cache is None:
+            return input_path
+        try:
+            return sources.enter_context(
+                self.audio_track_cache.use_track(input_path, log_callback))
+        except Exception as e:
+            self._log(log_callback, "Audio track cache unavailable, cutting from source: %s", e,
+                      level=WARNING)
+            return input_path
+
+    def _get_audio_stream(self, input_file: Path,
+                          log_callback: Optional[Callable[[str], None]] = None) -> Optional[dict]:
+        """Probe the input's first audio stream once per file."""
+        key = str(input_file)
+        if key not in self._audio_streams:
+            try:
+                self._audio_streams[key] = probe_audio_stream(key, self.tmp_dir)
+            except Exception as e:
+                self._log(log_callback, "Could not probe audio codec of %s: %s",
+                          input_file, e, level=WARNING)
+                self._audio_streams[key] = None
+        return self._audio_streams[key]
+
+    def _get_audio_codec(self, input_file: Path,
+                         log_callback: Optional[Callable[[str], None]] = None) -> Optional[str]:
+        stream = self._get_audio_stream(input_file, log_callback)
+        return stream.get('codec_name') if stream else None
+
+    def _expected_segment_bytes(self, input_file: Path, duration: float,
+                                stream_copy: bool) -> Optional[int]:
+        """Size of a cut segment: the source's bit rate when copied, else the AAC encoder's."""
+        if not stream_copy:
+            return estimated_size(duration, REENCODE_BITRATE_KBPS)
+        stream = self._get_audio_stream(input_file)
+        bitrate = int((stream or {}).get('bit_rate') or 0)
+        return estimated_size(duration, bitrate / 1000) if bitrate else None
+
+    def _plan_extraction(self, input_file: Path,
+                         log_callback: Optional[Callable[[str], None]] = None) -> tuple[str, bool]:
+        """
+        Decide output container and whether the audio bitstream can be
+        copied, based on the probed codec rather than the file extension,
+        e.g. AAC in .mp4 is remuxed to .m4a and Opus in .mkv/.webm to .ogg.
+
+        Returns:
+            tuple: (output extension without dot, stream_copy)
+        """
+        codec = self._get_audio_codec(input_file, log_callback)
+        if codec in STREAM_COPY_CONTAINERS:
+            return STREAM_COPY_CONTAINERS[codec], True
+        return REENCODE_CONTAINER, False
 
     def _get_output_format(self, input_file: Path) -> str:
         """Determine appropriate output format based on input file."""
-        input_ext = input_file.suffix.lower()
-        
-        # For common lossy formats, maintain original format
-        if input_ext in ['.mp3']:
-            return input_ext[1:]  # Remove dot
-        
-        # For container formats (mp4, flv, etc), extract to m4a
-        return 'm4a'
+        return self._plan_extraction(input_file)[0]
+
+    def _traced_cut(self, input_file: Path, output_file: Path, start_time: int,
+                    duration: int, log_callback: Optional[Callable[[str], None]] = None,
+                    stream_copy: bool = False) -> bool:
+        """_cut_audio_segment inside an "ffmpeg_cut" span."""
+        with self.tracer.span("ffmpeg_cut", stream_copy=stream_copy) as span:
+            ok = self._cut_audio_segment(input_file, output_file, start_time, duration,
+                                         log_callback, stream_copy=stream_copy)
+            span.set(ok=ok, bytes=output_file.stat().st_size if ok else 0)
+        if not ok:
+            ERRORS_TOTAL.labels(**self._metric_labels(), error="ffmpeg").inc()
+        return ok
 
     def _cut_audio_segment(self, 
                         input_file: Path, 
                         output_file: Path, 
                         start_time: int, 
                         duration: int,
-                        log_callback: Optional[Callable[[str], None]] = None) -> bool:
-        """Cut audio segment using ffmpeg with format-specific optimizations."""
+                        log_callback: Optional[Callable[[str], None]] = None,
+                        stream_copy: bool = False) -> bool:
+        """
+        Cut audio segment using ffmpeg. With `stream_copy` the first audio
+        stream's packets are remuxed untouched; audio packets are all
+        independently decodable, so input seeking cuts on packet boundaries.
+        """
         import ffmpeg
         import subprocess
         try:
             # Base stream with timing
             stream = ffmpeg.input(str(input_file), ss=start_time, t=duration)
             
-            # Get input format
-            input_ext = input_file.suffix.lower()
-            output_ext = output_file.suffix.lower()
-            
             # Configure output options based on format
             output_options = {
+                'map': '0:a:0',  # first audio stream only
                 'vn': None,  # No video
+                'sn': None,  # No subtitles
+                'dn': None,  # No data streams
             }
             
-            # For lossy sources, use copy codec when format matches
-            if input_ext == output_ext and input_ext in ['.mp3', '.m4a']:
+            if stream_copy:
                 output_options['acodec'] = 'copy'
 
             # TODO: else re-encode to around up to 16khz quality per Whisper architecture.
             
-            # Build ffmpeg command
+            # Build ffmpeg command; progress blocks on stdout, stderr for errors only
             cmd = (
                 stream
                 .output(str(output_file), **output_options)
+                .global_args(*PROGRESS_ARGS)
                 .overwrite_output()  # Add this line to overwrite existing files
                 .compile()
             )
             
             # Print the command that will be executed
-            self._log(log_callback, f"Executing FFmpeg command: {' '.join(cmd)}")
+            self._log(log_callback, "Executing FFmpeg command: %s", ' '.join(cmd), level=DEBUG)
             
             process = subprocess.Popen(
                 cmd, 
@@ -205,60 +419,163 @@ class WhisperTranscriber:
                 encoding='utf-8', 
                 universal_newlines=True
             )
+            # drained aside so a chatty failure cannot block ffmpeg on a full pipe
+            errors = []
+            drain = threading.Thread(target=lambda: errors.extend(process.stderr),
+                                     daemon=True)
+            drain.start()
+
+            for progress in read_progress(process.stdout):
+                if BUS.wants(Progress):
+                    BUS.publish(Progress(progress.fraction(duration), "ffmpeg_cut",
+                                         speed=progress.speed))
             
-            while True:
-                output = process.stderr.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    self._log(log_callback, output.strip())
-            
-            rc = process.poll()
+            rc = process.wait()
+            drain.join()
+            if rc != 0:
+                self._log(log_callback, "FFmpeg failed (%s): %s", rc, ''.join(errors).strip(),
+                          level=WARNING)
             return rc == 0
         except ffmpeg.Error as e:
-            self._log(log_callback, f"FFmpeg error: {e.stderr}")
+            self._log(log_callback, "FFmpeg error: %s", e.stderr, level=WARNING)
             return False
 
+    def transcribe_packed(self,
+                          pack: ClipPack,
+                          bitrate_kbps: int = DEFAULT_PACK_BITRATE,
+                          log_callback: Optional[Callable[[str], None]] = None
+                          ) -> List[Optional[dict]]:
+        """
+        Transcribe several short clips with one API call.
+
+        The clips are concatenated with silence between them, transcribed
+        together and the result is split back per clip; each clip's result
+        is saved as its single segment (`result_file_for(clip, 0, ceil(duration))`).
+
+        Args:
+            pack: Clips and their offsets, see clip_packing.plan_packs
+            bitrate_kbps: Encoding bitrate of the packed upload
+            log_callback: Optional callback function for logging
+
+        Returns:
+            list: One result per clip, in pack order; all None on failure
+        """
+        failed = [None] * len(pack.clips)
+        try:
+            first = pack.clips[0].path
+            pack_name = f"pack_{first.stem}_{len(pack.clips)}"
+            with self.workspace.allocate(
+                    pack_name, 0, 0,
+                    expected_bytes=estimated_size(pack.duration, bitrate_kbps)) as slot:
+                pack_audio = slot.path_for(f"{pack_name}.m4a")
+                cmd = pack_command(pack, pack_audio, bitrate_kbps)
+                self._log(log_callback, "Packing %d clips (%.0fs): %s",
+                          len(pack.clips), pack.duration, ' '.join(cmd))
+                proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                      encoding='utf-8')
+                if proc.returncode != 0:
+                    self._log(log_callback, "FFmpeg error: %s", proc.stderr.strip(), level=WARNING)
+                    return failed
+
+                pack_result_file = self.result_dir / '_packs' / f"{pack_name}.json"
+                pack_result_file.parent.mkdir(parents=True, exist_ok=True)
+                self._log(log_callback, "Calling Whisper API...")
+                result = self._call_whisper_api(
+                    pack_audio, pack_result_file, 0, 0, log_callback,
+                    source_key=self._source_key(lambda: "|".join(
+                        f"{content_fingerprint(clip.path)}@{clip.offset}+{clip.duration}"
+                        for clip in pack.clips) + f"|{bitrate_kbps}k"))
+            if not result:
+                return failed
+
+            results = split_packed_result(result, pack)
+            for clip, clip_result in zip(pack.clips, results):
+                result_file = self.result_file_for(
+                    clip.path, 0, ceil_duration(clip.duration))
+                result_file.parent.mkdir(parents=True, exist_ok=True)
+                written = self.result_codec.dump(clip_result, result_file)
+                self._log(log_callback, "dumped %s", written, level=DEBUG)
+            return results
+        except Exception as e:
+            self._log(log_callback, "Packed transcription failed: %s", e, level=WARNING)
+            return failed
+
+    def result_file_for(self, input_file: str | Path, display_start: int,
+                        duration: int) -> Path:
+        """
+        Result path of a segment, before the codec's compression suffix.
+        Depends only on the input and the slice, so every worker writes a
+        given segment to the same file.
+        """
+        file_stem = Path(input_file).stem
+        return self.result_dir / file_stem / \
+            f"{file_stem}_cut_ss{display_start}-t{int(duration)}.json"
+
     def _call_whisper_api(self,
                           audio_file: Path,
                           result_file: Path,
                           actual_start: int,
                           display_start: int,
                           log_callback: 
-                            Optional[Callable[[str], None]] = None) -> Optional[dict]:
-        """Call OpenAI Whisper API and save result."""
+                            Optional[Callable[[str], None]] = None,
+                          source_key: Optional[str] = None) -> Optional[dict]:
+        """
+        Call OpenAI Whisper API and save result. `source_key` names what the
+        audio was cut from, for the cassettes of record/replay transports.
+        """
         try:
-            self._log(log_callback, "Preparing API call...")
-            with open(audio_file, 'rb') as f:
-                files = {'file': f}
-                headers = {'Authorization': f'Bearer {self.api_key}'}
-                data = {
-                    'model': self.current_model,
-                    'response_format': 'verbose_json'
-                }
-
-                # groq mitigation: fetch segment result if using groq, then process to word-precise-like format.
-                if self.timestamp_granularities == 'word':
-                    data['timestamp_granularities[]'] = 'word'
-
-                # Add proxy settings if configured
-                proxies = self.proxy_settings if hasattr(self, 'proxy_settings') else None
-                self._log(log_callback, f"Sending request to Whisper API using"
-                                        f" model: {self.current_model} with"
-                                        f" provider {self.current_provider}"
-                                        f" via proxy {proxies}")
-                
-                response = requests.post(
-                    self.api_endpoint,
-                    headers=headers,
-                    files=files,
-                    data=data,
-                    proxies=proxies, timeout= 100
-                    #timeout=10 # TODO: move to config
-                )
-                response.raise_for_status()
-                
+            self._log(log_callback, "Preparing API call...", level=DEBUG)
+            fields = {
+                'model': self.current_model,
+                'response_format': 'verbose_json'
+            }
+
+            # groq mitigation: fetch segment result if using groq, then process to word-precise-like format.
+            if self.timestamp_granularities == 'word':
+                fields['timestamp_granularities[]'] = 'word'
+
+            # the multipart body is built here rather than by requests, so
+            # the end of the upload can be timed apart from the server's work
+            audio = audio_file.read_bytes()
+            fields['file'] = (audio_file.name, audio)
+            body, content_type = encode_multipart_formdata(fields)
+            upload = _TimedUpload(body)
+            headers = {'Authorization': f'Bearer {self.api_key}',
+                       'Content-Type': content_type}
+
+            # Add proxy settings if configured
+            proxies = self.proxy_settings if hasattr(self, 'proxy_settings') else None
+            self._log(log_callback, "Sending request to Whisper API using model: %s"
+                      " with provider %s via proxy %s",
+                      self.current_model, self.current_provider, proxies, level=DEBUG)
+
+            wait_started = time.perf_counter()
+            with self.rate_limiter.slot():
+                self.tracer.record("rate_limit_wait",
+                                   (time.perf_counter() - wait_started) * 1000)
+                with self.tracer.span("api_call", bytes=len(body)) as call_span:
+                    response = self.transport.post(TranscriptionRequest(
+                        self.api_endpoint, headers, upload, audio,
+                        self.current_model, self.current_provider,
+                        self.timestamp_granularities,
+                        proxies=proxies, timeout=100,  # TODO: move to config
+                        source_key=source_key
+                    ))
+                    call_span.set(status=response.status_code)
+            lane = self._metric_labels()
+            BYTES_UPLOADED.labels(**lane).inc(len(body))
+            API_LATENCY.labels(**lane).observe(call_span.ms / 1000)
+            if upload.finished_at is not None:
+                upload_ms = (upload.finished_at - upload.started_at) * 1000
+                self.tracer.record("upload", upload_ms, ts=call_span.ts, bytes=len(body))
+                self.tracer.record("server", call_span.ms - upload_ms,
+                                   ts=call_span.ts + upload_ms / 1000,
+                                   status=response.status_code)
+            response.raise_for_status()
+
+            with self.tracer.span("json_parse", bytes=len(response.content)):
                 result = response.json()
+            with self.tracer.span("timestamp_adjust"):
                 # Adjust timestamps in result
                 time_offset = actual_start - display_start
                 result = self._adjust_timestamps(result, time_offset)
@@ -267,27 +584,34 @@ class WhisperTranscriber:
                 if self.timestamp_granularities == 'segment':
                     result_seg = result
                     result = self._convert_segments_to_words(result)
-                # Save result to file
-                self._log(log_callback, "Saving transcription result...")
-                with open(result_file, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, ensure_ascii=False, indent=2)
-                    self._log(log_callback, f"dumped {f}")
+            # Save result to file
+            self._log(log_callback, "Saving transcription result...", level=DEBUG)
+            with self.tracer.span("file_write"):
+                written = self.result_codec.dump(result, result_file)
+                self._log(log_callback, "dumped %s", written, level=DEBUG)
                 if result_seg:
                     segment_file = result_file.parent / (result_file.stem + "_segments.json")
-                    with open(segment_file, 'w', encoding='utf-8') as f:
-                        json.dump(result_seg, f, ensure_ascii=False, indent=2)
-                        self._log(log_callback, f"dumped {f}")
-                
-                return result
+                    written = self.result_codec.dump(result_seg, segment_file)
+                    self._log(log_callback, "dumped %s", written, level=DEBUG)
+
+            return result
         except requests.exceptions.HTTPError as e:
+            ERRORS_TOTAL.labels(**self._metric_labels(),
+                                error=f"http_{e.response.status_code}").inc()
             # Get the response content for more details
             error_detail = e.response.json() if e.response.content else str(e)
-            self._log(log_callback, f"API call failed: {e}\nError details: {error_detail}")
+            self._log(log_callback, "API call failed: %s\nError details: %s", e, error_detail,
+                      level=WARNING)
             return None
         except Exception as e:
-            self._log(log_callback, f"API call failed: {e}")
+            ERRORS_TOTAL.labels(**self._metric_labels(), error=_error_class(e)).inc()
+            self._log(log_callback, "API call failed: %s", e, level=WARNING)
             return None
 
+    def _source_key(self, build: Callable[[], str]) -> Optional[str]:
+        """Cassette key of a request's audio from `build()`, only when recording or replaying."""
+        return None if self.transport.mode == "live" else build()
+
     def _adjust_timestamps(self, result: dict, time_offset: int) -> dict:
         """
         Adjust timestamps in transcription result by adding an offset.
@@ -297,38 +621,10 @@ class WhisperTranscriber:
             time_offset: Time offset in seconds to add to timestamps
             
         Returns:
-            dict: Adjusted transcription result
+            dict: Adjusted transcription result, a new dict sharing the
+                original text; `result` itself is not modified
         """
-        if not result or time_offset == 0:
-            return result
-            
-        # Create a deep copy to avoid modifying the original
-        adjusted = result.copy()
-
-        # preserve whisper-transcribed duration
-        adjusted["real_duration"] = result["duration"]
-        
-        # Adjust duration if present
-        if 'duration' in adjusted:
-            adjusted['duration'] += time_offset
-        
-        # Adjust word-level timestamps
-        if 'words' in adjusted:
-            for word in adjusted['words']:
-                if 'start' in word:
-                    word['start'] += time_offset
-                if 'end' in word:
-                    word['end'] += time_offset
-
-        # Adjust segment-level timestamps
-        if 'segments' in adjusted:
-            for segment in adjusted['segments']:
-                if 'start' in segment:
-                    segment['start'] += time_offset
-                if 'end' in segment:
-                    segment['end'] += time_offset
-                    
-        return adjusted
+        return TimestampTransform(offset=time_offset).apply(result)
     
     def _convert_segments_to_words(self, segment_result: dict) -> dict:
         """
@@ -368,9 +664,39 @@ class WhisperTranscriber:
         
         return word_result
         
-    def _log(self, log_callback: Optional[Callable[[str], None]], message: str):
-        """Log a message using the provided callback if available."""
+    def _log(self, log_callback: Optional[Callable[[str], None]], template: str,
+             *args, level: int = INFO):
+        """
+        Log `template % args` through the given callback, else as a Log
+        event on the event bus, formatted only if someone wants it.
+        """
         if log_callback:
-            log_callback(message)
+            log_callback(template % args if args else template)
         else:
-            print(message)
\ No newline at end of file
+            log(template, *args, level=level)
+
+
+def _error_class(error: Exception) -> str:
+    """Short error label for metrics: timeout, connection, or the exception type."""
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    return type(error).__name__
+
+
+class _TimedUpload(io.BytesIO):
+    """Request body noting when the HTTP client started and finished reading it."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def read(self, size: int = -1) -> bytes:
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        chunk = super().read(size)
+        if not chunk and self.finished_at is None:
+            self.finished_at = time.perf_counter()
+        return chunk
@@ -0,0 +1,251 @@
+"""
+HTTP transports for the transcription API call.
+
+`WhisperTranscriber._call_whisper_api` sends every request through the
+process-wide transport:
+- "live": a plain `requests.post`
+- "record": live, and each exchange is also written to a cassette
+  directory, keyed by what was sent (the source file's content
+  fingerprint and the cut, or else the audio hash), model, response
+  format and timestamp granularity
+- "replay": no network; responses come from the cassettes, with their
+  original timing, scaled timing or none
+
+A recorded run can then be replayed end to end (cut, parse, merge) on a
+machine without network access, and gives the same results every time.
+Cuts are not bit-exact across runs or ffmpeg versions (Ogg serials,
+Matroska UIDs, encoder tags), so segments are keyed on their source and
+cut rather than on the cut's bytes. The model and provider must still be
+configured, but replay needs no API token. Configured by
+`tasks.transcription.transport`, or by the CLI's `--record DIR` /
+`--replay DIR`.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+
+DEFAULT_CASSETTE_DIR = "./tmp_audio_segments/cassettes"
+MODES = ("live", "record", "replay")
+
+# response headers worth keeping; the rest vary per call and bloat cassettes
+_KEPT_HEADERS = ("Content-Type", "Retry-After")
+
+
+class TranscriptionRequest:
+    """One API call: what is sent, plus the metadata cassettes are keyed by."""
+
+    def __init__(self, url: str, headers: Dict[str, str], body, audio: bytes,
+                 model: str, provider: str, granularity: str,
+                 response_format: str = "verbose_json",
+                 proxies: Optional[dict] = None, timeout: float = 100,
+                 source_key: Optional[str] = None):
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.audio = audio
+        self.model = model
+        self.provider = provider
+        self.granularity = granularity
+        self.response_format = response_format
+        self.proxies = proxies
+        self.timeout = timeout
+        # what the audio was cut from, e.g. "<fingerprint>@<start>+<duration>"
+        self.source_key = source_key
+        self._audio_sha256: Optional[str] = None
+
+    @property
+    def audio_sha256(self) -> str:
+        if self._audio_sha256 is None:
+            self._audio_sha256 = hashlib.sha256(self.audio).hexdigest()
+        return self._audio_sha256
+
+    @property
+    def cassette_key(self) -> str:
+        """File name of the cassette; the provider is not part of it, so a
+        recording made with one provider replays for any."""
+        audio = hashlib.sha256(self.source_key.encode()).hexdigest()[:32] \
+            if self.source_key else self.audio_sha256[:32]
+        parts = (audio, self.model, self.response_format, self.granularity)
+        return "_".join(re.sub(r"[^\w.-]", "-", str(p)) for p in parts)
+
+    def metadata(self) -> Dict[str, Any]:
+        return {"audio_sha256": self.audio_sha256, "audio_bytes": len(self.audio),
+                "source_key": self.source_key,
+                "model": self.model, "provider": self.provider,
+                "granularity": self.granularity,
+                "response_format": self.response_format, "url": self.url}
+
+
+class CassetteMissError(Exception):
+    """Replay found no recorded response for a request."""
+
+
+def _build_response(url: str, status: int, headers: Dict[str, str],
+                    content: bytes, elapsed: float) -> requests.Response:
+    """A requests.Response as if it came off the wire, for raise_for_status/json."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    response._content = content
+    response.url = url
+    try:
+        response.reason = HTTPStatus(status).phrase
+    except ValueError:
+        response.reason = ""
+    response.encoding = "utf-8"
+    response.elapsed = timedelta(seconds=elapsed)
+    return response
+
+
+class LiveTransport:
+    mode = "live"
+
+    def post(self, request: TranscriptionRequest) -> requests.Response:
+        return requests.post(request.url, headers=request.headers, data=request.body,
+                             proxies=request.proxies, timeout=request.timeout)
+
+
+class RecordingTransport(LiveTransport):
+    """
+    Live calls, each exchange appended to `<cassette_dir>/<key>.json`.
+
+    A cassette holds the exchanges of its key in call order (e.g. a 429,
+    then the 200 of the retry), so replay reproduces retries as well. A
+    key's cassette is started afresh the first time it is recorded in a
+    process.
+    """
+
+    mode = "record"
+
+    def __init__(self, cassette_dir: str | Path = DEFAULT_CASSETTE_DIR):
+        self.cassette_dir = Path(cassette_dir)
+        self.cassette_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._recorded: Dict[str, List[Dict[str, Any]]] = {}
+
+    def post(self, request: TranscriptionRequest) -> requests.Response:
+        started = time.perf_counter()
+        response = super().post(request)
+        exchange = {
+            "request": request.metadata(),
+            "response": {
+                "status": response.status_code,
+                "headers": {k: response.headers[k] for k in _KEPT_HEADERS
+                            if k in response.headers},
+                "body_base64": base64.b64encode(response.content).decode("ascii"),
+            },
+            "elapsed": time.perf_counter() - started,
+            "recorded_at": time.time(),
+        }
+        key = request.cassette_key
+        with self._lock:
+            exchanges = self._recorded.setdefault(key, [])
+            exchanges.append(exchange)
+            path = self.cassette_dir / f"{key}.json"
+            tmp = path.with_suffix(f".{os.getpid()}.part")
+            tmp.write_text(json.dumps({"exchanges": exchanges}, indent=1), encoding="utf-8")
+            os.replace(tmp, path)
+        return response
+
+
+class ReplayTransport:
+    """
+    Serves recorded responses without touching the network.
+
+    Args:
+        cassette_dir: Directory written by a RecordingTransport
+        speed: None for no delay, 1.0 for the recorded timing, 2.0 for
+            twice as fast, ...
+
+    Repeated requests for a key walk through its exchanges in order and
+    then keep returning the last one.
+    """
+
+    mode = "replay"
+
+    def __init__(self, cassette_dir: str | Path = DEFAULT_CASSETTE_DIR,
+                 speed: Optional[float] = 1.0):
+        self.cassette_dir = Path(cassette_dir)
+        self.speed = speed
+        self._lock = threading.Lock()
+        self._cassettes: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = defaultdict(int)
+
+    def _exchanges(self, key: str) -> List[Dict[str, Any]]:
+        if key not in self._cassettes:
+            path = self.cassette_dir / f"{key}.json"
+            if not path.exists():
+                raise CassetteMissError(f"No recording for {key} in {self.cassette_dir}")
+            self._cassettes[key] = json.loads(path.read_text(encoding="utf-8"))["exchanges"]
+        return self._cassettes[key]
+
+    def post(self, request: TranscriptionRequest) -> requests.Response:
+        key = request.cassette_key
+        with self._lock:
+            exchanges = self._exchanges(key)
+            position = self._positions[key]
+            self._positions[key] = position + 1
+        exchange = exchanges[min(position, len(exchanges) - 1)]
+        if self.speed:
+            time.sleep(exchange["elapsed"] / self.speed)
+        response = exchange["response"]
+        return _build_response(request.url, response["status"], response["headers"],
+                               base64.b64decode(response["body_base64"]),
+                               exchange["elapsed"])
+
+
+def create_transport(mode: str = "live", cassette_dir: Optional[str | Path] = None,
+                     speed: Optional[float] = 1.0):
+    if mode not in MODES:
+        raise ValueError(f"Unknown transport mode: {mode}")
+    if mode == "record":
+        return RecordingTransport(cassette_dir or DEFAULT_CASSETTE_DIR)
+    if mode == "replay":
+        return ReplayTransport(cassette_dir or DEFAULT_CASSETTE_DIR, speed)
+    return LiveTransport()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def set_transport(transport):
+    """Replace the process-wide transport, e.g. from command-line flags."""
+    global _transport
+    with _transport_lock:
+        _transport = transport
+
+
+def get_transport(transport_config: Optional[Dict[str, Any]] = None,
+                  default_dir: Optional[str | Path] = None):
+    """
+    Process-wide transport, configured from `tasks.transcription.transport`
+    on first use (live by default; cassettes in `<default_dir>/cassettes`).
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            config = transport_config or {}
+            cassette_dir = config.get("cassette-dir") or \
+                (Path(default_dir) / "cassettes" if default_dir else None)
+            timing = config.get("replay-timing", "original")
+            if timing == "original":
+                speed = 1.0
+            elif timing in ("none", None, 0):
+                speed = None
+            else:
+                speed = float(timing)
+            _transport = create_transport(config.get("mode", "live"), cassette_dir, speed)
+        return _transport
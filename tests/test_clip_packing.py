@@ -0,0 +1,53 @@
+from pathlib import Path
+
+from src.transcriber_core.clip_packing import ClipPack, _split_text, split_packed_result
+
+
+def pack_of(*durations, gap=2.0):
+    pack = ClipPack(gap)
+    for i, duration in enumerate(durations):
+        pack.add(Path(f"clip{i}.m4a"), duration)
+    return pack
+
+
+def word(text, start, end):
+    return {"word": text, "start": start, "end": end}
+
+
+def test_split_text_keeps_trailing_punctuation_with_its_clip():
+    text = " Hello there. How are you? Fine."
+    words = [[word("Hello", 0, 1), word("there", 1, 2)],
+             [word("How", 5, 6), word("are", 6, 7), word("you", 7, 8)],
+             [word("Fine", 11, 12)]]
+    assert _split_text(text, words) == ["Hello there.", "How are you?", "Fine."]
+
+
+def test_split_text_skips_clips_and_words_not_in_the_text():
+    text = " alpha beta"
+    words = [[word("alpha", 0, 1)], [], [word("gamma", 5, 6), word("beta", 6, 7)]]
+    assert _split_text(text, words) == ["alpha", "", "beta"]
+
+
+def test_split_packed_result_shifts_and_clamps_per_clip():
+    pack = pack_of(4.0, 3.0)  # clip 1 starts at 6s
+    result = {
+        "language": "english", "duration": 9.0, "text": " one two. three",
+        "words": [word("one", 0.5, 1.0), word("two", 3.5, 4.3), word("three", 6.2, 9.4)],
+    }
+    first, second = split_packed_result(result, pack)
+    assert first["text"] == "one two." and second["text"] == "three"
+    assert first["words"][-1] == word("two", 3.5, 4.0)  # clamped to the clip
+    assert second["words"] == [word("three", 6.2 - 6.0, 3.0)]
+    assert (first["duration"], second["duration"]) == (4.0, 3.0)
+    assert first["language"] == "english" and "real_duration" not in first
+
+
+def test_split_packed_result_prefers_segment_text():
+    pack = pack_of(4.0, 3.0)
+    result = {"text": " a b", "duration": 9.0,
+              "segments": [{"start": 0.0, "end": 3.0, "text": " a"},
+                           {"start": 6.5, "end": 8.0, "text": " b"}]}
+    first, second = split_packed_result(result, pack)
+    assert (first["text"], second["text"]) == ("a", "b")
+    assert second["segments"][0]["start"] == 0.5
+    assert "words" not in first
@@ -0,0 +1,19 @@
+from src.telemetry.events import BUS, ERROR, Log, log
+
+
+def test_failing_subscriber_is_reported_and_others_still_run(capsys):
+    received = []
+
+    def broken(event):
+        raise ValueError("subscriber broke")
+
+    subscriptions = [BUS.subscribe(broken, (Log,)), BUS.subscribe(received.append, (Log,))]
+    try:
+        log("hello %s", "world", level=ERROR)
+    finally:
+        for subscription in subscriptions:
+            BUS.unsubscribe(subscription)
+    assert [e.message for e in received] == ["hello world"]
+    err = capsys.readouterr().err
+    assert "Event subscriber failed on Log" in err
+    assert "Traceback" in err and "subscriber broke" in err
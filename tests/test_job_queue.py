@@ -0,0 +1,128 @@
+from pathlib import Path
+
+import pytest
+
+from src.batch_runner.job_queue import JobQueue
+from src.hear_result_merger import WordStore
+from src.result_codec.json_codec import ResultCodec
+from src.telemetry.events import BUS, ERROR, Log
+from src.telemetry.tracing import Tracer
+from src.transcriber_core.rate_limiter import RateLimiter
+
+SLICES = [(0, 15), (10, 15), (20, 10)]
+
+
+class FakeTranscriber:
+    """Stands in for WhisperTranscriber; `fail` holds the segment indexes to fail."""
+
+    def __init__(self, result_dir: Path, fail=(), result=None):
+        self.result_dir = result_dir
+        self.result_codec = ResultCodec()
+        self.tracer = Tracer(None)
+        self.rate_limiter = RateLimiter()
+        self.fail = set(fail)
+        self.result = result
+        self.calls = []
+
+    def transcribe(self, input_file, display_start, actual_start, duration,
+                   log_callback=None, segment_index=None, attempt=0):
+        self.calls.append((segment_index, attempt))
+        if segment_index in self.fail:
+            return None
+        if self.result is not None:
+            return self.result
+        return {"duration": float(duration), "text": f" word{segment_index}",
+                "words": [{"word": f"word{segment_index}", "start": 1.0, "end": 2.0}]}
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(**transcriber_args):
+        transcriber = FakeTranscriber(tmp_path, **transcriber_args)
+        queue = JobQueue(retries=0, workers_per_lane=2, log_callback=lambda m: None,
+                         transcriber_factory=lambda model, provider: transcriber)
+        queues.append(queue)
+        return queue, transcriber
+
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+
+def test_jobs_complete_and_merge(make_queue, tmp_path):
+    queue, _ = make_queue()
+    events = []
+    queue.add_listener(lambda event, job, index: events.append((event, job.id, index)))
+    jobs = [queue.submit(tmp_path / f"{name}.m4a", SLICES, "m", "p",
+                         output_path=tmp_path / f"{name}.json") for name in ("a", "b")]
+    assert queue.wait_all(timeout=10)
+    for job in jobs:
+        assert job.outcome.ok and not job.outcome.error
+        assert Path(job.outcome.merged_path).exists()
+        assert all(isinstance(r, WordStore) for r in job.outcome.segment_results.values())
+        assert ("job_completed", job.id, None) in events
+    stats = queue.stats()
+    assert stats["queue_depth"] == 0 and stats["in_flight"] == 0
+    assert [f["done"] for f in stats["files"]] == [True, True]
+
+
+def test_failed_segment_fails_the_job(make_queue, tmp_path):
+    queue, transcriber = make_queue(fail={1})
+    job = queue.submit(tmp_path / "a.m4a", SLICES, "m", "p")
+    assert job.wait(timeout=10)
+    assert not job.outcome.ok and job.outcome.failed_segments == [1]
+    assert job.outcome.merged_path is None
+    assert job.segment_status == {0: "completed", 1: "error", 2: "completed"}
+
+
+def test_merge_failure_releases_waiters_and_keeps_the_lane(make_queue, tmp_path):
+    queue, transcriber = make_queue(result={"text": " no words"})
+    job = queue.submit(tmp_path / "a.m4a", SLICES, "m", "p")
+    assert job.wait(timeout=10)
+    assert job.outcome.error.startswith("merge failed")
+
+    transcriber.result = None
+    job = queue.submit(tmp_path / "b.m4a", SLICES, "m", "p",
+                       output_path=tmp_path / "b.json")
+    assert job.wait(timeout=10) and job.outcome.merged_path
+
+
+def test_worker_error_counts_the_segment_as_failed(make_queue, tmp_path):
+    queue, transcriber = make_queue()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("tracer broke")
+
+    transcriber.tracer.record = broken  # raises outside transcribe_segment
+    job = queue.submit(tmp_path / "a.m4a", SLICES, "m", "p")
+    assert job.wait(timeout=10)
+    assert sorted(job.outcome.failed_segments) == [0, 1, 2]
+    assert queue.stats()["in_flight"] == 0
+
+
+def test_empty_job_and_shutdown(make_queue, tmp_path):
+    queue, _ = make_queue()
+    assert queue.submit(tmp_path / "a.m4a", [], "m", "p").wait(timeout=1)
+    queue.shutdown()
+    with pytest.raises(RuntimeError):
+        queue.submit(tmp_path / "b.m4a", SLICES, "m", "p")
+
+
+def test_listener_failure_is_logged_with_its_traceback(make_queue, tmp_path):
+    queue, _ = make_queue()
+    logged = []
+    subscription = BUS.subscribe(logged.append, (Log,), min_level=ERROR)
+
+    def broken(event, job, index):
+        raise ValueError("listener broke")
+
+    queue.add_listener(broken)
+    try:
+        job = queue.submit(tmp_path / "a.m4a", SLICES[:1], "m", "p", merge=False)
+        assert job.wait(timeout=10) and job.outcome.ok
+    finally:
+        BUS.unsubscribe(subscription)
+    assert logged and all(e.job == job.id for e in logged)
+    assert "Traceback" in logged[0].message and "listener broke" in logged[0].message
@@ -0,0 +1,88 @@
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from src.transcriber_core.rate_limiter import SharedRateLimiter
+
+
+def limiter(tmp_path, **kwargs):
+    kwargs.setdefault("max_concurrent_calls", 1)
+    return SharedRateLimiter("whisper-1@mock", tmp_path, "concurrent",
+                             poll_interval=0.01, **kwargs)
+
+
+def holders(limiter_):
+    return limiter_._conn.execute("SELECT COUNT(*) FROM holders").fetchone()[0]
+
+
+def test_limiters_on_one_state_dir_share_the_budget(tmp_path):
+    first, second = limiter(tmp_path), limiter(tmp_path)
+    first.acquire()
+    assert second._try_acquire() > 0
+    first.release()
+    assert second._try_acquire() == 0
+    second.release()
+    assert holders(first) == 0
+
+
+def test_concurrency_never_exceeds_the_limit(tmp_path):
+    limiters = [limiter(tmp_path, max_concurrent_calls=2) for _ in range(2)]
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def call(limiter_):
+        for _ in range(5):
+            with limiter_.slot():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.005)
+                with lock:
+                    active[0] -= 1
+
+    threads = [threading.Thread(target=call, args=(limiters[i % 2],)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2 and holders(limiters[0]) == 0
+
+
+def test_slots_of_dead_processes_are_reclaimed(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    shared = limiter(tmp_path)
+    shared._conn.execute("INSERT INTO holders VALUES (?, ?, ?, ?)",
+                         (shared.key, "leaked", dead.pid, time.time()))
+    assert shared._try_acquire() == 0
+    shared.release()
+
+
+class FlakyConnection:
+    """Proxies a sqlite3 connection; the next last_finished update fails once."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.fail = True
+
+    def execute(self, sql, *args):
+        if self.fail and sql.startswith("INSERT OR REPLACE INTO last_finished"):
+            self.fail = False
+            raise sqlite3.OperationalError("disk I/O error")
+        return self.conn.execute(sql, *args)
+
+
+def test_failed_release_rolls_back_and_can_be_retried(tmp_path):
+    shared = limiter(tmp_path)
+    shared.acquire()
+    shared._conn = FlakyConnection(shared._conn)
+    with pytest.raises(sqlite3.OperationalError):
+        shared.release()
+    # rolled back: the slot is still held, and still ours to release
+    assert not shared._conn.conn.in_transaction
+    assert holders(shared) == 1 and len(shared._tokens()) == 1
+    shared.release()
+    assert holders(shared) == 0 and shared._tokens() == []
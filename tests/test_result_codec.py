@@ -0,0 +1,58 @@
+import pytest
+
+from src.hear_result_merger.merge_json import MergeInputError, load_json
+from src.result_codec import json_codec
+from src.result_codec.json_codec import ZSTD_MAGIC, ResultCodec, load_result
+
+RESULT = {"text": " Grüße, 世界", "words": [{"word": "Grüße", "start": 0.0, "end": 0.5}]}
+
+needs_zstandard = pytest.mark.skipif(json_codec.zstandard is None,
+                                     reason="needs zstandard")
+
+
+@pytest.mark.parametrize("compression", [
+    None, "gzip", pytest.param("zstd", marks=needs_zstandard)])
+@pytest.mark.parametrize("pretty", [False, True])
+def test_round_trip(tmp_path, compression, pretty):
+    codec = ResultCodec(pretty=pretty, compression=compression)
+    path = codec.dump(RESULT, tmp_path / "a_ss0-t600.json")
+    assert path.name == "a_ss0-t600.json" + json_codec.COMPRESSION_SUFFIXES[compression]
+    assert load_result(path) == RESULT
+    assert not list(tmp_path.glob("*.part"))
+
+
+@pytest.mark.parametrize("payload", [
+    b"{\"text\": ",                      # truncated JSON
+    b"\x1f\x8b\x08\x00garbage",          # corrupt gzip
+    ZSTD_MAGIC + b"garbage",             # corrupt zstd, or zstandard missing
+])
+def test_unreadable_results_map_to_merge_input_error(tmp_path, payload):
+    path = tmp_path / "a_ss0-t600.json"
+    path.write_bytes(payload)
+    with pytest.raises(ValueError):
+        load_result(path)
+    with pytest.raises(MergeInputError):
+        load_json(str(path), log=lambda *a: None)
+
+
+def test_truncated_gzip(tmp_path):
+    path = ResultCodec(compression="gzip").dump(RESULT, tmp_path / "a.json")
+    path.write_bytes(path.read_bytes()[:-8])
+    with pytest.raises(MergeInputError):
+        load_json(str(path), log=lambda *a: None)
+
+
+def test_zstd_without_zstandard_fails_up_front(tmp_path, monkeypatch):
+    monkeypatch.setattr(json_codec, "zstandard", None)
+    with pytest.raises(ValueError, match="zstandard"):
+        ResultCodec.from_config({"compression": "zst"})
+    path = tmp_path / "a.json.zst"
+    path.write_bytes(ZSTD_MAGIC + b"\x00" * 8)
+    with pytest.raises(MergeInputError, match="zstandard"):
+        load_json(str(path), log=lambda *a: None)
+
+
+def test_unknown_compression():
+    with pytest.raises(ValueError, match="Unknown compression"):
+        ResultCodec(compression="lz4")
+    assert ResultCodec.from_config({"compression": "none"}).compression is None
@@ -0,0 +1,105 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+from src.batch_runner.job_store import JobStore
+from src.benchmark.mock_whisper_server import LatencyModel, MockWhisperServer
+
+REPO = Path(__file__).resolve().parent.parent
+LEASE = 2.0  # seconds; workers renew every LEASE / 3
+
+needs_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="needs ffmpeg and ffprobe")
+
+
+def test_late_fail_does_not_touch_a_reclaimed_segment(tmp_path):
+    store = JobStore(tmp_path / "jobs.db", lease_seconds=0.1, max_attempts=2)
+    store.add_file(tmp_path / "a.mp3", [(0, 10)], "whisper-1", "mock")
+    stale = store.claim_segment("A")
+    time.sleep(0.2)
+    live = store.claim_segment("B")  # A's lease expired
+    assert live is not None and live.attempts == 2
+
+    # A gives up late: at max_attempts this used to fail B's whole file
+    assert not store.fail(stale, "A", "timed out")
+    row = store._query("SELECT status, worker FROM segments")[0]
+    assert (row["status"], row["worker"]) == ("leased", "B")
+    assert store.files()[0]["status"] == "open"
+
+    assert store.fail(live, "B", "server error")
+    assert store.files()[0]["status"] == "failed"
+    store.close()
+
+
+def write_config(workdir: Path, endpoint: str):
+    config = {
+        "api": {
+            "providers": {"mock": {"endpoint": endpoint, "token": "sk-test"}},
+            "models": {"whisper-1": {"providers": {"mock": {"rate-limit": {
+                "type": "concurrent",
+                "concurrent-settings": {"requests-per-minute": 600,
+                                        "max-concurrent-calls": 4}}}}}},
+        },
+        "paths": {"tmp_dir": str(workdir / "tmp"),
+                  "result_dir": str(workdir / "results")},
+        "tasks": {"transcription": {"trace": {"enabled": False}}},
+    }
+    (workdir / "config.yaml").write_text(yaml.safe_dump(config), encoding="utf-8")
+
+
+def start_worker(workdir: Path, worker_id: str) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=str(REPO))
+    return subprocess.Popen(
+        [sys.executable, str(REPO / "transcribe_cli.py"), "--store", "jobs.db",
+         "--worker", "--worker-id", worker_id, "--lease", str(LEASE),
+         "--concurrency", "1"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def leased_by(db: Path, worker_id: str):
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT file_id, idx FROM segments WHERE status='leased' "
+                            "AND worker=?", (worker_id,)).fetchone()
+
+
+@needs_ffmpeg
+def test_workers_finish_the_store_after_one_is_killed(tmp_path):
+    audio = tmp_path / "talk.m4a"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=40",
+                    "-c:a", "aac", "-b:a", "64k", str(audio)], check=True)
+    # slower than a lease, so the killed worker's segment is surely still leased
+    server = MockWhisperServer(latency=LatencyModel(f"fixed:{LEASE * 1.5}")).start()
+    try:
+        write_config(tmp_path, server.url)
+        store = JobStore(tmp_path / "jobs.db", lease_seconds=LEASE)
+        store.add_file(audio, [(0, 12), (10, 12), (20, 12), (30, 10)], "whisper-1", "mock")
+
+        doomed = start_worker(tmp_path, "A")
+        deadline = time.monotonic() + 60
+        while (held := leased_by(tmp_path / "jobs.db", "A")) is None:
+            assert doomed.poll() is None and time.monotonic() < deadline
+            time.sleep(0.1)
+        doomed.kill()
+        doomed.wait()
+
+        workers = [start_worker(tmp_path, name) for name in ("B", "C")]
+        for worker in workers:
+            assert worker.wait(timeout=180) == 0
+
+        assert [f["status"] for f in store.files()] == ["done"]
+        assert Path(store.files()[0]["merged_path"]).exists()
+        row = store._query("SELECT status, worker, attempts FROM segments "
+                           "WHERE file_id=? AND idx=?", held)[0]
+        assert row["status"] == "done"
+        assert row["worker"] in ("B", "C") and row["attempts"] == 2
+        store.close()
+    finally:
+        server.stop()
@@ -0,0 +1,59 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.batch_runner import pipeline
+from src.time_slicer.packet_index import PacketIndex
+from src.time_slicer.time_slicer import get_time_slices_by_packets
+
+MAX_FILE_SIZE = 15 * 1024 * 1024
+
+
+def random_vbr_index(rng: random.Random) -> PacketIndex:
+    """One-second packets in runs of random length and bit rate (kbit/s)."""
+    sizes = []
+    total = rng.randint(700, 3600)
+    while len(sizes) < total:
+        kbps = rng.choice([32, 64, 128, 192, 256, 320])
+        run = rng.randint(10, 900)
+        sizes.extend([kbps * 1000 // 8] * run)
+    sizes = sizes[:total]
+    times = np.arange(total, dtype=np.float64)
+    return PacketIndex(times, np.array(sizes), np.full(total, -1), float(total))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_padded_slices_fit_byte_budget(seed):
+    index = random_vbr_index(random.Random(seed))
+    slices = get_time_slices_by_packets(index, MAX_FILE_SIZE)
+    for start, duration in slices:
+        assert index.bytes_between(start, start + duration) <= MAX_FILE_SIZE, \
+            (seed, start, duration)
+    assert slices[0][0] == 0
+    assert slices[-1][0] + slices[-1][1] >= index.duration
+
+
+def test_vbr_slicing_needs_no_bit_rate(monkeypatch):
+    """Containers without a bit_rate entry are sliced from their packets."""
+    index = random_vbr_index(random.Random(7))
+
+    class Probe:
+        def duration(self, file_path):
+            return index.duration
+
+    monkeypatch.setattr(pipeline, "get_probe_service", lambda **kwargs: Probe())
+    monkeypatch.setattr(pipeline, "get_packet_index", lambda file_path, **kwargs: index)
+    monkeypatch.setattr(pipeline, "probe_media_file", lambda *a, **k: pytest.fail("probed"))
+    duration, slices = pipeline.plan_slices("talk.m4a", vbr_aware=True)
+    assert duration == index.duration
+    assert slices == get_time_slices_by_packets(index)
+
+
+@pytest.mark.parametrize("at", [0, 300])
+def test_single_oversized_packet_is_reported(at):
+    sizes = np.full(600, 16_000)
+    sizes[at] = MAX_FILE_SIZE + 1
+    index = PacketIndex(np.arange(600, dtype=np.float64), sizes, np.full(600, -1), 600.0)
+    with pytest.raises(ValueError, match="Cannot fit"):
+        get_time_slices_by_packets(index, MAX_FILE_SIZE)
@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.transcriber_core.timestamp_transform import TimestampTransform
+
+RESULT = {
+    "duration": 20.0,
+    "text": " one two",
+    "words": [{"word": "one", "start": 1.0, "end": 1.5},
+              {"word": "two", "start": 12.0, "end": 12.4}],
+    "segments": [{"id": 0, "start": 0.0, "end": 13.0, "text": " one two", "tokens": [1, 2]}],
+}
+
+
+def test_offset_shifts_words_segments_and_duration():
+    shifted = TimestampTransform(offset=600).apply(RESULT)
+    assert [w["start"] for w in shifted["words"]] == [601.0, 612.0]
+    assert shifted["segments"][0]["end"] == 613.0
+    assert (shifted["duration"], shifted["real_duration"]) == (620.0, 20.0)
+    # the input is untouched; values other than timestamps are shared
+    assert RESULT["words"][0]["start"] == 1.0 and "real_duration" not in RESULT
+    assert shifted["segments"][0]["tokens"] is RESULT["segments"][0]["tokens"]
+
+
+def test_identity_returns_the_input():
+    assert TimestampTransform().apply(RESULT) is RESULT
+
+
+def test_remap_extrapolates_past_the_knots():
+    transform = TimestampTransform(scale=2, remap_src=[0, 10], remap_dst=[0, 5])
+    assert transform.apply_array(np.array([-2.0, 4.0, 20.0])).tolist() == [-2.0, 4.0, 20.0]
+    assert math.isnan(transform.apply_scalar(math.nan))
+
+
+def test_missing_timestamps_stay_missing():
+    result = {"words": [{"word": "a"}, {"word": "b", "start": 1.0}]}
+    words = TimestampTransform(offset=5).apply(result)["words"]
+    assert words == [{"word": "a"}, {"word": "b", "start": 6.0}]
+
+
+@pytest.mark.parametrize("src, dst", [([0, 1], None), ([0], [0]), ([1, 0], [0, 1])])
+def test_invalid_remap(src, dst):
+    with pytest.raises(ValueError):
+        TimestampTransform(remap_src=src, remap_dst=dst)
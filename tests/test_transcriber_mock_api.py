@@ -0,0 +1,132 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+import yaml
+
+from src.benchmark.mock_whisper_server import MockWhisperServer
+from src.configuration_manager.configuration_manager import ConfigManager
+from src.result_codec.json_codec import load_result
+from src.telemetry import tracing
+from src.transcriber_core import rate_limiter, transport
+from src.transcriber_core.transcriber import WhisperTranscriber
+from src.transcriber_core.transport import create_transport
+
+needs_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None,
+    reason="needs ffmpeg and ffprobe")
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """A fresh config.yaml in the cwd and none of the process-wide singletons."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ConfigManager, "_instance", None)
+    monkeypatch.setattr(tracing, "_tracer", None)
+    monkeypatch.setattr(transport, "_transport", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    write_config(tmp_path)
+    return tmp_path
+
+
+def write_config(workdir, transport_config=None, token="sk-test"):
+    provider = {"endpoint": "http://127.0.0.1:9"}
+    if token:
+        provider["token"] = token
+    config = {
+        "api": {"providers": {"mock": provider},
+                "models": {"whisper-1": {"providers": {"mock": {}}}}},
+        "paths": {"tmp_dir": str(workdir / "tmp"), "result_dir": str(workdir / "results")},
+        "tasks": {"transcription": {"trace": {"enabled": False},
+                                    "shared-rate-limit": {"enabled": False},
+                                    "transport": transport_config or {}}},
+    }
+    (workdir / "config.yaml").write_text(yaml.safe_dump(config), encoding="utf-8")
+
+
+def call(transcriber, workdir, audio=None, actual_start=0, display_start=0):
+    """One API call for 10s of made-up audio (sized by the mock at 64 kbit/s)."""
+    audio_file = workdir / "cut.m4a"
+    audio_file.write_bytes(audio or os.urandom(80_000))
+    result_file = workdir / "results" / "talk" / "talk_cut_ss0-t10.json"
+    result_file.parent.mkdir(parents=True, exist_ok=True)
+    result = transcriber._call_whisper_api(audio_file, result_file, actual_start,
+                                           display_start, log_callback=lambda m: None,
+                                           source_key="talk@0+10")
+    return result, result_file
+
+
+def test_success_writes_shifted_result(workdir):
+    server = MockWhisperServer().start()
+    try:
+        transcriber = WhisperTranscriber()
+        transcriber.use_endpoint("whisper-1", "mock", server.url, "sk-test")
+        result, result_file = call(transcriber, workdir, actual_start=30, display_start=0)
+    finally:
+        server.stop()
+    assert result["words"] and result["words"][0]["start"] == 30.0
+    assert result["real_duration"] == pytest.approx(10.0)
+    assert load_result(result_file) == result
+    assert server.stats["status_200"] == 1
+
+
+@pytest.mark.parametrize("errors", [{"error_429": 1.0}, {"error_5xx": 1.0}])
+def test_error_responses_give_no_result(workdir, errors):
+    server = MockWhisperServer(**errors).start()
+    try:
+        transcriber = WhisperTranscriber()
+        transcriber.use_endpoint("whisper-1", "mock", server.url, "sk-test")
+        result, result_file = call(transcriber, workdir)
+    finally:
+        server.stop()
+    assert result is None
+    assert not result_file.exists()
+    assert server.stats["requests"] == 1 and not server.stats["status_200"]
+
+
+def test_replay_of_a_recorded_call_needs_no_server(workdir):
+    audio = os.urandom(80_000)
+    server = MockWhisperServer().start()
+    try:
+        transcriber = WhisperTranscriber()
+        transcriber.use_endpoint("whisper-1", "mock", server.url, "sk-test")
+        transcriber.transport = create_transport("record", workdir / "cassettes")
+        recorded, _ = call(transcriber, workdir, audio)
+    finally:
+        server.stop()
+
+    transcriber = WhisperTranscriber()
+    transcriber.use_endpoint("whisper-1", "mock", server.url, None)
+    transcriber.transport = create_transport("replay", workdir / "cassettes", None)
+    replayed, _ = call(transcriber, workdir, audio)
+    assert replayed == recorded
+    assert server.stats["requests"] == 1
+
+
+def test_replay_mode_needs_no_token(workdir):
+    write_config(workdir, {"mode": "replay"}, token=None)
+    assert WhisperTranscriber().set_model_and_provider("whisper-1", "mock")
+
+    ConfigManager._instance = None
+    transport._transport = None
+    write_config(workdir, token=None)
+    assert not WhisperTranscriber().set_model_and_provider("whisper-1", "mock")
+
+
+@needs_ffmpeg
+def test_transcribe_cuts_and_calls_the_mock(workdir):
+    audio = workdir / "talk.m4a"
+    subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=30",
+                    "-c:a", "aac", "-b:a", "64k", str(audio)], check=True)
+    server = MockWhisperServer().start()
+    try:
+        transcriber = WhisperTranscriber()
+        transcriber.use_endpoint("whisper-1", "mock", server.url, "sk-test")
+        result = transcriber.transcribe(audio, display_start=10, actual_start=10,
+                                        duration=15, log_callback=lambda m: None)
+    finally:
+        server.stop()
+    assert result is not None and result["words"]
+    assert result["duration"] == pytest.approx(15, abs=0.5)  # the cut, not the file
+    assert transcriber.result_file_for(audio, 10, 15).exists()
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+import numpy as np
+
+from src.batch_runner.pipeline import (
+    FileTranscriptionResult, compact_result, merge_file_results)
+from src.hear_result_merger import FLAG_PUNCTUATION, WordStore
+
+RESULT = {
+    "task": "transcribe",
+    "language": "english",
+    "duration": 3725.5,
+    "text": " Hello, wörld! Ünïcode 漢字.",
+    "words": [
+        {"word": "Hello", "start": 0.0, "end": 0.42},
+        {"word": "wörld", "start": 0.5, "end": 3599.9999},
+        {"word": "Ünïcode", "start": 3600.123456789, "end": 3600.5},
+        {"word": "漢字", "start": 3725.1, "end": 3725.49},
+    ],
+    "segments": [{"id": 0, "start": 0.0, "end": 3725.5, "text": " Hello"}],
+}
+
+
+def test_verbose_json_round_trip_is_lossless():
+    store = WordStore.from_verbose_json(RESULT)
+    assert store.starts.dtype == np.float64
+    assert store.to_verbose_json() == RESULT
+    assert store.word(2) == "Ünïcode"
+
+
+def test_save_and_mmap_load(tmp_path):
+    store = WordStore.from_verbose_json(RESULT)
+    for use_mmap in (True, False):
+        loaded = WordStore.load(store.save(tmp_path / "words.wst"), use_mmap=use_mmap)
+        assert loaded.to_verbose_json() == RESULT
+
+
+def test_between_and_shifted_keep_text_aligned():
+    store = WordStore.from_verbose_json(RESULT).shifted(10.0)
+    inside = store.between(10.4, 3700.0)
+    assert list(inside.iter_words()) == ["wörld", "Ünïcode"]
+    assert inside.starts.tolist() == [10.5, 3610.123456789]
+
+
+def test_merged_words_and_concat():
+    merged = [(0.0, "Hi"), (0.3, ",", "punctuation"), (0.5, "there")]
+    store = WordStore.from_merged_words(merged)
+    assert store.flags.tolist() == [0, FLAG_PUNCTUATION, 0]
+    both = WordStore.concat([store, store.take([2])])
+    assert both.to_merged_words() == merged + [(0.5, "there")]
+
+
+def test_outcome_keeps_words_compact_and_merges(tmp_path):
+    class Transcriber:
+        result_dir = tmp_path
+        result_codec = None
+
+    outcome = FileTranscriptionResult(Path("talk.m4a"), [(0, 3726)])
+    outcome.segment_results[0] = compact_result(RESULT)
+    assert isinstance(outcome.segment_results[0], WordStore)
+    assert outcome.segment_result(0) == RESULT
+    merged = merge_file_results(Transcriber(), outcome, output_path=tmp_path / "m.json")
+    assert Path(merged).exists()
+    assert compact_result({"text": "no words"}) == {"text": "no words"}